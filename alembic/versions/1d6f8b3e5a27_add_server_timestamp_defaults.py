@@ -0,0 +1,42 @@
+"""Add server timestamp defaults
+
+Revision ID: 1d6f8b3e5a27
+Revises: f2a8d4c61b39
+Create Date: 2026-10-18 22:41:09.285173
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1d6f8b3e5a27"
+down_revision: Union[str, Sequence[str], None] = "f2a8d4c61b39"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = (
+    ("tasks", "created_at"),
+    ("tasks", "updated_at"),
+    ("users", "created_at"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Меняется только DEFAULT, существующие строки не переписываются
+    for table_name, column_name in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table_name,
+            column_name,
+            server_default=sa.text("localtimestamp"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name, column_name in TIMESTAMP_COLUMNS:
+        op.alter_column(table_name, column_name, server_default=None)
@@ -0,0 +1,41 @@
+"""Add users created_at index
+
+Revision ID: 3f9a1c2d7b45
+Revises: e560d354bdef
+Create Date: 2026-10-18 10:12:41.518203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9a1c2d7b45"
+down_revision: Union[str, Sequence[str], None] = "e560d354bdef"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не работает внутри транзакции, зато не блокирует запись
+    # в users на время построения индекса
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_users_created_at"),
+            "users",
+            ["created_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_users_created_at"),
+            table_name="users",
+            postgresql_concurrently=True,
+        )
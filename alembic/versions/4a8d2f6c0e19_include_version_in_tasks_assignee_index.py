@@ -0,0 +1,60 @@
+"""Include version in tasks assignee index
+
+Revision ID: 4a8d2f6c0e19
+Revises: 7b4e2c9d1f63
+Create Date: 2026-10-19 10:26:41.518307
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4a8d2f6c0e19"
+down_revision: Union[str, Sequence[str], None] = "7b4e2c9d1f63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_tasks_assignee_id_status_created_at"
+NEW_INDEX_NAME = f"{INDEX_NAME}_new"
+INCLUDE_COLUMNS = [
+    "id",
+    "title",
+    "updated_at",
+    "closed_at",
+    "started_work_at",
+]
+
+
+def replace_index(include_columns) -> None:
+    """Пересоздает индекс с другим INCLUDE без окна, когда его нет.
+
+    Новый индекс строится рядом со старым, затем старый удаляется, а новый
+    переименовывается.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            NEW_INDEX_NAME,
+            "tasks",
+            ["assignee_id", "status", "created_at"],
+            unique=False,
+            postgresql_include=include_columns,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            INDEX_NAME, table_name="tasks", postgresql_concurrently=True
+        )
+
+    op.execute(f"ALTER INDEX {NEW_INDEX_NAME} RENAME TO {INDEX_NAME}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # version нужен сводке для ETag списка задач (get_tasks_state)
+    replace_index([*INCLUDE_COLUMNS, "version"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    replace_index(INCLUDE_COLUMNS)
@@ -0,0 +1,68 @@
+"""Add tasks search vector
+
+Revision ID: 5d7b0e3a4c18
+Revises: 8c2e4f61a9d3
+Create Date: 2026-10-18 12:31:55.046371
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d7b0e3a4c18"
+down_revision: Union[str, Sequence[str], None] = "8c2e4f61a9d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Стоимость блокировки: STORED-колонка вычисляется для каждой строки,
+    # поэтому ADD COLUMN переписывает всю таблицу tasks под ACCESS
+    # EXCLUSIVE. Чтение и запись tasks ждут до конца переписывания, время
+    # растет с размером таблицы, а на диске нужно место еще на одну копию
+    # таблицы.
+    # Миграцию стоит запускать в окно обслуживания. Колонка вычисляемая,
+    # чтобы поисковый вектор не расходился с title и description без
+    # отдельного триггера.
+    op.add_column(
+        "tasks",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "  # noqa: E501
+                "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",  # noqa: E501
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+
+    # Индекс строится после переписывания, уже без блокировки записи
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_search_vector",
+            "tasks",
+            ["search_vector"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_search_vector",
+            table_name="tasks",
+            postgresql_concurrently=True,
+        )
+
+    op.drop_column("tasks", "search_vector")
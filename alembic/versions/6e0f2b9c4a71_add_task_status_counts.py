@@ -0,0 +1,127 @@
+"""Add task status counts
+
+Revision ID: 6e0f2b9c4a71
+Revises: d93b6a2f0e57
+Create Date: 2026-10-18 17:11:05.902317
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6e0f2b9c4a71"
+down_revision: Union[str, Sequence[str], None] = "d93b6a2f0e57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "task_status_counts",
+        sa.Column("assignee_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("assignee_id", "status"),
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION task_status_counts_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO task_status_counts AS c (assignee_id, status, count)
+                SELECT assignee_id, status, count(*)
+                FROM new_rows
+                WHERE assignee_id IS NOT NULL AND status IS NOT NULL
+                GROUP BY assignee_id, status
+                ORDER BY assignee_id, status
+                ON CONFLICT (assignee_id, status)
+                DO UPDATE SET count = c.count + EXCLUDED.count;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO task_status_counts AS c (assignee_id, status, count)
+                SELECT assignee_id, status, -count(*)
+                FROM old_rows
+                WHERE assignee_id IS NOT NULL AND status IS NOT NULL
+                GROUP BY assignee_id, status
+                ORDER BY assignee_id, status
+                ON CONFLICT (assignee_id, status)
+                DO UPDATE SET count = c.count + EXCLUDED.count;
+            ELSE
+                INSERT INTO task_status_counts AS c (assignee_id, status, count)
+                SELECT assignee_id, status, sum(delta)
+                FROM (
+                    SELECT o.assignee_id, o.status, -1 AS delta
+                    FROM old_rows o JOIN new_rows n ON n.id = o.id
+                    WHERE (o.assignee_id, o.status)
+                        IS DISTINCT FROM (n.assignee_id, n.status)
+                    UNION ALL
+                    SELECT n.assignee_id, n.status, 1 AS delta
+                    FROM old_rows o JOIN new_rows n ON n.id = o.id
+                    WHERE (o.assignee_id, o.status)
+                        IS DISTINCT FROM (n.assignee_id, n.status)
+                ) AS changes
+                WHERE assignee_id IS NOT NULL AND status IS NOT NULL
+                GROUP BY assignee_id, status
+                HAVING sum(delta) <> 0
+                ORDER BY assignee_id, status
+                ON CONFLICT (assignee_id, status)
+                DO UPDATE SET count = c.count + EXCLUDED.count;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """)  # noqa: E501
+    op.execute("""
+        CREATE OR REPLACE FUNCTION task_status_counts_truncate() RETURNS trigger
+        AS $$
+        BEGIN
+            DELETE FROM task_status_counts;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """)  # noqa: E501
+
+    # Запись в tasks блокируется до конца миграции, чтобы между заполнением
+    # счетчиков и включением триггеров не потерялись изменения
+    op.execute("LOCK TABLE tasks IN SHARE MODE")
+    op.execute(
+        "CREATE TRIGGER task_status_counts_insert AFTER INSERT ON tasks "
+        "REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_status_counts_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER task_status_counts_update AFTER UPDATE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_status_counts_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER task_status_counts_delete AFTER DELETE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_status_counts_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER task_status_counts_truncate AFTER TRUNCATE ON tasks "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_status_counts_truncate()"
+    )
+    op.execute(
+        "INSERT INTO task_status_counts (assignee_id, status, count) "
+        "SELECT assignee_id, status, count(*) FROM tasks "
+        "WHERE assignee_id IS NOT NULL AND status IS NOT NULL "
+        "GROUP BY assignee_id, status"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS task_status_counts_truncate ON tasks")
+    op.execute("DROP TRIGGER IF EXISTS task_status_counts_delete ON tasks")
+    op.execute("DROP TRIGGER IF EXISTS task_status_counts_update ON tasks")
+    op.execute("DROP TRIGGER IF EXISTS task_status_counts_insert ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS task_status_counts_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS task_status_counts_apply()")
+    op.drop_table("task_status_counts")
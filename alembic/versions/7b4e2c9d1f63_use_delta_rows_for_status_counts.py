@@ -0,0 +1,106 @@
+"""Use delta rows for status counts
+
+Revision ID: 7b4e2c9d1f63
+Revises: 1d6f8b3e5a27
+Create Date: 2026-10-18 23:12:48.604391
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b4e2c9d1f63"
+down_revision: Union[str, Sequence[str], None] = "1d6f8b3e5a27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# {conflict} - пусто для строк-дельт, ON CONFLICT для прежних счетчиков
+TASK_STATUS_COUNTS_FUNCTION = """
+    CREATE OR REPLACE FUNCTION task_status_counts_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO task_status_counts AS c (assignee_id, status, count)
+            SELECT assignee_id, status, count(*)
+            FROM new_rows
+            WHERE assignee_id IS NOT NULL AND status IS NOT NULL
+            GROUP BY assignee_id, status
+            {conflict};
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO task_status_counts AS c (assignee_id, status, count)
+            SELECT assignee_id, status, -count(*)
+            FROM old_rows
+            WHERE assignee_id IS NOT NULL AND status IS NOT NULL
+            GROUP BY assignee_id, status
+            {conflict};
+        ELSE
+            INSERT INTO task_status_counts AS c (assignee_id, status, count)
+            SELECT assignee_id, status, sum(delta)
+            FROM (
+                SELECT o.assignee_id, o.status, -1 AS delta
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE (o.assignee_id, o.status)
+                    IS DISTINCT FROM (n.assignee_id, n.status)
+                UNION ALL
+                SELECT n.assignee_id, n.status, 1 AS delta
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE (o.assignee_id, o.status)
+                    IS DISTINCT FROM (n.assignee_id, n.status)
+            ) AS changes
+            WHERE assignee_id IS NOT NULL AND status IS NOT NULL
+            GROUP BY assignee_id, status
+            HAVING sum(delta) <> 0
+            {conflict};
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+UPSERT_CONFLICT = """
+            ORDER BY assignee_id, status
+            ON CONFLICT (assignee_id, status)
+            DO UPDATE SET count = c.count + EXCLUDED.count"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint(
+        "task_status_counts_pkey", "task_status_counts", type_="primary"
+    )
+    op.execute(
+        "ALTER TABLE task_status_counts ADD COLUMN id bigserial PRIMARY KEY"
+    )
+    op.create_index(
+        "ix_task_status_counts_assignee_id_status",
+        "task_status_counts",
+        ["assignee_id", "status"],
+        postgresql_include=["count"],
+    )
+    op.execute(TASK_STATUS_COUNTS_FUNCTION.format(conflict=""))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(TASK_STATUS_COUNTS_FUNCTION.format(conflict=UPSERT_CONFLICT))
+    op.execute("""
+        WITH moved AS (
+            DELETE FROM task_status_counts
+            RETURNING assignee_id, status, count
+        )
+        INSERT INTO task_status_counts (assignee_id, status, count)
+        SELECT assignee_id, status, sum(count)
+        FROM moved
+        GROUP BY assignee_id, status
+        """)
+    op.drop_index(
+        "ix_task_status_counts_assignee_id_status",
+        table_name="task_status_counts",
+    )
+    op.drop_column("task_status_counts", "id")
+    op.create_primary_key(
+        "task_status_counts_pkey",
+        "task_status_counts",
+        ["assignee_id", "status"],
+    )
@@ -0,0 +1,54 @@
+"""Add trigram search indexes
+
+Revision ID: 8c2e4f61a9d3
+Revises: 3f9a1c2d7b45
+Create Date: 2026-10-18 11:04:17.902114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c2e4f61a9d3"
+down_revision: Union[str, Sequence[str], None] = "3f9a1c2d7b45"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Индексы обслуживают фильтры ILIKE '%...%' по этим колонкам
+TRIGRAM_INDEXES = (
+    ("ix_tasks_title_trgm", "tasks", "title"),
+    ("ix_users_email_trgm", "users", "email"),
+    ("ix_users_first_name_trgm", "users", "first_name"),
+    ("ix_users_last_name_trgm", "users", "last_name"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        for index_name, table_name, column_name in TRIGRAM_INDEXES:
+            op.create_index(
+                index_name,
+                table_name,
+                [column_name],
+                unique=False,
+                postgresql_using="gin",
+                postgresql_ops={column_name: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for index_name, table_name, _ in reversed(TRIGRAM_INDEXES):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+            )
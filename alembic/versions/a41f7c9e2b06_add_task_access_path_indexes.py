@@ -0,0 +1,63 @@
+"""Add task access path indexes
+
+Revision ID: a41f7c9e2b06
+Revises: 5d7b0e3a4c18
+Create Date: 2026-10-18 13:47:09.310552
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a41f7c9e2b06"
+down_revision: Union[str, Sequence[str], None] = "5d7b0e3a4c18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции, зато
+    # он не блокирует запись в tasks на время построения индекса.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_assignee_id_status_created_at",
+            "tasks",
+            ["assignee_id", "status", "created_at"],
+            unique=False,
+            postgresql_include=[
+                "id",
+                "title",
+                "updated_at",
+                "closed_at",
+                "started_work_at",
+            ],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tasks_open_assignee_id_created_at",
+            "tasks",
+            ["assignee_id", "created_at"],
+            unique=False,
+            postgresql_where=sa.text("status IN ('To Do', 'In Progress')"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_open_assignee_id_created_at",
+            table_name="tasks",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_tasks_assignee_id_status_created_at",
+            table_name="tasks",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,81 @@
+"""Add row versions
+
+Revision ID: b5c3e9d27f14
+Revises: 6e0f2b9c4a71
+Create Date: 2026-10-18 19:24:51.318206
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b5c3e9d27f14"
+down_revision: Union[str, Sequence[str], None] = "6e0f2b9c4a71"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TASK_TIMESTAMPS_FUNCTION = """
+    CREATE OR REPLACE FUNCTION tasks_set_timestamps() RETURNS trigger AS $$
+    BEGIN
+        NEW.updated_at := localtimestamp;
+        {version}
+        IF NEW.status IS DISTINCT FROM OLD.status THEN
+            IF NEW.status IN ('Done', 'Cancelled') THEN
+                NEW.closed_at := localtimestamp;
+            ELSIF NEW.status = 'In Progress' THEN
+                NEW.started_work_at := localtimestamp;
+            END IF;
+        END IF;
+
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Постоянный DEFAULT: Postgres не переписывает таблицу
+    for table in ("tasks", "users"):
+        op.add_column(
+            table,
+            sa.Column(
+                "version",
+                sa.Integer(),
+                server_default=sa.text("1"),
+                nullable=False,
+            ),
+        )
+
+    op.execute(
+        TASK_TIMESTAMPS_FUNCTION.format(
+            version="NEW.version := OLD.version + 1;\n"
+        )
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION users_increment_version()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.version := OLD.version + 1;
+
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """)
+    op.execute(
+        "CREATE TRIGGER users_increment_version BEFORE UPDATE ON users "
+        "FOR EACH ROW EXECUTE FUNCTION users_increment_version()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS users_increment_version ON users")
+    op.execute("DROP FUNCTION IF EXISTS users_increment_version()")
+    op.execute(TASK_TIMESTAMPS_FUNCTION.format(version=""))
+    op.drop_column("users", "version")
+    op.drop_column("tasks", "version")
@@ -0,0 +1,48 @@
+"""Add tasks timestamps trigger
+
+Revision ID: c7e25a8d1f90
+Revises: a41f7c9e2b06
+Create Date: 2026-10-18 15:02:36.771940
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e25a8d1f90"
+down_revision: Union[str, Sequence[str], None] = "a41f7c9e2b06"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tasks_set_timestamps() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := localtimestamp;
+
+            IF NEW.status IS DISTINCT FROM OLD.status THEN
+                IF NEW.status IN ('Done', 'Cancelled') THEN
+                    NEW.closed_at := localtimestamp;
+                ELSIF NEW.status = 'In Progress' THEN
+                    NEW.started_work_at := localtimestamp;
+                END IF;
+            END IF;
+
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """)
+    op.execute(
+        "CREATE TRIGGER tasks_set_timestamps BEFORE UPDATE ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION tasks_set_timestamps()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS tasks_set_timestamps ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS tasks_set_timestamps()")
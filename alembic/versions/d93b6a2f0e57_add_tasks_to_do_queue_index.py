@@ -0,0 +1,42 @@
+"""Add tasks to do queue index
+
+Revision ID: d93b6a2f0e57
+Revises: c7e25a8d1f90
+Create Date: 2026-10-18 16:02:41.518204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d93b6a2f0e57"
+down_revision: Union[str, Sequence[str], None] = "c7e25a8d1f90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_to_do_created_at",
+            "tasks",
+            ["created_at", "id"],
+            unique=False,
+            postgresql_where=sa.text("status = 'To Do'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_to_do_created_at",
+            table_name="tasks",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,145 @@
+"""Add task changes feed
+
+Revision ID: f2a8d4c61b39
+Revises: b5c3e9d27f14
+Create Date: 2026-10-18 21:06:37.514902
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a8d4c61b39"
+down_revision: Union[str, Sequence[str], None] = "b5c3e9d27f14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_XID = "(pg_current_xact_id()::text::bigint)"
+TASK_TIMESTAMPS_FUNCTION = """
+    CREATE OR REPLACE FUNCTION tasks_set_timestamps() RETURNS trigger AS $$
+    BEGIN
+        NEW.updated_at := localtimestamp;
+        NEW.version := OLD.version + 1;
+        {change_xid}
+        IF NEW.status IS DISTINCT FROM OLD.status THEN
+            IF NEW.status IN ('Done', 'Cancelled') THEN
+                NEW.closed_at := localtimestamp;
+            ELSIF NEW.status = 'In Progress' THEN
+                NEW.started_work_at := localtimestamp;
+            END IF;
+        END IF;
+
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Постоянный DEFAULT: Postgres не переписывает таблицу, существующие
+    # задачи попадают в первую выгрузку с since=None
+    op.add_column(
+        "tasks",
+        sa.Column(
+            "change_xid",
+            sa.BigInteger(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    op.alter_column("tasks", "change_xid", server_default=sa.text(CURRENT_XID))
+    op.create_table(
+        "task_tombstones",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("assignee_id", sa.Integer(), nullable=True),
+        sa.Column("reason", sa.String(length=20), nullable=False),
+        sa.Column(
+            "change_xid",
+            sa.BigInteger(),
+            server_default=sa.text(CURRENT_XID),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("localtimestamp"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_task_tombstones_change_xid_id",
+        "task_tombstones",
+        ["change_xid", "id"],
+    )
+    op.execute(
+        TASK_TIMESTAMPS_FUNCTION.format(
+            change_xid=f"NEW.change_xid := {CURRENT_XID};\n"
+        )
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION task_tombstones_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO task_tombstones (task_id, assignee_id, reason)
+                SELECT id, assignee_id, 'deleted'
+                FROM old_rows
+                ORDER BY id;
+            ELSE
+                INSERT INTO task_tombstones (task_id, assignee_id, reason)
+                SELECT o.id, o.assignee_id, 'reassigned'
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE o.assignee_id IS NOT NULL
+                    AND n.assignee_id IS DISTINCT FROM o.assignee_id
+                ORDER BY o.id;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """)  # noqa: E501
+    op.execute(
+        "CREATE TRIGGER task_tombstones_update AFTER UPDATE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_tombstones_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER task_tombstones_delete AFTER DELETE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_tombstones_apply()"
+    )
+
+    # CONCURRENTLY не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_change_xid_id",
+            "tasks",
+            ["change_xid", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_change_xid_id",
+            table_name="tasks",
+            postgresql_concurrently=True,
+        )
+
+    op.execute("DROP TRIGGER IF EXISTS task_tombstones_delete ON tasks")
+    op.execute("DROP TRIGGER IF EXISTS task_tombstones_update ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS task_tombstones_apply()")
+    op.execute(TASK_TIMESTAMPS_FUNCTION.format(change_xid=""))
+    op.drop_index(
+        "ix_task_tombstones_change_xid_id", table_name="task_tombstones"
+    )
+    op.drop_table("task_tombstones")
+    op.drop_column("tasks", "change_xid")
@@ -0,0 +1,55 @@
+import hashlib
+import re
+from typing import Any, List, Optional
+
+# Ответы с ETag браузер хранит, но перед использованием перепроверяет
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+VERSION_ETAG_PATTERN = re.compile(r'"v(\d+)"')
+
+
+def make_etag(*parts: Any) -> str:
+    """Сильный ETag из частей, от которых зависит представление."""
+    raw = "|".join(str(part) for part in parts).encode()
+
+    return f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Совпадает ли ETag с заголовком If-None-Match.
+
+    Сравнение слабое, как требует RFC 9110 для If-None-Match: префикс W/
+    не учитывается.
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    etag = etag.removeprefix("W/")
+
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def version_etag(version: int) -> str:
+    """ETag записи по ее версии (колонка version)."""
+    return f'"v{version}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[List[int]]:
+    """Версии записи, допустимые по заголовку If-Match.
+
+    None - без условия (заголовка нет или "*"). Слабые и чужие ETag не
+    совпадают ни с одной версией: для If-Match сравнение сильное.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+
+    return [
+        int(match.group(1))
+        for candidate in if_match.split(",")
+        if (match := VERSION_ETAG_PATTERN.fullmatch(candidate.strip()))
+    ]
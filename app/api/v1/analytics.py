@@ -1,14 +1,43 @@
+import csv
+import io
 import logging
+from datetime import date
 from http import HTTPStatus
+from typing import AsyncIterator, Dict, List, Optional
 
-from fastapi import APIRouter
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    Response,
+    StreamingResponse,
+)
 
-from app.services.analytics import analytics_service
+from app.api.conditional import etag_matches
+from app.db.models import User, UserRoles
+from app.schemes.analytics import (
+    DeliveryForecast,
+    DeliveryForecastFilter,
+    FlowMetricsFilter,
+    ResponseFlowMetrics,
+    StatusDistributionFilter,
+    StatusDistributionRow,
+)
+from app.security.auth import auth_service
+from app.services.analytics import STATUS_COLUMNS, analytics_service
+from app.services.static_assets import get_asset
 
 analytics_router = APIRouter()
 logger = logging.getLogger(__name__)
 ANALYTICS_TAG = "Аналитика"
+JSON_MEDIA_TYPE = "application/json"
+CSV_MEDIA_TYPE = "text/csv"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+DISTRIBUTION_COLUMNS = ["assignee_id", "full_name", *STATUS_COLUMNS.values()]
+# Сколько строк CSV отправлять одним куском
+CSV_CHUNK_ROWS = 500
+# Имя статического файла содержит версию, содержимое по URL не меняется
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 
 @analytics_router.get(
@@ -26,3 +55,300 @@ async def get_visualization():
         )
 
     return HTMLResponse(content=visualization_html)
+
+
+@analytics_router.get(
+    "/assets/{name}",
+    status_code=HTTPStatus.OK,
+    response_class=FileResponse,
+    responses={
+        HTTPStatus.NOT_MODIFIED: {"description": "Файл не изменился."},
+        HTTPStatus.NOT_FOUND: {"description": "Файл не найден."},
+    },
+    tags=[ANALYTICS_TAG],
+)
+def get_static_asset(name: str, request: Request):
+    # Обычная функция: чтение файла выполняется в пуле потоков FastAPI
+    asset = get_asset(
+        name, gzipped=_accepts_gzip(request.headers.get("accept-encoding"))
+    )
+
+    if asset is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail="Файл не найден."
+        )
+
+    headers = {
+        "ETag": asset.etag,
+        "Cache-Control": ASSET_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    if asset.gzipped:
+        headers["Content-Encoding"] = "gzip"
+
+    return FileResponse(
+        asset.path,
+        media_type="text/javascript; charset=utf-8",
+        headers=headers,
+    )
+
+
+def _get_distribution_filter(
+    assignee_id: Optional[List[int]] = Query(None),
+    created_from: Optional[date] = Query(None),
+    created_to: Optional[date] = Query(None),
+) -> StatusDistributionFilter:
+    # Не Depends() на модели: список assignee_id в зависимости-классе
+    # FastAPI ожидает в теле запроса
+    return StatusDistributionFilter(
+        assignee_id=assignee_id,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
+
+@analytics_router.get(
+    "/status-distribution",
+    status_code=HTTPStatus.OK,
+    response_model=List[StatusDistributionRow],
+    responses={
+        HTTPStatus.OK: {
+            "content": {CSV_MEDIA_TYPE: {}, ARROW_MEDIA_TYPE: {}},
+            "description": (
+                "Количество задач исполнителей по статусам в формате из "
+                "заголовка Accept: JSON, CSV или Arrow IPC stream."
+            ),
+        },
+        HTTPStatus.NOT_ACCEPTABLE: {
+            "description": "Запрошенный формат не поддерживается."
+        },
+    },
+    tags=[ANALYTICS_TAG],
+)
+async def get_status_distribution(
+    request: Request,
+    limit: int = Query(1000, gt=0, le=10000),
+    after_id: Optional[int] = Query(
+        None,
+        description=(
+            "Id последнего исполнителя предыдущей страницы. Страница "
+            "полная, если в ней limit строк."
+        ),
+    ),
+    filter: StatusDistributionFilter = Depends(_get_distribution_filter),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    await auth_service.check_required_role(current_user, [UserRoles.ADMIN])
+
+    media_type = _negotiate(request.headers.get("accept"))
+
+    if media_type is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_ACCEPTABLE,
+            detail=(
+                "Поддерживаются форматы "
+                f"{JSON_MEDIA_TYPE}, {CSV_MEDIA_TYPE} и {ARROW_MEDIA_TYPE}."
+            ),
+        )
+
+    rows = analytics_service.iter_status_distribution(filter, limit, after_id)
+
+    if media_type == CSV_MEDIA_TYPE:
+        return StreamingResponse(
+            _write_csv(rows), media_type=f"{CSV_MEDIA_TYPE}; charset=utf-8"
+        )
+
+    if media_type == ARROW_MEDIA_TYPE:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_ACCEPTABLE,
+                detail="Формат Arrow недоступен: не установлен pyarrow.",
+            )
+
+        return Response(
+            _write_arrow([row async for row in rows]),
+            media_type=ARROW_MEDIA_TYPE,
+        )
+
+    return [row async for row in rows]
+
+
+def _get_flow_metrics_filter(
+    assignee_id: Optional[List[int]] = Query(None),
+    closed_from: Optional[date] = Query(None),
+    closed_to: Optional[date] = Query(None),
+) -> FlowMetricsFilter:
+    return FlowMetricsFilter(
+        assignee_id=assignee_id,
+        closed_from=closed_from,
+        closed_to=closed_to,
+    )
+
+
+@analytics_router.get(
+    "/flow-metrics",
+    status_code=HTTPStatus.OK,
+    response_model=ResponseFlowMetrics,
+    tags=[ANALYTICS_TAG],
+)
+async def get_flow_metrics(
+    limit: int = Query(100, gt=0, le=1000),
+    after_id: Optional[int] = Query(
+        None,
+        description=(
+            "Id последнего исполнителя предыдущей страницы users. Страница "
+            "полная, если в ней limit исполнителей."
+        ),
+    ),
+    filter: FlowMetricsFilter = Depends(_get_flow_metrics_filter),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    await auth_service.check_required_role(current_user, [UserRoles.ADMIN])
+
+    try:
+        return await analytics_service.get_flow_metrics(
+            filter, limit, after_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+
+def _get_forecast_filter(
+    assignee_id: Optional[int] = Query(None),
+    remaining: Optional[int] = Query(None, ge=0, le=1000000),
+    history_from: Optional[date] = Query(None),
+    history_to: Optional[date] = Query(None),
+) -> DeliveryForecastFilter:
+    return DeliveryForecastFilter(
+        assignee_id=assignee_id,
+        remaining=remaining,
+        history_from=history_from,
+        history_to=history_to,
+    )
+
+
+@analytics_router.get(
+    "/forecast",
+    status_code=HTTPStatus.OK,
+    response_model=DeliveryForecast,
+    tags=[ANALYTICS_TAG],
+)
+async def get_delivery_forecast(
+    filter: DeliveryForecastFilter = Depends(_get_forecast_filter),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    await auth_service.check_required_role(current_user, [UserRoles.ADMIN])
+
+    try:
+        forecast = await analytics_service.get_delivery_forecast(filter)
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+    if forecast is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail="За период истории нет выполненных задач.",
+        )
+
+    return forecast
+
+
+def _negotiate(accept: Optional[str]) -> Optional[str]:
+    """Выбирает формат ответа по заголовку Accept с учетом q."""
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    candidates = []
+
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = (item.strip() for item in part.split(";"))
+        quality = 1.0
+
+        for param in params:
+            name, _, value = param.partition("=")
+
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if quality > 0:
+            candidates.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+
+        if media_type == "text/*":
+            return CSV_MEDIA_TYPE
+
+        if media_type in (JSON_MEDIA_TYPE, CSV_MEDIA_TYPE, ARROW_MEDIA_TYPE):
+            return media_type
+
+    return None
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Принимает ли клиент gzip по заголовку Accept-Encoding с учетом q."""
+    qualities = {}
+
+    for part in (accept_encoding or "").split(","):
+        coding, *params = (item.strip() for item in part.split(";"))
+        quality = 1.0
+
+        for param in params:
+            name, _, value = param.partition("=")
+
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        qualities[coding.lower()] = quality
+
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+async def _write_csv(rows: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=DISTRIBUTION_COLUMNS)
+    writer.writeheader()
+    count = 0
+
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+
+        if count % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def _write_arrow(rows: List[Dict]) -> bytes:
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [
+            ("assignee_id", pa.int64()),
+            ("full_name", pa.string()),
+            *((column, pa.int64()) for column in STATUS_COLUMNS.values()),
+        ]
+    )
+    table = pa.Table.from_pylist(rows, schema=schema)
+    sink = io.BytesIO()
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue()
@@ -37,7 +37,7 @@ async def register_user(input: CreateUser):
 async def login_for_access_token(input: LoginData):
     user = await user_service.get_user_by_email(input.email)
 
-    if not user or not auth_service.verify_password(
+    if not user or not await auth_service.verify_password_async(
         input.password, user.password
     ):
         raise HTTPException(
@@ -1,17 +1,47 @@
+import json
 import logging
 from http import HTTPStatus
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 
+from app.api.conditional import (
+    REVALIDATE_CACHE_CONTROL,
+    etag_matches,
+    make_etag,
+    parse_if_match,
+    version_etag,
+)
 from app.db.models import User, UserRoles
-from app.schemes.task import CreateTask, ResponseTask, TaskFilter, UpdateTask
+from app.schemes.task import (
+    BulkUpdateTasks,
+    CreateTask,
+    ResponseBulkTasks,
+    ResponseBulkUpdateTasks,
+    ResponseTask,
+    ResponseTaskChanges,
+    ResponseTaskWithAssignee,
+    TaskFilter,
+    UpdateTask,
+)
 from app.security.auth import auth_service
-from app.services.task import task_service
+from app.services.loading import LoadingProfile
+from app.services.pagination import encode_cursor, make_cursor
+from app.services.task import SEARCH_RANK_SORT, task_service
 
 task_router = APIRouter()
 logger = logging.getLogger(__name__)
 TASKS_TAG = "Задачи"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 
 @task_router.post(
@@ -36,20 +66,213 @@ async def create_task(
     return status
 
 
+@task_router.post(
+    "/bulk",
+    status_code=HTTPStatus.OK,
+    response_model=ResponseBulkTasks,
+    tags=[TASKS_TAG],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": CreateTask.model_json_schema(),
+                    }
+                },
+                NDJSON_MEDIA_TYPE: {"schema": CreateTask.model_json_schema()},
+            },
+        }
+    },
+)
+async def create_tasks_bulk(
+    request: Request,
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    await auth_service.check_required_role(
+        current_user, [UserRoles.ADMIN, UserRoles.USER]
+    )
+
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith(NDJSON_MEDIA_TYPE):
+        items = _read_ndjson(request)
+    else:
+        try:
+            raw_tasks = await request.json()
+        except ValueError:
+            raw_tasks = None
+
+        if not isinstance(raw_tasks, list):
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail="Ожидается JSON-массив задач или NDJSON.",
+            )
+
+        items = _iterate(raw_tasks)
+
+    results = await task_service.create_tasks_bulk(current_user, items)
+    created = sum(1 for result in results if result.id is not None)
+
+    return ResponseBulkTasks(
+        created=created, failed=len(results) - created, items=results
+    )
+
+
+async def _iterate(raw_tasks: list):
+    for index, raw_task in enumerate(raw_tasks):
+        yield index, raw_task
+
+
+async def _read_ndjson(request: Request):
+    """Разбирает NDJSON по мере чтения тела, пустые строки пропускает."""
+    index = 0
+    buffer = b""
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            if line.strip():
+                yield index, _parse_line(line)
+                index += 1
+
+    if buffer.strip():
+        yield index, _parse_line(buffer)
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return ValueError("Строка не является корректным JSON.")
+
+
+@task_router.patch(
+    "/bulk",
+    status_code=HTTPStatus.OK,
+    response_model=ResponseBulkUpdateTasks,
+    tags=[TASKS_TAG],
+)
+async def update_tasks_bulk(
+    input: BulkUpdateTasks,
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    await auth_service.check_required_role(
+        current_user, [UserRoles.ADMIN, UserRoles.USER]
+    )
+
+    try:
+        return await task_service.update_tasks_bulk(current_user, input)
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+
+@task_router.post(
+    "/claim",
+    status_code=HTTPStatus.OK,
+    response_model=List[ResponseTask],
+    tags=[TASKS_TAG],
+)
+async def claim_tasks(
+    limit: int = Query(1, gt=0, lt=101),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    await auth_service.check_required_role(
+        current_user, [UserRoles.ADMIN, UserRoles.USER]
+    )
+
+    return await task_service.claim_tasks(current_user, limit)
+
+
+@task_router.get(
+    "/search",
+    status_code=HTTPStatus.OK,
+    response_model=List[ResponseTask],
+    tags=[TASKS_TAG],
+)
+async def search_tasks(
+    response: Response,
+    q: str = Query(
+        min_length=1,
+        max_length=255,
+        description="Поисковый запрос по названию и описанию задачи",
+    ),
+    limit: int = Query(25, gt=0, lt=101),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы из X-Next-Cursor"
+    ),
+    filter: TaskFilter = Depends(),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    await auth_service.check_required_role(
+        current_user, [UserRoles.ADMIN, UserRoles.USER]
+    )
+
+    try:
+        rows = await task_service.search_tasks(
+            q, limit, filter, current_user, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+    if len(rows) == limit:
+        last_task, last_rank = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = make_cursor(
+            SEARCH_RANK_SORT, False, last_rank, last_task.id
+        )
+
+    return [task for task, _ in rows]
+
+
+@task_router.get(
+    "/changes",
+    status_code=HTTPStatus.OK,
+    response_model=ResponseTaskChanges,
+    tags=[TASKS_TAG],
+)
+async def get_task_changes(
+    since: Optional[str] = Query(
+        None,
+        description=(
+            "next_cursor из предыдущего ответа. Без него отдаются все "
+            "задачи."
+        ),
+    ),
+    limit: int = Query(100, gt=0, le=1000),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    await auth_service.check_required_role(
+        current_user, [UserRoles.ADMIN, UserRoles.USER]
+    )
+
+    try:
+        return await task_service.get_changes(current_user, since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+
 @task_router.get(
     "/{id}",
     status_code=HTTPStatus.OK,
-    response_model=ResponseTask,
+    response_model=ResponseTaskWithAssignee,
     tags=[TASKS_TAG],
 )
 async def get_task(
-    id: int, current_user: User = Depends(auth_service.get_current_user)
+    id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(auth_service.get_current_user),
 ):
     await auth_service.check_required_role(
         current_user, [UserRoles.ADMIN, UserRoles.USER]
     )
 
-    task = await task_service.get_task(current_user, id)
+    task = await task_service.get_task(
+        current_user, id, profile=LoadingProfile.TASK_WITH_ASSIGNEE
+    )
 
     if task is None:
         raise HTTPException(
@@ -57,6 +280,14 @@ async def get_task(
             detail=f"Задача c {id=} не найдена.",
         )
 
+    etag = version_etag(task.version)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+
     return task
 
 
@@ -82,11 +313,24 @@ async def delete_task(
     "/{id}",
     status_code=HTTPStatus.OK,
     response_model=ResponseTask,
+    responses={
+        HTTPStatus.PRECONDITION_FAILED: {
+            "description": "Задача изменилась после получения ETag."
+        },
+    },
     tags=[TASKS_TAG],
 )
 async def update_task(
     id: int,
     input: UpdateTask,
+    response: Response,
+    if_match: Optional[str] = Header(
+        None,
+        description=(
+            "ETag задачи из GET /tasks/{id}. Если задача с тех пор "
+            "изменилась, ответ 412."
+        ),
+    ),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     await auth_service.check_required_role(
@@ -94,13 +338,18 @@ async def update_task(
     )
 
     try:
-        status = await task_service.update_task(
-            id, current_user, **input.model_dump()
+        task = await task_service.update_task(
+            id,
+            current_user,
+            expected_versions=parse_if_match(if_match),
+            **input.model_dump(),
         )
     except ValueError as e:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e))
 
-    return status
+    response.headers["ETag"] = version_etag(task.version)
+
+    return task
 
 
 @task_router.get(
@@ -110,10 +359,19 @@ async def update_task(
     tags=[TASKS_TAG],
 )
 async def get_tasks(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(25, gt=0, lt=101),
     sort_by: str = Query("id"),
     ascending: bool = Query(True),
+    cursor: Optional[str] = Query(
+        None,
+        description=(
+            "Курсор следующей страницы из заголовка X-Next-Cursor. "
+            "Несовместим с skip."
+        ),
+    ),
     filter: TaskFilter = Depends(),
     current_user: User = Depends(auth_service.get_current_user),
 ):
@@ -121,9 +379,54 @@ async def get_tasks(
         current_user, [UserRoles.ADMIN, UserRoles.USER]
     )
 
+    if cursor is not None and skip:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Параметры cursor и skip нельзя использовать вместе.",
+        )
+
+    # Параметры проверяются до ETag, иначе на некорректный запрос с
+    # совпавшим If-None-Match ушел бы 304 вместо 400
     try:
-        return await task_service.get_tasks(
-            skip, limit, sort_by, ascending, filter, current_user
+        task_service.get_page_position(sort_by, ascending, cursor)
+    except (AttributeError, ValueError) as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+    # Сводка читается до списка: если между запросами задачи изменятся,
+    # ETag окажется старее данных и следующий запрос получит их заново
+    state = await task_service.get_tasks_state(filter, current_user)
+    etag = make_etag("tasks", current_user.id, request.url.query, *state)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+
+    try:
+        tasks = await task_service.get_tasks(
+            skip,
+            limit,
+            sort_by,
+            ascending,
+            filter,
+            current_user,
+            profile=LoadingProfile.PUBLIC,
+            cursor=cursor,
         )
-    except AttributeError as e:
+    except (AttributeError, ValueError) as e:
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+    if len(tasks) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            tasks[-1], sort_by, ascending
+        )
+
+    return tasks
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL},
+    )
@@ -1,12 +1,27 @@
 import logging
 from http import HTTPStatus
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+)
 
+from app.api.conditional import parse_if_match, version_etag
 from app.db.models import User, UserRoles
-from app.schemes.user import CreateUser, ResponseUser, UpdateUser, UserFilter
+from app.schemes.user import (
+    CreateUser,
+    ResponseUser,
+    ResponseUserWithOpenTasks,
+    UpdateUser,
+    UserFilter,
+)
 from app.security.auth import auth_service
+from app.services.loading import LoadingProfile
 from app.services.user import user_service
 
 user_router = APIRouter()
@@ -53,15 +68,19 @@ async def create_user(
 @user_router.get(
     "/{id}",
     status_code=HTTPStatus.OK,
-    response_model=ResponseUser,
+    response_model=ResponseUserWithOpenTasks,
     tags=[USERS_TAG],
 )
 async def get_user(
-    id: int, current_user: User = Depends(auth_service.get_current_user)
+    id: int,
+    response: Response,
+    current_user: User = Depends(auth_service.get_current_user),
 ):
     await auth_service.check_required_role(current_user, [UserRoles.ADMIN])
 
-    task = await user_service.get_user_by_id(id)
+    task = await user_service.get_user_by_id(
+        id, profile=LoadingProfile.USER_WITH_OPEN_TASKS_COUNT
+    )
 
     if task is None:
         raise HTTPException(
@@ -69,6 +88,8 @@ async def get_user(
             detail=f"Пользователь c {id=} не найден.",
         )
 
+    response.headers["ETag"] = version_etag(task.version)
+
     return task
 
 
@@ -94,11 +115,24 @@ async def delete_user(
     "/{id}",
     status_code=HTTPStatus.OK,
     response_model=ResponseUser,
+    responses={
+        HTTPStatus.PRECONDITION_FAILED: {
+            "description": "Пользователь изменился после получения ETag."
+        },
+    },
     tags=[USERS_TAG],
 )
 async def update_user(
     id: int,
     input: UpdateUser,
+    response: Response,
+    if_match: Optional[str] = Header(
+        None,
+        description=(
+            "ETag пользователя из GET /users/{id} или прошлого PATCH. Если "
+            "запись с тех пор изменилась, ответ 412."
+        ),
+    ),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     await auth_service.check_required_role(
@@ -106,13 +140,18 @@ async def update_user(
     )
 
     try:
-        status = await user_service.update_user(
-            id, current_user, **input.model_dump()
+        user = await user_service.update_user(
+            id,
+            current_user,
+            expected_versions=parse_if_match(if_match),
+            **input.model_dump(),
         )
     except ValueError as e:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e))
 
-    return status
+    response.headers["ETag"] = version_etag(user.version)
+
+    return user
 
 
 @user_router.get(
@@ -133,7 +172,7 @@ async def get_users(
 
     try:
         return await user_service.get_users(
-            skip, limit, sort_by, ascending, filter
+            skip, limit, sort_by, ascending, filter, LoadingProfile.PUBLIC
         )
     except AttributeError as e:
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
@@ -0,0 +1,33 @@
+"""Сборка статических файлов для отчетов.
+
+Запуск: python -m app.commands.build_static [--directory DIR]
+
+Копирует бандл Plotly из установленного пакета plotly и сжимает его
+gzip. По умолчанию пишет в settings.analytics_assets_dir.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from app.services.static_assets import build_plotly_bundle
+
+
+def main(directory: Path = None) -> int:
+    path = build_plotly_bundle(directory)
+    print(f"Записан {path} ({path.stat().st_size // 1024} КБ).")
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        default=None,
+        help="Каталог для файлов, по умолчанию ANALYTICS_ASSETS_DIR.",
+    )
+    args = parser.parse_args()
+
+    sys.exit(main(args.directory))
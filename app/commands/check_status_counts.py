@@ -0,0 +1,73 @@
+"""Сверка и пересборка счетчиков task_status_counts.
+
+Запуск: python -m app.commands.check_status_counts [--dry-run | --compact]
+
+Выводит расхождения между счетчиками и таблицей tasks и пересобирает
+счетчики. С --dry-run только выводит расхождения. Код возврата 1, если
+расхождения найдены. С --compact только сворачивает строки-дельты
+счетчиков, без сверки и без блокировки tasks; запускается по расписанию.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.db.session import db_registry
+from app.services.analytics import analytics_service
+
+
+async def compact() -> int:
+    try:
+        removed = await analytics_service.compact_status_counts()
+    finally:
+        await db_registry.dispose()
+
+    print(f"Счетчики свернуты, удалено строк: {removed}.")
+
+    return 0
+
+
+async def main(rebuild: bool) -> int:
+    try:
+        drift = await analytics_service.check_status_counts(rebuild=rebuild)
+    finally:
+        await db_registry.dispose()
+
+    if not drift:
+        print("Расхождений нет.")
+
+        return 0
+
+    print(f"{'Исполнитель':>12} {'Статус':<12}{'Счетчик':>10}{'Факт':>10}")
+
+    for row in drift:
+        print(
+            f"{row['assignee_id']:>12} {row['status']:<12}"
+            f"{row['stored']:>10}{row['actual']:>10}"
+        )
+
+    if rebuild:
+        print("Счетчики пересобраны.")
+
+    return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Только вывести расхождения, не пересобирая счетчики.",
+    )
+    mode.add_argument(
+        "--compact",
+        action="store_true",
+        help="Только свернуть строки-дельты счетчиков.",
+    )
+    args = parser.parse_args()
+
+    if args.compact:
+        sys.exit(asyncio.run(compact()))
+
+    sys.exit(asyncio.run(main(rebuild=not args.dry_run)))
@@ -24,6 +24,40 @@ class ApiConfig(BaseSettings):
 
     pg_auth: Union[str, URL] = ""
 
+    pg_pool_size: int = 10
+    pg_max_overflow: int = 10
+    pg_pool_timeout: float = 30
+    pg_pool_recycle: int = 1800
+    pg_pool_pre_ping: bool = True
+
+    principal_cache_size: int = 10000
+    principal_cache_ttl: float = 30
+
+    password_hash_executor: str = "thread"
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 64
+
+    task_bulk_batch_size: int = 1000
+    task_bulk_copy_threshold: int = 200
+    task_bulk_update_max_items: int = 10000
+    # Отставание горизонта ленты изменений (в транзакциях), после которого
+    # пишется предупреждение
+    task_changes_horizon_lag_warning: int = 100000
+
+    analytics_render_executor: str = "process"
+    analytics_render_workers: int = 2
+    analytics_report_ttl: float = 30
+    analytics_report_stale_ttl: float = 300
+    analytics_flow_chunk_size: int = 50000
+    analytics_flow_max_weeks: int = 104
+    analytics_forecast_trials: int = 100000
+    analytics_forecast_max_days: int = 730
+    analytics_forecast_history_days: int = 90
+    analytics_forecast_ttl: float = 300
+    analytics_forecast_cache_size: int = 256
+    analytics_assets_dir: Path = Path(__file__).parent.parent / "static"
+    analytics_assets_url: str = "/api/v1/analytics/assets"
+
     logger_level: str = "INFO"
 
 
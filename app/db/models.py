@@ -1,17 +1,28 @@
-from datetime import datetime as dt
 from enum import StrEnum
 
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Boolean,
     Column,
+    Computed,
     DateTime,
+    FetchedValue,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    deferred,
+    query_expression,
+    relationship,
 )
-from sqlalchemy.orm import DeclarativeBase, relationship
 
 
 class UserRoles(StrEnum):
@@ -26,12 +37,60 @@ class TaskStatuses(StrEnum):
     CANCELLED = "Cancelled"  # Задача отменена
 
 
+class TombstoneReasons(StrEnum):
+    DELETED = "deleted"  # Задача удалена
+    REASSIGNED = "reassigned"  # Задача передана другому исполнителю
+
+
 class Base(DeclarativeBase):
     pass
 
 
+def _trigram_available(ddl, target, bind, **kw) -> bool:
+    """Есть ли pg_trgm на сервере.
+
+    Без расширения create_all пропускает триграммные индексы, в миграциях
+    они создаются всегда.
+    """
+    if bind is None:
+        return True
+
+    return bool(
+        bind.scalar(
+            text(
+                "SELECT count(*) FROM pg_available_extensions "
+                "WHERE name = 'pg_trgm'"
+            )
+        )
+    )
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """GIN-индекс pg_trgm для фильтров ILIKE '%...%' по колонке."""
+    return Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    ).ddl_if(callable_=_trigram_available)
+
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        callable_=_trigram_available
+    ),
+)
+
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        trigram_index("ix_users_email_trgm", "email"),
+        trigram_index("ix_users_first_name_trgm", "first_name"),
+        trigram_index("ix_users_last_name_trgm", "last_name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True)
@@ -39,16 +98,31 @@ class User(Base):
     first_name = Column(String(255))
     last_name = Column(String(255))
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(), default=dt.now())
+    created_at = Column(
+        DateTime(), server_default=text("localtimestamp"), index=True
+    )
     role = Column(String(60), default=UserRoles.USER.value)
+    # Версия строки для If-Match, при UPDATE увеличивается триггером
+    version = Column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default=text("1"),
+        server_onupdate=FetchedValue(),
+    )
+
+    # Заполняется только профилем загрузки USER_WITH_OPEN_TASKS_COUNT
+    open_tasks_count = query_expression()
 
     tasks = relationship(
         "Task",
         back_populates="assignee",
-        lazy="subquery",
+        lazy="raise_on_sql",
         cascade="all, delete-orphan",
     )
 
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self):
         return (
             f"{self.id} - {self.email} - "
@@ -57,8 +131,58 @@ class User(Base):
         )
 
 
+# Конфигурация полнотекстового поиска по задачам
+TASK_SEARCH_CONFIG = "russian"
+# Id текущей транзакции (xid8) как bigint, см. TaskTombstone
+CURRENT_XID = "pg_current_xact_id()::text::bigint"
+
+
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        trigram_index("ix_tasks_title_trgm", "title"),
+        Index(
+            "ix_tasks_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        # Списки задач пользователя: фильтр по статусу и сортировка по дате.
+        # INCLUDE позволяет отвечать index-only scan'ом на запросы без
+        # описания задачи и на сводку для ETag списка.
+        Index(
+            "ix_tasks_assignee_id_status_created_at",
+            "assignee_id",
+            "status",
+            "created_at",
+            postgresql_include=[
+                "id",
+                "title",
+                "updated_at",
+                "closed_at",
+                "started_work_at",
+                "version",
+            ],
+        ),
+        # "Мои открытые задачи" по дате создания
+        Index(
+            "ix_tasks_open_assignee_id_created_at",
+            "assignee_id",
+            "created_at",
+            postgresql_where=text(
+                f"status IN ('{TaskStatuses.TO_DO.value}', "
+                f"'{TaskStatuses.IN_PROGRESS.value}')"
+            ),
+        ),
+        # Лента изменений GET /tasks/changes
+        Index("ix_tasks_change_xid_id", "change_xid", "id"),
+        # Очередь задач для POST /tasks/claim: самые старые задачи "To Do"
+        Index(
+            "ix_tasks_to_do_created_at",
+            "created_at",
+            "id",
+            postgresql_where=text(f"status = '{TaskStatuses.TO_DO.value}'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), index=True)
@@ -68,12 +192,67 @@ class Task(Base):
         ForeignKey("users.id", ondelete="SET NULL"),
     )
     status = Column(String(20), default=TaskStatuses.TO_DO.value, index=True)
-    created_at = Column(DateTime, default=dt.now(), index=True)
-    updated_at = Column(DateTime, nullable=True, default=dt.now())
-    closed_at = Column(DateTime, nullable=True, default=None, index=True)
-    started_work_at = Column(DateTime, nullable=True, default=None, index=True)
+    # Отметки времени ставит БД, чтобы lead time и cycle time считались
+    # по одним часам. При UPDATE значения выставляет триггер
+    # tasks_set_timestamps, ORM забирает их через RETURNING
+    created_at = Column(
+        DateTime, server_default=text("localtimestamp"), index=True
+    )
+    updated_at = Column(
+        DateTime,
+        nullable=True,
+        server_default=text("localtimestamp"),
+        server_onupdate=FetchedValue(),
+    )
+    closed_at = Column(
+        DateTime,
+        nullable=True,
+        default=None,
+        index=True,
+        server_onupdate=FetchedValue(),
+    )
+    started_work_at = Column(
+        DateTime,
+        nullable=True,
+        default=None,
+        index=True,
+        server_onupdate=FetchedValue(),
+    )
+    # Версия строки для If-Match, при UPDATE увеличивается триггером
+    version = Column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default=text("1"),
+        server_onupdate=FetchedValue(),
+    )
+    # Транзакция последнего изменения, курсор GET /tasks/changes. При UPDATE
+    # выставляет триггер tasks_set_timestamps
+    change_xid = Column(
+        BigInteger,
+        nullable=False,
+        server_default=text(f"({CURRENT_XID})"),
+        server_onupdate=FetchedValue(),
+    )
+    # Не загружается по умолчанию, используется только в условиях поиска
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', "
+                "coalesce(title, '')), 'A') || "
+                f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', "
+                "coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+        )
+    )
+
+    assignee = relationship(
+        "User", back_populates="tasks", lazy="raise_on_sql"
+    )
 
-    assignee = relationship("User", back_populates="tasks", lazy="subquery")
+    __mapper_args__ = {"eager_defaults": True}
 
     def __repr__(self):
         return (
@@ -82,17 +261,233 @@ class Task(Base):
         )
 
 
-# Обработчик события для обновления поля updated_at
-@event.listens_for(Task, "before_update")
-def receive_before_update(mapper, connection, target):
-    now = dt.now()
+class TaskStatusCount(Base):
+    """Изменения количества задач исполнителя по статусам.
+
+    Строки-дельты добавляют триггеры на tasks, количество - сумма count по
+    (assignee_id, status). Общая строка счетчика не обновляется, поэтому
+    параллельные записи в tasks не ждут друг друга. Дельты сворачивает
+    AnalyticsService.compact_status_counts.
+    """
+
+    __tablename__ = "task_status_counts"
+    __table_args__ = (
+        Index(
+            "ix_task_status_counts_assignee_id_status",
+            "assignee_id",
+            "status",
+            postgresql_include=["count"],
+        ),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    assignee_id = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"{self.assignee_id} - {self.status} - {self.count}"
+
+
+class TaskTombstone(Base):
+    """Задачи, пропавшие из выдачи исполнителя, для GET /tasks/changes.
+
+    Строки пишут триггеры на tasks, причина - TombstoneReasons, при
+    передаче задачи assignee_id - прежний исполнитель. change_xid -
+    транзакция изменения: все транзакции младше pg_snapshot_xmin текущего
+    снимка уже завершены, поэтому курсор по change_xid не пропускает
+    изменения, закоммиченные не по порядку.
+    """
+
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        Index("ix_task_tombstones_change_xid_id", "change_xid", "id"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    assignee_id = Column(Integer, nullable=True)
+    reason = Column(String(20), nullable=False)
+    change_xid = Column(
+        BigInteger, nullable=False, server_default=text(f"({CURRENT_XID})")
+    )
+    created_at = Column(
+        DateTime, nullable=False, server_default=text("localtimestamp")
+    )
+
+    def __repr__(self):
+        return f"{self.task_id} - {self.reason} - {self.change_xid}"
+
+
+# Отметки времени и версию задачи ведет БД, чтобы их получали и ORM, и
+# массовые UPDATE через Core. Время берется на начало транзакции, поэтому
+# все строки одного UPDATE получают одинаковые значения.
+TASK_TIMESTAMPS_FUNCTION = DDL("""
+    CREATE OR REPLACE FUNCTION tasks_set_timestamps() RETURNS trigger AS $$
+    BEGIN
+        NEW.updated_at := localtimestamp;
+        NEW.version := OLD.version + 1;
+        NEW.change_xid := pg_current_xact_id()::text::bigint;
+
+        IF NEW.status IS DISTINCT FROM OLD.status THEN
+            IF NEW.status IN ('Done', 'Cancelled') THEN
+                NEW.closed_at := localtimestamp;
+            ELSIF NEW.status = 'In Progress' THEN
+                NEW.started_work_at := localtimestamp;
+            END IF;
+        END IF;
+
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+TASK_TIMESTAMPS_TRIGGER = DDL(
+    "CREATE TRIGGER tasks_set_timestamps BEFORE UPDATE ON tasks "
+    "FOR EACH ROW EXECUTE FUNCTION tasks_set_timestamps()"
+)
+
+event.listen(Task.__table__, "after_create", TASK_TIMESTAMPS_FUNCTION)
+event.listen(Task.__table__, "after_create", TASK_TIMESTAMPS_TRIGGER)
+
+USER_VERSION_FUNCTION = DDL("""
+    CREATE OR REPLACE FUNCTION users_increment_version() RETURNS trigger AS $$
+    BEGIN
+        NEW.version := OLD.version + 1;
+
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+USER_VERSION_TRIGGER = DDL(
+    "CREATE TRIGGER users_increment_version BEFORE UPDATE ON users "
+    "FOR EACH ROW EXECUTE FUNCTION users_increment_version()"
+)
+
+event.listen(User.__table__, "after_create", USER_VERSION_FUNCTION)
+event.listen(User.__table__, "after_create", USER_VERSION_TRIGGER)
+
+
+# Счетчики task_status_counts ведут триггеры уровня оператора: изменения
+# одного INSERT/UPDATE/DELETE (в том числе COPY и массовых UPDATE)
+# сворачиваются в строки-дельты по затронутым парам (исполнитель, статус).
+# Дельты только добавляются, блокировок на строках счетчиков нет.
+TASK_STATUS_COUNTS_FUNCTION = DDL("""
+    CREATE OR REPLACE FUNCTION task_status_counts_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO task_status_counts (assignee_id, status, count)
+            SELECT assignee_id, status, count(*)
+            FROM new_rows
+            WHERE assignee_id IS NOT NULL AND status IS NOT NULL
+            GROUP BY assignee_id, status;
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO task_status_counts (assignee_id, status, count)
+            SELECT assignee_id, status, -count(*)
+            FROM old_rows
+            WHERE assignee_id IS NOT NULL AND status IS NOT NULL
+            GROUP BY assignee_id, status;
+        ELSE
+            INSERT INTO task_status_counts (assignee_id, status, count)
+            SELECT assignee_id, status, sum(delta)
+            FROM (
+                SELECT o.assignee_id, o.status, -1 AS delta
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE (o.assignee_id, o.status)
+                    IS DISTINCT FROM (n.assignee_id, n.status)
+                UNION ALL
+                SELECT n.assignee_id, n.status, 1 AS delta
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE (o.assignee_id, o.status)
+                    IS DISTINCT FROM (n.assignee_id, n.status)
+            ) AS changes
+            WHERE assignee_id IS NOT NULL AND status IS NOT NULL
+            GROUP BY assignee_id, status
+            HAVING sum(delta) <> 0;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+TASK_STATUS_COUNTS_TRUNCATE_FUNCTION = DDL("""
+    CREATE OR REPLACE FUNCTION task_status_counts_truncate() RETURNS trigger
+    AS $$
+    BEGIN
+        DELETE FROM task_status_counts;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+TASK_STATUS_COUNTS_TRIGGERS = [
+    DDL(
+        "CREATE TRIGGER task_status_counts_insert AFTER INSERT ON tasks "
+        "REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_status_counts_apply()"
+    ),
+    DDL(
+        "CREATE TRIGGER task_status_counts_update AFTER UPDATE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_status_counts_apply()"
+    ),
+    DDL(
+        "CREATE TRIGGER task_status_counts_delete AFTER DELETE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_status_counts_apply()"
+    ),
+    DDL(
+        "CREATE TRIGGER task_status_counts_truncate AFTER TRUNCATE ON tasks "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_status_counts_truncate()"
+    ),
+]
+
+event.listen(Task.__table__, "after_create", TASK_STATUS_COUNTS_FUNCTION)
+event.listen(
+    Task.__table__, "after_create", TASK_STATUS_COUNTS_TRUNCATE_FUNCTION
+)
+
+for trigger in TASK_STATUS_COUNTS_TRIGGERS:
+    event.listen(Task.__table__, "after_create", trigger)
+
+
+# Удаление задачи и смену исполнителя записывают в task_tombstones
+# триггеры уровня оператора, поэтому учитываются и массовые изменения.
+# TRUNCATE не записывается.
+TASK_TOMBSTONES_FUNCTION = DDL("""
+    CREATE OR REPLACE FUNCTION task_tombstones_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO task_tombstones (task_id, assignee_id, reason)
+            SELECT id, assignee_id, 'deleted'
+            FROM old_rows
+            ORDER BY id;
+        ELSE
+            INSERT INTO task_tombstones (task_id, assignee_id, reason)
+            SELECT o.id, o.assignee_id, 'reassigned'
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE o.assignee_id IS NOT NULL
+                AND n.assignee_id IS DISTINCT FROM o.assignee_id
+            ORDER BY o.id;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+TASK_TOMBSTONES_TRIGGERS = [
+    DDL(
+        "CREATE TRIGGER task_tombstones_update AFTER UPDATE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_tombstones_apply()"
+    ),
+    DDL(
+        "CREATE TRIGGER task_tombstones_delete AFTER DELETE ON tasks "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION task_tombstones_apply()"
+    ),
+]
 
-    if target.status in (
-        TaskStatuses.DONE.value,
-        TaskStatuses.CANCELLED.value,
-    ):
-        target.closed_at = now
-    elif target.status == TaskStatuses.IN_PROGRESS.value:
-        target.started_work_at = now
+event.listen(Task.__table__, "after_create", TASK_TOMBSTONES_FUNCTION)
 
-    target.updated_at = now
+for trigger in TASK_TOMBSTONES_TRIGGERS:
+    event.listen(Task.__table__, "after_create", trigger)
@@ -0,0 +1,69 @@
+from typing import Optional, Union
+
+from sqlalchemy import URL
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.settings import settings
+
+
+class DatabaseRegistry:
+    """Общий для процесса движок БД и фабрика сессий.
+
+    Все сервисы берут сессии отсюда, поэтому на процесс приходится один
+    пул соединений к Postgres.
+    """
+
+    def __init__(self):
+        self._engine: Optional[AsyncEngine] = None
+        self._session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+
+    def init(self, db_url: Union[str, URL, None] = None) -> AsyncEngine:
+        if self._engine is not None:
+            return self._engine
+
+        self._engine = create_async_engine(
+            db_url or settings.pg_auth,
+            pool_size=settings.pg_pool_size,
+            max_overflow=settings.pg_max_overflow,
+            pool_timeout=settings.pg_pool_timeout,
+            pool_recycle=settings.pg_pool_recycle,
+            pool_pre_ping=settings.pg_pool_pre_ping,
+        )
+        self._session_maker = async_sessionmaker(
+            bind=self._engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+
+        return self._engine
+
+    async def dispose(self) -> None:
+        if self._engine is None:
+            return
+
+        await self._engine.dispose()
+
+        self._engine = None
+        self._session_maker = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self.init()
+
+        return self._engine
+
+    @property
+    def session_maker(self) -> async_sessionmaker[AsyncSession]:
+        if self._session_maker is None:
+            self.init()
+
+        return self._session_maker
+
+
+db_registry = DatabaseRegistry()
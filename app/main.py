@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
@@ -7,18 +8,35 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.analytics import analytics_router
 from app.api.v1.auth import auth_router
-from app.api.v1.task import task_router
+from app.api.v1.task import NEXT_CURSOR_HEADER, task_router
 from app.api.v1.user import user_router
 from app.core.settings import settings
+from app.db.session import db_registry
+from app.security.hashing import password_hasher
+from app.services.analytics import analytics_service
 from app.services.main_service import main_service
 
 logging.basicConfig(level=settings.logger_level)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db_registry.init()
+
+    yield
+
+    await db_registry.dispose()
+    password_hasher.shutdown()
+    analytics_service.shutdown()
+
+
 app = FastAPI(
     title=settings.project_name,
     description="Документация API сервиса",
     version="1.0.0",
     docs_url="/api/openapi",
     openapi_url="/api/openapi.json",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -27,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 app.include_router(task_router, prefix="/api/v1/tasks")
@@ -36,7 +55,12 @@ app.include_router(analytics_router, prefix="/api/v1/analytics")
 
 
 if __name__ == "__main__":
-    asyncio.run(main_service.init_db())
+
+    async def _init_db():
+        await main_service.init_db()
+        await db_registry.dispose()
+
+    asyncio.run(_init_db())
 
     uvicorn.run(
         app="main:app",
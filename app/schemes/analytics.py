@@ -0,0 +1,130 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class StatusDistributionFilter(BaseModel):
+    assignee_id: Optional[List[int]] = Field(
+        description="Id исполнителей", default=None
+    )
+    created_from: Optional[date] = Field(
+        description="Задачи, созданные начиная с даты", default=None
+    )
+    created_to: Optional[date] = Field(
+        description="Задачи, созданные по дату включительно", default=None
+    )
+
+
+class StatusDistributionRow(BaseModel):
+    assignee_id: int = Field(description="Id исполнителя")
+    full_name: str = Field(description="Имя и фамилия исполнителя")
+    to_do: int = Field(description="Количество задач в статусе To Do")
+    in_progress: int = Field(
+        description="Количество задач в статусе In Progress"
+    )
+    done: int = Field(description="Количество задач в статусе Done")
+    cancelled: int = Field(description="Количество задач в статусе Cancelled")
+
+
+class FlowMetricsFilter(BaseModel):
+    assignee_id: Optional[List[int]] = Field(
+        description="Id исполнителей", default=None
+    )
+    closed_from: Optional[date] = Field(
+        description="Задачи, закрытые начиная с даты", default=None
+    )
+    closed_to: Optional[date] = Field(
+        description="Задачи, закрытые по дату включительно", default=None
+    )
+
+
+class HistogramBucket(BaseModel):
+    from_hours: float = Field(description="Нижняя граница, часов")
+    to_hours: Optional[float] = Field(
+        description="Верхняя граница не включительно, часов"
+    )
+    count: int = Field(description="Количество задач")
+
+
+class DurationStats(BaseModel):
+    count: int = Field(description="Количество задач")
+    p50: Optional[float] = Field(description="Медиана, часов")
+    p85: Optional[float] = Field(description="85-й перцентиль, часов")
+    p95: Optional[float] = Field(description="95-й перцентиль, часов")
+    histogram: List[HistogramBucket] = Field(description="Гистограмма")
+
+
+class WeeklyThroughput(BaseModel):
+    week: date = Field(description="Понедельник недели")
+    count: int = Field(description="Количество выполненных задач")
+
+
+class FlowMetrics(BaseModel):
+    assignee_id: Optional[int] = Field(
+        description="Id исполнителя, пусто для сводки по всем задачам"
+    )
+    lead_time: DurationStats = Field(
+        description="От создания до выполнения задачи"
+    )
+    cycle_time: DurationStats = Field(
+        description="От взятия в работу до выполнения задачи"
+    )
+    throughput: List[WeeklyThroughput] = Field(
+        description="Выполненные задачи по неделям"
+    )
+
+
+class ResponseFlowMetrics(BaseModel):
+    overall: Optional[FlowMetrics] = Field(
+        description="Сводка по всем задачам, пусто если задач нет"
+    )
+    users: List[FlowMetrics] = Field(
+        description="Сводка по исполнителям, страница из limit исполнителей"
+    )
+
+
+class DeliveryForecastFilter(BaseModel):
+    assignee_id: Optional[int] = Field(
+        description="Id исполнителя, пусто для всех задач", default=None
+    )
+    remaining: Optional[int] = Field(
+        description=(
+            "Сколько задач нужно выполнить, по умолчанию - открытые задачи "
+            "исполнителя"
+        ),
+        default=None,
+    )
+    history_from: Optional[date] = Field(
+        description="Начало периода истории", default=None
+    )
+    history_to: Optional[date] = Field(
+        description="Конец периода истории включительно", default=None
+    )
+
+
+class DeliveryForecast(BaseModel):
+    assignee_id: Optional[int] = Field(
+        description="Id исполнителя, пусто для всех задач"
+    )
+    remaining: int = Field(description="Сколько задач нужно выполнить")
+    history_from: date = Field(description="Начало периода истории")
+    history_to: date = Field(description="Конец периода истории")
+    daily_throughput: float = Field(
+        description="Среднее число выполненных задач в день за период"
+    )
+    trials: int = Field(description="Количество испытаний Monte Carlo")
+    start: date = Field(description="Дата, от которой считается прогноз")
+    p50: Optional[date] = Field(
+        description="Дата выполнения с вероятностью 50%"
+    )
+    p85: Optional[date] = Field(
+        description="Дата выполнения с вероятностью 85%"
+    )
+    p95: Optional[date] = Field(
+        description="Дата выполнения с вероятностью 95%"
+    )
+    horizon: date = Field(description="Последний день симуляции")
+    completed_share: float = Field(
+        description="Доля испытаний, завершенных до горизонта"
+    )
@@ -1,10 +1,10 @@
 from datetime import date, datetime
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
 from fastapi import Query
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
-from app.db.models import TaskStatuses
+from app.db.models import TaskStatuses, TombstoneReasons
 
 
 class CreateTask(BaseModel):
@@ -23,7 +23,7 @@ class ResponseTask(BaseModel):
     id: int = Field(description="Id задачи")
     title: str = Field(description="Название задачи")
     description: Optional[str] = Field(description="Описание задачи")
-    assignee_id: int = Field(description="Исполнитель задачи")
+    assignee_id: Optional[int] = Field(description="Исполнитель задачи")
     status: str = Field(description="Статус задачи")
     created_at: datetime = Field(description="Дата создания задачи")
     updated_at: datetime = Field(
@@ -35,6 +35,19 @@ class ResponseTask(BaseModel):
     )
 
 
+class TaskAssignee(BaseModel):
+    id: int = Field(description="Id исполнителя")
+    email: str = Field(description="Почта исполнителя")
+    first_name: str = Field(description="Имя исполнителя")
+    last_name: str = Field(description="Фамилия исполнителя")
+
+
+class ResponseTaskWithAssignee(ResponseTask):
+    assignee: Optional[TaskAssignee] = Field(
+        description="Краткие данные исполнителя задачи"
+    )
+
+
 class UpdateTask(BaseModel):
     title: Optional[str] = Field(description="Название задачи", default=None)
     description: Optional[str] = Field(
@@ -57,4 +70,92 @@ class TaskFilter(BaseModel):
     status: Optional[str] = Query(None)
     assignee_id: Optional[int] = Query(None)
     created_at: Optional[date] = Query(None)
+    created_from: Optional[date] = Query(None)
+    created_to: Optional[date] = Query(None)
     closed_at: Optional[date] = Query(None)
+    closed_from: Optional[date] = Query(None)
+    closed_to: Optional[date] = Query(None)
+
+
+class BulkTaskResult(BaseModel):
+    index: int = Field(description="Порядковый номер задачи во входных данных")
+    id: Optional[int] = Field(description="Id созданной задачи", default=None)
+    error: Optional[str] = Field(
+        description="Причина, по которой задача не создана", default=None
+    )
+
+
+class ResponseBulkTasks(BaseModel):
+    created: int = Field(description="Количество созданных задач")
+    failed: int = Field(description="Количество отклоненных задач")
+    items: List[BulkTaskResult] = Field(description="Результат по задачам")
+
+
+class BulkUpdateTasks(BaseModel):
+    ids: Optional[List[int]] = Field(
+        description="Id задач", default=None, min_length=1
+    )
+    filter: Optional[TaskFilter] = Field(
+        description="Фильтр задач, если не переданы ids", default=None
+    )
+    status: Optional[
+        Literal[
+            TaskStatuses.IN_PROGRESS,
+            TaskStatuses.DONE,
+            TaskStatuses.CANCELLED,
+        ]
+    ] = Field(description="Новый статус задач", default=None)
+    assignee_id: Optional[int] = Field(
+        description="Новый исполнитель задач", default=None
+    )
+
+    @model_validator(mode="after")
+    def validate_selector_and_changes(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Нужно передать либо ids, либо filter.")
+
+        if self.status is None and self.assignee_id is None:
+            raise ValueError("Нужно передать status и/или assignee_id.")
+
+        return self
+
+
+class RejectedTask(BaseModel):
+    id: int = Field(description="Id задачи")
+    reason: str = Field(description="Причина отказа")
+
+
+class ResponseBulkUpdateTasks(BaseModel):
+    changed: List[int] = Field(description="Id измененных задач")
+    skipped: List[int] = Field(
+        description="Id задач, которые уже в нужном состоянии"
+    )
+    not_found: List[int] = Field(
+        description="Id из запроса, для которых задача не найдена"
+    )
+    rejected: List[RejectedTask] = Field(description="Отклоненные задачи")
+
+
+class DeletedTask(BaseModel):
+    id: int = Field(description="Id задачи")
+    reason: TombstoneReasons = Field(
+        description=(
+            "deleted - задача удалена, reassigned - передана другому "
+            "исполнителю"
+        )
+    )
+
+
+class ResponseTaskChanges(BaseModel):
+    tasks: List[ResponseTask] = Field(
+        description="Созданные и измененные задачи"
+    )
+    deleted: List[DeletedTask] = Field(
+        description="Задачи, которые нужно убрать из локальной копии"
+    )
+    next_cursor: str = Field(
+        description="Курсор для следующего запроса, параметр since"
+    )
+    has_more: bool = Field(
+        description="Есть еще изменения, запросите их сразу с next_cursor"
+    )
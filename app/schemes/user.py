@@ -55,6 +55,12 @@ class ResponseUser(BaseModel):
     created_at: datetime = Field(description="Дата создания пользователя")
 
 
+class ResponseUserWithOpenTasks(ResponseUser):
+    open_tasks_count: int = Field(
+        description="Количество открытых задач пользователя"
+    )
+
+
 class UpdateUser(BaseModel):
     email: Optional[str] = Field(
         description="Почта пользователя",
@@ -111,3 +117,5 @@ class UserFilter(BaseModel):
     first_name: Optional[str] = Query(None)
     last_name: Optional[str] = Query(None)
     created_at: Optional[date] = Query(None)
+    created_from: Optional[date] = Query(None)
+    created_to: Optional[date] = Query(None)
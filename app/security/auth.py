@@ -7,11 +7,13 @@ from dotenv import load_dotenv
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy import select
 
 from app.db.models import User
 from app.schemes.auth import TokenData
+from app.security.cache import principal_cache
+from app.security.hashing import hash_password, password_hasher
+from app.security.hashing import verify_password as _verify_password
 from app.services.main_service import MainService
 
 load_dotenv()
@@ -21,16 +23,21 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 bearer_scheme = HTTPBearer()
 
 
 class AuthService(MainService):
     def verify_password(self, plain_password, hashed_password):
-        return pwd_context.verify(plain_password, hashed_password)
+        return _verify_password(plain_password, hashed_password)
 
     def get_password_hash(self, password):
-        return pwd_context.hash(password)
+        return hash_password(password)
+
+    async def verify_password_async(self, plain_password, hashed_password):
+        return await password_hasher.verify(plain_password, hashed_password)
+
+    async def get_password_hash_async(self, password):
+        return await password_hasher.hash(password)
 
     def create_access_token(
         self, data: dict, expires_delta: Optional[timedelta] = None
@@ -76,6 +83,11 @@ class AuthService(MainService):
         token = credentials.credentials
         token_data = self.verify_token(token, credentials_exception)
 
+        user = principal_cache.get(token_data.email)
+
+        if user is not None:
+            return user
+
         session = self._get_async_session()
 
         async with session() as db_session:
@@ -87,7 +99,9 @@ class AuthService(MainService):
             if user is None:
                 raise credentials_exception
 
-            return user
+        principal_cache.set(token_data.email, user)
+
+        return user
 
     async def get_current_active_user(
         self, current_user: User = Depends(get_current_user)
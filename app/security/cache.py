@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.settings import settings
+from app.db.models import User
+
+
+class PrincipalCache:
+    """TTL + LRU кэш аутентифицированных пользователей по subject токена.
+
+    Хранит отсоединенные от сессии объекты User, поэтому проверки роли и
+    is_active на горячем пути не требуют запроса к БД.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._items: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self._subjects_by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        with self._lock:
+            item = self._items.get(subject)
+
+            if item is None:
+                self.misses += 1
+                return None
+
+            expires_at, user = item
+
+            if expires_at <= time.monotonic():
+                self._remove(subject)
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(subject)
+            self.hits += 1
+
+            return user
+
+    def set(self, subject: str, user: User) -> None:
+        if self._max_size <= 0:
+            return
+
+        with self._lock:
+            self._remove(subject)
+            self._items[subject] = (time.monotonic() + self._ttl, user)
+            self._subjects_by_id[user.id] = subject
+
+            while len(self._items) > self._max_size:
+                oldest_subject = next(iter(self._items))
+                self._remove(oldest_subject)
+
+    def invalidate(self, subject: str) -> None:
+        with self._lock:
+            self._remove(subject)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            subject = self._subjects_by_id.get(user_id)
+
+            if subject is not None:
+                self._remove(subject)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._subjects_by_id.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._items),
+                "max_size": self._max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _remove(self, subject: str) -> None:
+        item = self._items.pop(subject, None)
+
+        if item is not None:
+            self._subjects_by_id.pop(item[1].id, None)
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl,
+)
@@ -13,3 +13,19 @@ class AuthenticationError(HTTPException):
 class AuthorizationError(HTTPException):
     def __init__(self, detail: str = "Недостаточно прав"):
         super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+
+class PreconditionFailedError(HTTPException):
+    def __init__(self, detail: str = "Запись изменилась"):
+        super().__init__(
+            status_code=status.HTTP_412_PRECONDITION_FAILED, detail=detail
+        )
+
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, detail: str = "Сервис временно недоступен"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"},
+        )
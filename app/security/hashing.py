@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from app.core.settings import settings
+from app.security.errors import ServiceUnavailableError
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Выполняет bcrypt в пуле воркеров, не блокируя цикл событий.
+
+    Одновременно выполняется не больше max_workers операций, еще не больше
+    max_queue ждут своей очереди. Остальные запросы сразу отклоняются.
+    """
+
+    def __init__(self, executor_type: str, max_workers: int, max_queue: int):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(
+                f"Неизвестный тип пула для хеширования: '{executor_type}'."
+            )
+
+        self._executor_type = executor_type
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(
+            verify_password, plain_password, hashed_password
+        )
+
+    def stats(self) -> dict:
+        return {
+            "executor_type": self._executor_type,
+            "max_workers": self._max_workers,
+            "max_queue": self._max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+        self._executor = None
+        self._semaphore = None
+        self._loop = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop)
+
+        if semaphore.locked() and self.queued >= self._max_queue:
+            self.rejected += 1
+            logger.warning(
+                f"Очередь хеширования паролей переполнена: {self.stats()}."
+            )
+            raise ServiceUnavailableError(
+                "Сервис перегружен, повторите попытку позже."
+            )
+
+        self.queued += 1
+
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), func, *args
+            )
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def _get_semaphore(
+        self, loop: asyncio.AbstractEventLoop
+    ) -> asyncio.Semaphore:
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self._max_workers)
+            self._loop = loop
+
+        return self._semaphore
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._executor_type == "process":
+                self._executor = ProcessPoolExecutor(self._max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self._max_workers, thread_name_prefix="password-hasher"
+                )
+
+        return self._executor
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.password_hash_executor,
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
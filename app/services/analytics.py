@@ -1,100 +1,628 @@
-import pandas as pd
-from sqlalchemy import func, select
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, List, Optional
 
-from app.db.models import Task, TaskStatuses, User
+from sqlalchemy import (
+    Date,
+    Float,
+    Select,
+    and_,
+    cast,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    text,
+)
+
+from app.core.settings import settings
+from app.db.models import Task, TaskStatusCount, TaskStatuses, User
+from app.schemes.analytics import (
+    DeliveryForecastFilter,
+    FlowMetricsFilter,
+    StatusDistributionFilter,
+)
+from app.services.filters import date_range_conditions
 from app.services.main_service import MainService
+from app.services.mappings import OPEN_TASK_STATUSES
+from app.services.report_cache import forecast_cache, report_cache
+from app.services.static_assets import ensure_plotly_bundle
+
+logger = logging.getLogger(__name__)
+
+REPORT_STATUSES = (
+    TaskStatuses.TO_DO.value,
+    TaskStatuses.IN_PROGRESS.value,
+    TaskStatuses.DONE.value,
+    TaskStatuses.CANCELLED.value,
+)
+STATUS_COLORS = {
+    TaskStatuses.TO_DO.value: "#FFD700",
+    TaskStatuses.IN_PROGRESS.value: "#1E90FF",
+    TaskStatuses.DONE.value: "#3CB371",
+    TaskStatuses.CANCELLED.value: "#DC143C",
+}
+# Колонки сводной таблицы для каждого статуса
+STATUS_COLUMNS = {
+    status: TaskStatuses(status).name.lower() for status in REPORT_STATUSES
+}
+STATUS_REPORT_KEY = "status_report"
+STATUS_COUNTS_COMPACT_QUERY = text("""
+    WITH moved AS (
+        DELETE FROM task_status_counts
+        RETURNING assignee_id, status, count
+    ), inserted AS (
+        INSERT INTO task_status_counts (assignee_id, status, count)
+        SELECT assignee_id, status, sum(count)
+        FROM moved
+        GROUP BY assignee_id, status
+        HAVING sum(count) <> 0
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM moved), (SELECT count(*) FROM inserted)
+    """)
+# Колонки потока COPY для get_flow_metrics и их типы в бинарном формате
+FLOW_COPY_COLUMNS = (
+    ("assignee_id", ">i4"),
+    ("lead_time", ">f8"),
+    ("cycle_time", ">f8"),
+    ("closed_day", ">i4"),
+)
 
 
 class AnalyticsService(MainService):
-    async def get_visualization_data(self):
+    def __init__(self):
+        self._executor: Optional[Executor] = None
+
+    async def get_status_distribution(self) -> List[Dict]:
+        """Количество задач каждого исполнителя в разрезе статусов.
+
+        Строки отсортированы по имени исполнителя, ключи счетчиков - из
+        STATUS_COLUMNS.
+        """
         session = self._get_async_session()
 
-        query = (
-            select(
-                User.first_name.label("first_name"),
-                User.last_name.label("last_name"),
-                Task.status.label("status"),
-                func.count(Task.id).label("count"),
-            )
-            .join(User, Task.assignee_id == User.id)
-            .group_by(User.id, Task.status)
+        query = self._status_distribution_query().order_by(
+            "full_name", User.id
         )
 
         async with session() as db_session:
             result = await db_session.execute(query)
 
-        visualization_data = result.all()
+        return [dict(row) for row in result.mappings()]
 
-        if not visualization_data:
-            return None
+    async def iter_status_distribution(
+        self,
+        filter: StatusDistributionFilter,
+        limit: int,
+        after_id: Optional[int] = None,
+    ) -> AsyncIterator[Dict]:
+        """Страница распределения задач, упорядоченная по id исполнителя.
 
-        df_vis = pd.DataFrame(visualization_data)
-        df_vis["full_name"] = df_vis["first_name"] + " " + df_vis["last_name"]
+        Строки читаются курсором на стороне сервера и отдаются по мере
+        получения, чтобы CSV можно было писать в ответ потоком.
+        """
+        session = self._get_async_session()
+
+        query = self._status_distribution_query(filter)
+
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+
+        query = query.order_by(User.id).limit(limit)
 
-        pivot_df = df_vis.pivot(
-            index="full_name", columns="status", values="count"
-        ).fillna(0)
+        async with session() as db_session:
+            result = await db_session.stream(query)
+
+            async for row in result.mappings():
+                yield dict(row)
 
-        column_order = [
-            TaskStatuses.TO_DO.value,
-            TaskStatuses.IN_PROGRESS.value,
-            TaskStatuses.DONE.value,
-            TaskStatuses.CANCELLED.value,
+    def _status_distribution_query(
+        self, filter: Optional[StatusDistributionFilter] = None
+    ) -> Select:
+        """Сводная таблица: строка на исполнителя, колонка на статус.
+
+        Без фильтра по датам читаются готовые счетчики task_status_counts,
+        с фильтром - задачи за период, через индекс по created_at.
+        """
+        filter = filter or StatusDistributionFilter()
+        user_columns = (
+            User.id.label("assignee_id"),
+            (User.first_name + " " + User.last_name).label("full_name"),
+        )
+
+        if filter.created_from is None and filter.created_to is None:
+            assignee_id = TaskStatusCount.assignee_id
+            query = (
+                select(
+                    *user_columns,
+                    *(
+                        func.coalesce(
+                            func.sum(TaskStatusCount.count).filter(
+                                TaskStatusCount.status == status
+                            ),
+                            0,
+                        ).label(column)
+                        for status, column in STATUS_COLUMNS.items()
+                    ),
+                )
+                .join(User, TaskStatusCount.assignee_id == User.id)
+                .having(func.sum(TaskStatusCount.count) > 0)
+            )
+        else:
+            assignee_id = Task.assignee_id
+            query = (
+                select(
+                    *user_columns,
+                    *(
+                        func.count()
+                        .filter(Task.status == status)
+                        .label(column)
+                        for status, column in STATUS_COLUMNS.items()
+                    ),
+                )
+                .join(User, Task.assignee_id == User.id)
+                .where(
+                    *date_range_conditions(
+                        Task.created_at, filter.created_from, filter.created_to
+                    )
+                )
+            )
+
+        if filter.assignee_id:
+            query = query.where(assignee_id.in_(filter.assignee_id))
+
+        return query.group_by(User.id)
+
+    async def get_flow_metrics(
+        self,
+        filter: FlowMetricsFilter,
+        limit: int,
+        after_id: Optional[int] = None,
+    ) -> Dict:
+        """Lead time, cycle time и недельная пропускная способность.
+
+        Учитываются выполненные задачи. Строки передаются из Postgres
+        потоком COPY в бинарном формате, пачками по
+        settings.analytics_flow_chunk_size разбираются в массивы NumPy и
+        сразу раскладываются по гистограммам (см. flow_metrics), поэтому
+        память не зависит от числа задач.
+
+        Пачки обрабатываются в пуле потоков event loop, а не в пуле
+        отрисовки: гистограммы накапливаются в памяти этого процесса, а
+        пул отрисовки может быть пулом процессов.
+
+        Сводка по исполнителям отдается страницами: limit исполнителей с
+        id больше after_id. Период не длиннее
+        settings.analytics_flow_max_weeks недель, иначе ValueError. Так
+        размер ответа и гистограмм ограничен limit * max_weeks.
+        """
+        # NumPy загружается при первом расчете, а не при старте воркера
+        from app.services import flow_metrics
+
+        session = self._get_async_session()
+
+        conditions = [
+            Task.status == TaskStatuses.DONE.value,
+            Task.closed_at.is_not(None),
+            Task.assignee_id.is_not(None),
+            *date_range_conditions(
+                Task.closed_at, filter.closed_from, filter.closed_to
+            ),
         ]
-        ordered_cols = [col for col in column_order if col in pivot_df.columns]
-        pivot_df = pivot_df[ordered_cols]
-
-        import plotly.express as px
-
-        fig = px.bar(
-            pivot_df,
-            x=pivot_df.index,
-            y=pivot_df.columns,
-            title="Распределение задач по исполнителям и статусам",
-            labels={
-                "full_name": "Исполнитель",
-                "value": "Количество задач",
-                "status": "Статус",
-            },
-            color_discrete_map={
-                TaskStatuses.TO_DO.value: "#FFD700",
-                TaskStatuses.IN_PROGRESS.value: "#1E90FF",
-                TaskStatuses.DONE.value: "#3CB371",
-                TaskStatuses.CANCELLED.value: "#DC143C",
+
+        if filter.assignee_id:
+            conditions.append(Task.assignee_id.in_(filter.assignee_id))
+
+        # Разность дат в Postgres - целое число дней
+        closed_day = cast(Task.closed_at, Date) - flow_metrics.WEEKS_START
+        query = select(
+            Task.assignee_id,
+            _seconds_between(Task.created_at, Task.closed_at),
+            _seconds_between(Task.started_work_at, Task.closed_at),
+            closed_day,
+        ).where(*conditions)
+
+        async with session() as db_session:
+            first_day, last_day = (
+                await db_session.execute(
+                    select(func.min(closed_day), func.max(closed_day)).where(
+                        *conditions
+                    )
+                )
+            ).one()
+
+            if first_day is None:
+                return {"overall": None, "users": []}
+
+            max_weeks = settings.analytics_flow_max_weeks
+
+            if last_day // 7 - first_day // 7 >= max_weeks:
+                raise ValueError(
+                    f"Период длиннее {max_weeks} недель. "
+                    "Сузьте его параметрами closed_from и closed_to."
+                )
+
+            page_query = (
+                select(Task.assignee_id)
+                .where(*conditions)
+                .group_by(Task.assignee_id)
+                .order_by(Task.assignee_id)
+                .limit(limit)
+            )
+
+            if after_id is not None:
+                page_query = page_query.where(Task.assignee_id > after_id)
+
+            user_ids = (await db_session.execute(page_query)).scalars().all()
+            metrics = flow_metrics.FlowMetricsAccumulator(
+                first_day, last_day, user_ids
+            )
+            reader = flow_metrics.BinaryCopyReader(
+                FLOW_COPY_COLUMNS,
+                settings.analytics_flow_chunk_size,
+                metrics.add_chunk,
+            )
+            connection = await db_session.connection()
+            compiled = query.compile(
+                dialect=connection.dialect,
+                compile_kwargs={"render_postcompile": True},
+            )
+            raw_connection = await connection.get_raw_connection()
+
+            await raw_connection.driver_connection.copy_from_query(
+                str(compiled),
+                *(compiled.params[name] for name in compiled.positiontup),
+                output=reader.feed,
+                format="binary",
+            )
+            await reader.close()
+
+        return metrics.result()
+
+    async def get_delivery_forecast(
+        self, filter: DeliveryForecastFilter
+    ) -> Optional[Dict]:
+        """Прогноз даты выполнения задач по исторической пропускной
+        способности, см. forecast_completion_days.
+
+        История - число выполненных задач за каждый день окна (по
+        умолчанию - settings.analytics_forecast_history_days дней до
+        вчерашнего дня). Результат кэшируется по окну истории и входным
+        параметрам. None, если за окно нет выполненных задач.
+        """
+        start = date.today()
+        history_to = filter.history_to or start - timedelta(days=1)
+        history_from = filter.history_from or history_to - timedelta(
+            days=settings.analytics_forecast_history_days - 1
+        )
+
+        if history_from > history_to:
+            raise ValueError("Начало периода истории позже его конца.")
+
+        if history_to >= start:
+            raise ValueError("Период истории должен закончиться до сегодня.")
+
+        remaining = filter.remaining
+
+        if remaining is None:
+            remaining = await self._count_open_tasks(filter.assignee_id)
+
+        key = (
+            f"forecast:{filter.assignee_id}:{remaining}:"
+            f"{history_from}:{history_to}:{start}"
+        )
+
+        async def compute() -> Optional[Dict]:
+            return await self._build_forecast(
+                filter.assignee_id, remaining, history_from, history_to, start
+            )
+
+        return await forecast_cache.get(key, compute)
+
+    async def _count_open_tasks(self, assignee_id: Optional[int]) -> int:
+        """Открытые задачи по счетчикам task_status_counts."""
+        session = self._get_async_session()
+
+        query = select(
+            func.coalesce(func.sum(TaskStatusCount.count), 0)
+        ).where(TaskStatusCount.status.in_(OPEN_TASK_STATUSES))
+
+        if assignee_id is not None:
+            query = query.where(TaskStatusCount.assignee_id == assignee_id)
+
+        async with session() as db_session:
+            return (await db_session.execute(query)).scalar_one()
+
+    async def _build_forecast(
+        self,
+        assignee_id: Optional[int],
+        remaining: int,
+        history_from: date,
+        history_to: date,
+        start: date,
+    ) -> Optional[Dict]:
+        from app.services import flow_metrics
+
+        session = self._get_async_session()
+
+        day = cast(Task.closed_at, Date) - history_from
+        query = (
+            select(day, func.count())
+            .where(
+                Task.status == TaskStatuses.DONE.value,
+                *date_range_conditions(
+                    Task.closed_at, history_from, history_to
+                ),
+            )
+            .group_by(day)
+        )
+
+        if assignee_id is not None:
+            query = query.where(Task.assignee_id == assignee_id)
+
+        async with session() as db_session:
+            rows = (await db_session.execute(query)).all()
+
+        if not rows:
+            return None
+
+        daily_throughput = flow_metrics.daily_throughput(
+            (history_to - history_from).days + 1, rows
+        )
+
+        trials = settings.analytics_forecast_trials
+        max_days = settings.analytics_forecast_max_days
+        loop = asyncio.get_running_loop()
+        forecast = await loop.run_in_executor(
+            self._get_executor(),
+            flow_metrics.forecast_completion_days,
+            daily_throughput,
+            remaining,
+            trials,
+            max_days,
+        )
+
+        return {
+            "assignee_id": assignee_id,
+            "remaining": remaining,
+            "history_from": history_from,
+            "history_to": history_to,
+            "daily_throughput": round(float(daily_throughput.mean()), 2),
+            "trials": trials,
+            "start": start,
+            **{
+                name: None if offset is None else start + timedelta(offset)
+                for name, offset in forecast.items()
+                if name in flow_metrics.PERCENTILES
             },
+            "horizon": start + timedelta(days=max_days),
+            "completed_share": forecast["completed_share"],
+        }
+
+    async def check_status_counts(self, rebuild: bool = True) -> List[Dict]:
+        """Сверяет task_status_counts с фактическим количеством задач.
+
+        Возвращает расхождения: исполнитель, статус, значение в таблице
+        счетчиков и фактическое значение. При rebuild=True таблица
+        пересобирается в той же транзакции; запись в tasks на это время
+        блокируется, чтобы новые изменения не потерялись.
+        """
+        session = self._get_async_session()
+
+        actual = (
+            select(
+                Task.assignee_id,
+                Task.status,
+                func.count().label("count"),
+            )
+            .where(Task.assignee_id.is_not(None), Task.status.is_not(None))
+            .group_by(Task.assignee_id, Task.status)
+            .subquery()
+        )
+        stored = (
+            select(
+                TaskStatusCount.assignee_id,
+                TaskStatusCount.status,
+                func.sum(TaskStatusCount.count).label("count"),
+            )
+            .group_by(TaskStatusCount.assignee_id, TaskStatusCount.status)
+            .subquery()
+        )
+        stored_count = func.coalesce(stored.c.count, 0)
+        actual_count = func.coalesce(actual.c.count, 0)
+        drift_query = (
+            select(
+                func.coalesce(
+                    actual.c.assignee_id, stored.c.assignee_id
+                ).label("assignee_id"),
+                func.coalesce(actual.c.status, stored.c.status).label(
+                    "status"
+                ),
+                stored_count.label("stored"),
+                actual_count.label("actual"),
+            )
+            .select_from(
+                actual.join(
+                    stored,
+                    and_(
+                        stored.c.assignee_id == actual.c.assignee_id,
+                        stored.c.status == actual.c.status,
+                    ),
+                    full=True,
+                )
+            )
+            .where(stored_count != actual_count)
+            .order_by("assignee_id", "status")
+        )
+
+        async with session() as db_session:
+            if rebuild:
+                await db_session.execute(
+                    text("LOCK TABLE tasks IN SHARE MODE")
+                )
+
+            result = await db_session.execute(drift_query)
+            drift = [dict(row) for row in result.mappings()]
+
+            if rebuild:
+                await db_session.execute(delete(TaskStatusCount))
+                await db_session.execute(
+                    insert(TaskStatusCount).from_select(
+                        ["assignee_id", "status", "count"],
+                        select(actual),
+                    )
+                )
+
+            await db_session.commit()
+
+        if drift:
+            logger.warning(
+                f"Счетчики task_status_counts расходятся с задачами "
+                f"в {len(drift)} строках."
+            )
+
+        return drift
+
+    async def compact_status_counts(self) -> int:
+        """Сворачивает дельты task_status_counts по (исполнитель, статус).
+
+        Нулевые суммы удаляются. Дельты параллельных транзакций не видны
+        этому оператору и остаются как есть, поэтому запись в tasks не
+        блокируется. Возвращает, на сколько строк уменьшилась таблица.
+        """
+        session = self._get_async_session()
+
+        async with session() as db_session:
+            result = await db_session.execute(STATUS_COUNTS_COMPACT_QUERY)
+            removed, inserted = result.one()
+            await db_session.commit()
+
+        logger.info(
+            f"Счетчики task_status_counts свернуты: {removed} строк "
+            f"заменены на {inserted}."
         )
 
-        fig.update_layout(
-            barmode="stack",
-            xaxis_title="Исполнитель",
-            yaxis_title="Количество задач",
+        return removed - inserted
+
+    async def get_visualization_data(self) -> Optional[str]:
+        """HTML-отчет из кэша, см. ReportCache."""
+        return await report_cache.get(STATUS_REPORT_KEY, self._build_report)
+
+    async def _build_report(self) -> Optional[str]:
+        distribution = await self.get_status_distribution()
+
+        if not distribution:
+            return None
+
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(
+            self._get_executor(), render_status_report, distribution
         )
 
-        graph_html = fig.to_html(full_html=False, include_plotlyjs="cdn")
-
-        html_template = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Отчет по задачам</title>
-                <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-                <style>
-                    body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                    h1 {{ color: #333; }}
-                    .container {{ max-width: 1000px; margin: auto; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <h1>Аналитика</h1>
-                    {graph_html}
-                    <hr>
-                </div>
-            </body>
-            </html>
-        """  # noqa: E501
-
-        return html_template
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+        self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            workers = settings.analytics_render_workers
+
+            if settings.analytics_render_executor == "process":
+                # fork из многопоточного воркера (пулы bcrypt и event loop
+                # уже запущены) может скопировать захваченные блокировки,
+                # и дочерний процесс зависнет. forkserver запускает
+                # воркеры из отдельного однопоточного процесса.
+                self._executor = ProcessPoolExecutor(
+                    workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    workers, thread_name_prefix="analytics-render"
+                )
+
+        return self._executor
+
+
+def _seconds_between(start, end):
+    # NaN вместо NULL: в бинарном COPY все строки должны быть одной длины
+    return func.coalesce(
+        cast(func.extract("epoch", end - start), Float),
+        literal_column("'NaN'::float8"),
+    )
+
+
+def render_status_report(distribution: List[Dict]) -> str:
+    """Строит HTML-отчет по распределению задач.
+
+    Синхронная CPU-работа: вызывается в пуле воркеров, поэтому должна
+    оставаться функцией модуля с сериализуемыми аргументами.
+    """
+    import plotly.graph_objects as go
+
+    names = [row["full_name"] for row in distribution]
+    fig = go.Figure(
+        [
+            go.Bar(
+                name=status,
+                x=names,
+                y=[row[STATUS_COLUMNS[status]] for row in distribution],
+                marker_color=STATUS_COLORS[status],
+            )
+            for status in REPORT_STATUSES
+            # Как и раньше, в легенде только статусы, у которых есть
+            # задачи
+            if any(row[STATUS_COLUMNS[status]] for row in distribution)
+        ]
+    )
+
+    fig.update_layout(
+        title="Распределение задач по исполнителям и статусам",
+        barmode="stack",
+        xaxis_title="Исполнитель",
+        yaxis_title="Количество задач",
+        legend_title="Статус",
+    )
+
+    # Бандл Plotly подключается один раз, из приложения, а не с CDN
+    graph_html = fig.to_html(full_html=False, include_plotlyjs=False)
+    plotly_url = f"{settings.analytics_assets_url}/{ensure_plotly_bundle()}"
+
+    html_template = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Отчет по задачам</title>
+            <script src="{plotly_url}"></script>
+            <style>
+                body {{ font-family: Arial, sans-serif; margin: 20px; }}
+                h1 {{ color: #333; }}
+                .container {{ max-width: 1000px; margin: auto; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <h1>Аналитика</h1>
+                {graph_html}
+                <hr>
+            </div>
+        </body>
+        </html>
+    """  # noqa: E501
+
+    return html_template
 
 
 analytics_service = AnalyticsService()
@@ -0,0 +1,46 @@
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+
+def _start_of_day(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def date_range_conditions(
+    column, date_from: Optional[date] = None, date_to: Optional[date] = None
+) -> List:
+    """Условия для диапазона дат, обе границы включительно.
+
+    Сравнение идет с полуинтервалом [date_from, date_to + 1 день) по самой
+    колонке, поэтому Postgres может использовать индекс по ней, в отличие
+    от func.date(column) == day.
+    """
+    conditions = []
+
+    if date_from is not None:
+        conditions.append(column >= _start_of_day(date_from))
+
+    if date_to is not None:
+        conditions.append(column < _start_of_day(date_to) + timedelta(days=1))
+
+    return conditions
+
+
+def on_date_conditions(column, day: Optional[date]) -> List:
+    if day is None:
+        return []
+
+    return date_range_conditions(column, day, day)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def substring_condition(column, value: str):
+    """Регистронезависимый поиск подстроки.
+
+    ILIKE '%value%' обслуживается GIN-индексом pg_trgm по колонке, в отличие
+    от обычного btree-индекса.
+    """
+    return column.ilike(f"%{_escape_like(value)}%", escape="\\")
@@ -0,0 +1,399 @@
+"""Накопление статистики по длительностям задач в гистограммах NumPy.
+
+Значения приходят пачками и сразу раскладываются по корзинам, поэтому
+память зависит от числа исполнителей и корзин, а не от числа задач.
+Перцентили считаются по мелким логарифмическим корзинам с линейной
+интерполяцией внутри корзины, относительная погрешность - несколько
+процентов.
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+HOUR = 3600
+# Мелкие корзины для перцентилей: 0, затем от минуты до пяти лет
+PERCENTILE_EDGES = np.concatenate(
+    ([0.0], np.geomspace(60, 5 * 365 * 24 * HOUR, 200))
+)
+# Корзины гистограммы в ответе API, в часах
+HISTOGRAM_EDGES_HOURS = (0, 1, 4, 8, 24, 72, 168, 336, 720, 2160)
+HISTOGRAM_EDGES = np.array(HISTOGRAM_EDGES_HOURS, dtype=np.float64) * HOUR
+PERCENTILES = {"p50": 0.5, "p85": 0.85, "p95": 0.95}
+# Понедельник, от которого отсчитываются номера недель
+WEEKS_START = date(1970, 1, 5)
+# Сколько дней прогноза разыгрывается за один шаг Monte Carlo
+FORECAST_BLOCK_DAYS = 28
+
+
+class BinnedCounter:
+    """Счетчики попаданий значений в корзины, отдельно по исполнителям.
+
+    edges - левые границы корзин по возрастанию. Значения левее первой
+    границы попадают в первую корзину, правее последней - в последнюю.
+    """
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.user_ids = np.empty(0, dtype=np.int64)
+        self.counts = np.zeros((0, len(self.edges)), dtype=np.int64)
+
+    def add(self, user_ids: np.ndarray, values: np.ndarray) -> None:
+        mask = ~np.isnan(values)
+        user_ids, values = user_ids[mask], values[mask]
+
+        if not values.size:
+            return
+
+        bins = np.searchsorted(self.edges, values, side="right") - 1
+        bins = np.clip(bins, 0, len(self.edges) - 1)
+        rows = self._get_rows(user_ids)
+
+        keys, counts = np.unique(
+            rows * len(self.edges) + bins, return_counts=True
+        )
+        # В keys нет повторов, поэтому += по индексам не теряет значения
+        self.counts.reshape(-1)[keys] += counts
+
+    def total(self) -> np.ndarray:
+        return self.counts.sum(axis=0, keepdims=True)
+
+    def for_users(self, user_ids: np.ndarray) -> np.ndarray:
+        """Строки счетчиков для user_ids, нули для незнакомых id."""
+        result = np.zeros((len(user_ids), len(self.edges)), np.int64)
+        rows = np.searchsorted(self.user_ids, user_ids)
+        known = rows < len(self.user_ids)
+        known[known] = self.user_ids[rows[known]] == user_ids[known]
+        result[known] = self.counts[rows[known]]
+
+        return result
+
+    def _get_rows(self, user_ids: np.ndarray) -> np.ndarray:
+        new_ids = np.setdiff1d(user_ids, self.user_ids)
+
+        if new_ids.size:
+            all_ids = np.union1d(self.user_ids, new_ids)
+            counts = np.zeros((len(all_ids), len(self.edges)), np.int64)
+            counts[np.searchsorted(all_ids, self.user_ids)] = self.counts
+
+            self.user_ids, self.counts = all_ids, counts
+
+        return np.searchsorted(self.user_ids, user_ids)
+
+
+class FlowMetricsAccumulator:
+    """Гистограммы lead time, cycle time и недельной пропускной
+    способности: общие по всем задачам и по исполнителям user_ids.
+
+    Принимает пачки записей BinaryCopyReader с колонками assignee_id,
+    lead_time и cycle_time в секундах и closed_day - номером дня от
+    WEEKS_START. Записи других исполнителей учитываются только в общих
+    гистограммах, поэтому память ограничена числом user_ids, а не всех
+    исполнителей.
+    """
+
+    def __init__(self, first_day: int, last_day: int, user_ids):
+        self.weeks = np.arange(first_day // 7, last_day // 7 + 1)
+        self.user_ids = np.unique(np.asarray(user_ids, dtype=np.int64))
+        self.overall = self._make_counters()
+        self.users = self._make_counters()
+
+    def add_chunk(self, records: np.ndarray) -> None:
+        user_ids = records["assignee_id"].astype(np.int64)
+        values = (
+            records["lead_time"].astype(np.float64),
+            records["cycle_time"].astype(np.float64),
+            np.floor_divide(records["closed_day"], 7).astype(np.float64),
+        )
+        mask = np.isin(user_ids, self.user_ids)
+
+        self._add(self.overall, np.zeros_like(user_ids), *values)
+        self._add(
+            self.users, user_ids[mask], *(value[mask] for value in values)
+        )
+
+    def result(self) -> Dict:
+        """Сводка по всем задачам и по каждому исполнителю из user_ids."""
+        overall = self._metrics(
+            [None], *(counter.total() for counter in self.overall)
+        )
+        users = self._metrics(
+            self.user_ids.tolist(),
+            *(counter.for_users(self.user_ids) for counter in self.users),
+        )
+
+        return {"overall": overall[0], "users": users}
+
+    def _make_counters(self) -> Tuple[BinnedCounter, ...]:
+        # lead time, cycle time (перцентили и гистограмма), пропускная
+        # способность по неделям
+        return (
+            BinnedCounter(PERCENTILE_EDGES),
+            BinnedCounter(HISTOGRAM_EDGES),
+            BinnedCounter(PERCENTILE_EDGES),
+            BinnedCounter(HISTOGRAM_EDGES),
+            BinnedCounter(self.weeks),
+        )
+
+    @staticmethod
+    def _add(counters, user_ids, lead_seconds, cycle_seconds, weeks) -> None:
+        values = (lead_seconds, lead_seconds, cycle_seconds, cycle_seconds)
+
+        for counter, counter_values in zip(counters, (*values, weeks)):
+            counter.add(user_ids, counter_values)
+
+    def _metrics(
+        self,
+        user_ids: List[Optional[int]],
+        lead_time: np.ndarray,
+        lead_time_histogram: np.ndarray,
+        cycle_time: np.ndarray,
+        cycle_time_histogram: np.ndarray,
+        throughput: np.ndarray,
+    ) -> List[Dict]:
+        return [
+            {
+                "assignee_id": user_id,
+                "lead_time": lead_stats,
+                "cycle_time": cycle_stats,
+                "throughput": user_throughput,
+            }
+            for user_id, lead_stats, cycle_stats, user_throughput in zip(
+                user_ids,
+                duration_stats(lead_time, lead_time_histogram),
+                duration_stats(cycle_time, cycle_time_histogram),
+                weekly_throughput(throughput, self.weeks),
+            )
+        ]
+
+
+class BinaryCopyReader:
+    """Разбирает поток COPY ... TO STDOUT (FORMAT binary) в массивы NumPy.
+
+    Все колонки должны быть фиксированной ширины и без NULL, тогда каждая
+    строка потока - запись одного размера и пачку строк можно прочитать
+    одним np.frombuffer. Записи передаются в on_chunk пачками по
+    chunk_rows, в буфере не копится больше одной пачки.
+
+    Разбор пачки и on_chunk выполняются в executor (None - пул потоков
+    event loop по умолчанию), чтобы работа NumPy не блокировала event
+    loop. Пачки обрабатываются по одной: feed ждет, пока executor
+    закончит предыдущую, поэтому on_chunk может менять общее состояние.
+    """
+
+    # Сигнатура, флаги и длина расширения заголовка
+    HEADER_SIZE = 19
+    TRAILER = b"\xff\xff"
+
+    def __init__(
+        self,
+        columns,
+        chunk_rows: int,
+        on_chunk,
+        executor: Optional[Executor] = None,
+    ):
+        fields = [("field_count", ">i2")]
+
+        for name, dtype in columns:
+            fields += [(f"{name}_length", ">i4"), (name, dtype)]
+
+        self.dtype = np.dtype(fields)
+        self._chunk_size = chunk_rows * self.dtype.itemsize
+        self._on_chunk = on_chunk
+        self._executor = executor
+        self._buffer = bytearray()
+        self._header_skipped = False
+
+    async def feed(self, data: bytes) -> None:
+        self._buffer += data
+
+        if not self._header_skipped and len(self._buffer) >= self.HEADER_SIZE:
+            del self._buffer[: self.HEADER_SIZE]
+            self._header_skipped = True
+
+        while self._header_skipped and len(self._buffer) > self._chunk_size:
+            await self._run_emit(self._chunk_size)
+
+    async def close(self) -> None:
+        trailer_start = len(self._buffer) - len(self.TRAILER)
+
+        if (
+            not self._header_skipped
+            or self._buffer[trailer_start:] != self.TRAILER
+            or trailer_start % self.dtype.itemsize
+        ):
+            raise ValueError("Поток COPY оборвался или содержит NULL.")
+
+        del self._buffer[trailer_start:]
+
+        if self._buffer:
+            await self._run_emit(len(self._buffer))
+
+    async def _run_emit(self, size: int) -> None:
+        loop = asyncio.get_running_loop()
+
+        await loop.run_in_executor(self._executor, self._emit, size)
+
+    def _emit(self, size: int) -> None:
+        # Копия: буфер нельзя менять, пока на него ссылается массив
+        records = np.frombuffer(
+            self._buffer, dtype=self.dtype, count=size // self.dtype.itemsize
+        ).copy()
+        del self._buffer[:size]
+
+        self._on_chunk(records)
+
+
+def percentiles(counts: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Перцентили PERCENTILES для каждой строки counts.
+
+    Возвращает массив (строки, перцентили), NaN для пустых строк.
+    """
+    upper_edges = np.append(edges[1:], edges[-1])
+    cumulative = counts.cumsum(axis=1)
+    totals = cumulative[:, -1]
+    rows = np.arange(len(counts))
+    result = np.full((len(counts), len(PERCENTILES)), np.nan)
+
+    for column, quantile in enumerate(PERCENTILES.values()):
+        target = totals * quantile
+        bins = (cumulative >= target[:, None]).argmax(axis=1)
+        in_bin = counts[rows, bins]
+        before = cumulative[rows, bins] - in_bin
+        fraction = np.divide(
+            target - before,
+            in_bin,
+            out=np.zeros(len(counts)),
+            where=in_bin > 0,
+        )
+        result[:, column] = edges[bins] + fraction * (
+            upper_edges[bins] - edges[bins]
+        )
+
+    result[totals == 0] = np.nan
+
+    return result
+
+
+def duration_stats(
+    percentile_counts: np.ndarray, histogram_counts: np.ndarray
+) -> List[Dict]:
+    """Сводка по длительностям для каждой строки счетчиков, в часах."""
+    values = percentiles(percentile_counts, PERCENTILE_EDGES)
+    upper_hours = (*HISTOGRAM_EDGES_HOURS[1:], None)
+
+    return [
+        {
+            "count": int(histogram_row.sum()),
+            **{
+                name: _to_hours(value)
+                for name, value in zip(PERCENTILES, values_row)
+            },
+            "histogram": [
+                {
+                    "from_hours": from_hours,
+                    "to_hours": to_hours,
+                    "count": int(count),
+                }
+                for from_hours, to_hours, count in zip(
+                    HISTOGRAM_EDGES_HOURS, upper_hours, histogram_row
+                )
+            ],
+        }
+        for values_row, histogram_row in zip(values, histogram_counts)
+    ]
+
+
+def weekly_throughput(counts: np.ndarray, weeks: np.ndarray) -> List[List]:
+    """Количество закрытых задач по неделям для каждой строки счетчиков."""
+    week_starts = [week_start(week) for week in weeks]
+
+    return [
+        [
+            {"week": start, "count": int(count)}
+            for start, count in zip(week_starts, row)
+        ]
+        for row in counts
+    ]
+
+
+def daily_throughput(days: int, rows) -> np.ndarray:
+    """Выполненные задачи по дням окна из пар (номер дня, количество).
+
+    Дни без выполненных задач тоже входят в историю, с нулем.
+    """
+    result = np.zeros(days, dtype=np.int64)
+
+    for day, count in rows:
+        result[day] = count
+
+    return result
+
+
+def forecast_completion_days(
+    daily_throughput: np.ndarray,
+    remaining: int,
+    trials: int,
+    max_days: int,
+    seed: Optional[int] = None,
+) -> Dict:
+    """Monte Carlo: за сколько дней будут выполнены remaining задач.
+
+    Каждый день испытания берется случайный день из истории
+    daily_throughput. Дни разыгрываются блоками по FORECAST_BLOCK_DAYS,
+    завершенные испытания выбывают, поэтому память - O(trials *
+    FORECAST_BLOCK_DAYS), а число шагов ограничено max_days.
+
+    Возвращает перцентили PERCENTILES в днях (None, если перцентиль не
+    уложился в max_days) и долю испытаний, уложившихся в max_days.
+    Синхронная CPU-работа, вызывается в пуле воркеров.
+    """
+    rng = np.random.default_rng(seed)
+    days = np.full(trials, np.inf)
+    done = np.zeros(trials, dtype=np.int64)
+    active = np.arange(trials)
+    day = 0
+
+    if remaining <= 0:
+        days[:] = 0
+
+    # Без выполненных задач в истории ни одно испытание не завершится
+    if remaining <= 0 or not daily_throughput.any():
+        active = active[:0]
+
+    while active.size and day < max_days:
+        block = min(FORECAST_BLOCK_DAYS, max_days - day)
+        samples = rng.choice(daily_throughput, size=(active.size, block))
+        progress = done[active, None] + samples.cumsum(axis=1)
+        finished = progress[:, -1] >= remaining
+
+        first = (progress[finished] >= remaining).argmax(axis=1)
+        days[active[finished]] = day + first + 1
+        done[active] = progress[:, -1]
+        active = active[~finished]
+        day += block
+
+    # higher: перцентиль - день одного из испытаний, без интерполяции
+    values = np.quantile(days, list(PERCENTILES.values()), method="higher")
+
+    return {
+        **{
+            name: None if np.isinf(value) else int(value)
+            for name, value in zip(PERCENTILES, values)
+        },
+        "completed_share": float(np.isfinite(days).mean()),
+    }
+
+
+def week_start(week: int) -> date:
+    return WEEKS_START + timedelta(weeks=int(week))
+
+
+def _to_hours(seconds: float) -> Optional[float]:
+    if np.isnan(seconds):
+        return None
+
+    return round(float(seconds) / HOUR, 2)
@@ -0,0 +1,86 @@
+from enum import StrEnum
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import joinedload, load_only, with_expression
+
+from app.db.models import Task, User
+from app.services.mappings import OPEN_TASK_STATUSES
+
+
+class LoadingProfile(StrEnum):
+    # Только собственные колонки строки, без связанных сущностей
+    BARE = "bare"
+    # Колонки ответа API и версия для ETag, у пользователя без пароля
+    PUBLIC = "public"
+    # Колонки ответа API и краткие данные исполнителя одним JOIN
+    TASK_WITH_ASSIGNEE = "task_with_assignee"
+    # Пользователь без пароля и число его открытых задач
+    USER_WITH_OPEN_TASKS_COUNT = "user_with_open_tasks_count"
+
+
+USER_PUBLIC_COLUMNS = (
+    User.id,
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.is_active,
+    User.role,
+    User.created_at,
+    User.version,
+)
+TASK_PUBLIC_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.assignee_id,
+    Task.status,
+    Task.created_at,
+    Task.updated_at,
+    Task.closed_at,
+    Task.started_work_at,
+    Task.version,
+)
+
+OPEN_TASKS_COUNT = (
+    select(func.count(Task.id))
+    .where(
+        Task.assignee_id == User.id,
+        Task.status.in_(OPEN_TASK_STATUSES),
+    )
+    .correlate(User)
+    .scalar_subquery()
+)
+
+LOADING_PROFILES = {
+    Task: {
+        LoadingProfile.BARE: (),
+        LoadingProfile.PUBLIC: (load_only(*TASK_PUBLIC_COLUMNS),),
+        LoadingProfile.TASK_WITH_ASSIGNEE: (
+            load_only(*TASK_PUBLIC_COLUMNS),
+            joinedload(Task.assignee).load_only(
+                User.id, User.email, User.first_name, User.last_name
+            ),
+        ),
+    },
+    User: {
+        LoadingProfile.BARE: (),
+        LoadingProfile.PUBLIC: (load_only(*USER_PUBLIC_COLUMNS),),
+        LoadingProfile.USER_WITH_OPEN_TASKS_COUNT: (
+            load_only(*USER_PUBLIC_COLUMNS),
+            with_expression(User.open_tasks_count, OPEN_TASKS_COUNT),
+        ),
+    },
+}
+
+
+def apply_loading_profile(
+    query: Select, model: type, profile: LoadingProfile
+) -> Select:
+    options = LOADING_PROFILES[model].get(profile)
+
+    if options is None:
+        raise ValueError(
+            f"Профиль загрузки '{profile}' не поддерживается для {model.__name__}."  # noqa: E501
+        )
+
+    return query.options(*options)
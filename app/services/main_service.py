@@ -1,21 +1,17 @@
-from typing import Union
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
 
-from sqlalchemy import URL
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-
-from app.core.settings import settings
 from app.db.models import Base
-
-DB_URL = settings.pg_auth
+from app.db.session import db_registry
 
 
 class MainService:
-    _engine = None
-
-    def __init__(self, db_url: Union[str, URL] = DB_URL):
-        self._db_url = db_url
-        self._engine = create_async_engine(self._db_url)
+    @property
+    def _engine(self) -> AsyncEngine:
+        return db_registry.engine
 
     async def init_db(self):
         async with self._engine.begin() as conn:
@@ -25,12 +21,8 @@ class MainService:
         async with self._engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
 
-    def _get_async_session(self):
-        return sessionmaker(
-            bind=self._engine,
-            class_=AsyncSession,
-            expire_on_commit=False,
-        )
+    def _get_async_session(self) -> async_sessionmaker[AsyncSession]:
+        return db_registry.session_maker
 
 
-main_service = MainService(db_url=settings.pg_auth)
+main_service = MainService()
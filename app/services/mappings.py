@@ -12,3 +12,18 @@ TASK_STATUSES_MAPPING = {
     TaskStatuses.DONE: (),
     TaskStatuses.CANCELLED: (),
 }
+
+# Из каких статусов задача может перейти в данный
+TASK_STATUSES_ALLOWED_FROM = {
+    status.value: tuple(
+        current_status.value
+        for current_status, next_statuses in TASK_STATUSES_MAPPING.items()
+        if status.value in next_statuses
+    )
+    for status in TaskStatuses
+}
+
+OPEN_TASK_STATUSES = (
+    TaskStatuses.TO_DO.value,
+    TaskStatuses.IN_PROGRESS.value,
+)
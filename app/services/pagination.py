@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Optional
+
+from sqlalchemy import Select, and_, desc, or_
+
+
+def get_sort_field(model, sort_by: str):
+    """Возвращает колонку модели, по которой разрешена сортировка.
+
+    Вычисляемые служебные колонки (например, search_vector) не сортируются.
+    """
+    column = model.__table__.columns.get(sort_by)
+
+    if column is None or column.computed is not None:
+        return None
+
+    return getattr(model, sort_by)
+
+
+def encode_cursor(row, sort_by: str, ascending: bool) -> str:
+    return make_cursor(sort_by, ascending, getattr(row, sort_by), row.id)
+
+
+def make_cursor(sort_by: str, ascending: bool, value: Any, id: int) -> str:
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+
+    payload = {"s": sort_by, "a": ascending, "v": value, "id": id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, field, sort_by: str, ascending: bool
+) -> tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value, last_id = payload["v"], int(payload["id"])
+        cursor_sort_by, cursor_ascending = payload["s"], payload["a"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Некорректный курсор пагинации.")
+
+    if cursor_sort_by != sort_by or cursor_ascending != ascending:
+        raise ValueError(
+            "Курсор пагинации получен для другой сортировки. "
+            "Запросите первую страницу заново."
+        )
+
+    if value is not None:
+        python_type = field.type.python_type
+
+        try:
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            else:
+                value = python_type(value)
+        except (TypeError, ValueError):
+            raise ValueError("Некорректный курсор пагинации.")
+
+    return value, last_id
+
+
+def make_change_cursor(xid: int, kind: int, id: int) -> str:
+    """Курсор ленты изменений: позиция (change_xid, вид записи, id)."""
+    raw = json.dumps({"x": xid, "k": kind, "id": id}, separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> tuple[int, int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        position = int(payload["x"]), int(payload["k"]), int(payload["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Некорректный курсор изменений.")
+
+    return position
+
+
+def apply_ordering(query: Select, field, id_field, ascending: bool) -> Select:
+    """Сортирует по полю и id, чтобы порядок строк был однозначным."""
+    order = [field] if field is id_field else [field, id_field]
+
+    if ascending:
+        return query.order_by(*order)
+
+    return query.order_by(*(desc(column) for column in order))
+
+
+def apply_keyset(
+    query: Select,
+    field,
+    id_field,
+    ascending: bool,
+    value: Optional[Any],
+    last_id: int,
+) -> Select:
+    """Фильтр "строки после курсора" для сортировки (field, id).
+
+    Postgres ставит NULL последними при ASC и первыми при DESC, условие
+    учитывает это, чтобы страницы не теряли строки с пустым полем.
+    """
+    if field is id_field:
+        if ascending:
+            return query.where(id_field > last_id)
+
+        return query.where(id_field < last_id)
+
+    if ascending:
+        if value is None:
+            condition = and_(field.is_(None), id_field > last_id)
+        else:
+            condition = or_(
+                field > value,
+                and_(field == value, id_field > last_id),
+                field.is_(None),
+            )
+    else:
+        if value is None:
+            condition = or_(
+                and_(field.is_(None), id_field < last_id),
+                field.is_not(None),
+            )
+        else:
+            condition = or_(
+                field < value,
+                and_(field == value, id_field < last_id),
+            )
+
+    return query.where(condition)
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ReportCache:
+    """TTL-кэш отчетов с объединением одновременных запросов.
+
+    Свежее значение (моложе ttl) отдается сразу. Устаревшее, но моложе
+    ttl + stale_ttl, тоже отдается сразу, а пересчет запускается в фоне.
+    Одновременные запросы одного ключа ждут одно общее вычисление.
+    Если задан max_items, сверх него вытесняются давно вычисленные ключи.
+    """
+
+    def __init__(
+        self, ttl: float, stale_ttl: float, max_items: Optional[int] = None
+    ):
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._max_items = max_items
+        self._items: Dict[str, tuple[float, Any]] = {}
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.computations = 0
+
+    async def get(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        item = self._items.get(key)
+
+        if item is not None:
+            age = time.monotonic() - item[0]
+
+            if age < self._ttl:
+                self.hits += 1
+                return item[1]
+
+            if age < self._ttl + self._stale_ttl:
+                self.stale_hits += 1
+                self._start(key, compute)
+                return item[1]
+
+        self.misses += 1
+
+        # shield: отмена одного запроса не отменяет общее вычисление
+        return await asyncio.shield(self._start(key, compute))
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.computations = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._items),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "computations": self.computations,
+        }
+
+    def _start(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            self._in_flight = {}
+            self._loop = loop
+
+        task = self._in_flight.get(key)
+
+        if task is None:
+            task = loop.create_task(self._compute(key, compute))
+            # Ошибку фонового пересчета уже записали в лог
+            task.add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+            self._in_flight[key] = task
+
+        return task
+
+    async def _compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        self.computations += 1
+
+        try:
+            value = await compute()
+        except Exception:
+            logger.exception(f"Не удалось пересчитать отчет '{key}'.")
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        # Перевставка переносит ключ в конец, к самым свежим
+        self._items.pop(key, None)
+        self._items[key] = (time.monotonic(), value)
+
+        if self._max_items is not None:
+            while len(self._items) > self._max_items:
+                del self._items[next(iter(self._items))]
+
+        return value
+
+
+report_cache = ReportCache(
+    ttl=settings.analytics_report_ttl,
+    stale_ttl=settings.analytics_report_stale_ttl,
+)
+# Прогнозы кэшируются по окну истории и входным параметрам, без отдачи
+# устаревших значений
+forecast_cache = ReportCache(
+    ttl=settings.analytics_forecast_ttl,
+    stale_ttl=0,
+    max_items=settings.analytics_forecast_cache_size,
+)
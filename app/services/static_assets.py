@@ -0,0 +1,110 @@
+"""Статические файлы отчетов, которые приложение раздает само.
+
+Бандл Plotly копируется из установленного пакета plotly в
+settings.analytics_assets_dir вместе с заранее сжатой gzip-копией при
+сборке (python -m app.commands.build_static). Имя файла содержит версию
+plotly.js, поэтому содержимое по одному URL не меняется и его можно
+кэшировать навсегда.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PLOTLY_BUNDLE_NAME = "plotly-{version}.min.js"
+ASSET_NAME_PATTERN = re.compile(r"[\w-][\w.-]*\.js")
+GZIP_SUFFIX = ".gz"
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    path: Path
+    etag: str
+    gzipped: bool
+
+
+def get_plotly_bundle_name() -> str:
+    from plotly.offline import get_plotlyjs_version
+
+    return PLOTLY_BUNDLE_NAME.format(version=get_plotlyjs_version())
+
+
+def build_plotly_bundle(directory: Optional[Path] = None) -> Path:
+    """Записывает бандл Plotly и его gzip-копию, возвращает путь бандла."""
+    from plotly.offline import get_plotlyjs
+
+    directory = Path(directory or settings.analytics_assets_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / get_plotly_bundle_name()
+    content = get_plotlyjs().encode()
+
+    _write_atomic(path, content)
+    # mtime=0: одинаковый бандл дает одинаковый архив
+    _write_atomic(
+        path.with_name(path.name + GZIP_SUFFIX),
+        gzip.compress(content, compresslevel=9, mtime=0),
+    )
+    logger.info(f"Бандл Plotly записан в {path}.")
+
+    return path
+
+
+def ensure_plotly_bundle() -> str:
+    """Имя бандла Plotly; собирает его, если сборку пропустили."""
+    name = get_plotly_bundle_name()
+    directory = Path(settings.analytics_assets_dir)
+
+    if not (directory / (name + GZIP_SUFFIX)).exists():
+        logger.warning(
+            "Бандл Plotly не найден, собираю. Запустите "
+            "python -m app.commands.build_static при сборке."
+        )
+        build_plotly_bundle(directory)
+
+    return name
+
+
+def get_asset(name: str, gzipped: bool) -> Optional[StaticAsset]:
+    """Файл для ответа: gzip-копия, если клиент ее принимает."""
+    if not ASSET_NAME_PATTERN.fullmatch(name):
+        return None
+
+    path = Path(settings.analytics_assets_dir) / name
+
+    if gzipped and path.with_name(name + GZIP_SUFFIX).is_file():
+        path = path.with_name(name + GZIP_SUFFIX)
+    elif path.is_file():
+        gzipped = False
+    else:
+        return None
+
+    stat = path.stat()
+    # У несжатого и сжатого файла разные байты, поэтому и ETag разный
+    etag = _get_file_hash(str(path), stat.st_mtime_ns, stat.st_size)
+
+    return StaticAsset(path=path, etag=f'"{etag}"', gzipped=gzipped)
+
+
+@lru_cache(maxsize=32)
+def _get_file_hash(path: str, mtime_ns: int, size: int) -> str:
+    # mtime_ns и size в ключе кэша: пересобранный файл хэшируется заново
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()[:32]
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    # Воркеры могут собирать бандл одновременно, читатель не должен
+    # увидеть недописанный файл
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp_path.write_bytes(content)
+    os.replace(temp_path, path)
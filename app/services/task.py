@@ -1,18 +1,98 @@
 import logging
+from datetime import datetime as dt
 from http import HTTPStatus
-from typing import List, Optional
+from typing import Any, AsyncIterable, List, Optional, Tuple
 
+from asyncpg import PostgresError
 from fastapi import HTTPException
-from sqlalchemy import delete, desc, func, select
-
-from app.db.models import Task, TaskStatuses, User, UserRoles
-from app.schemes.task import CreateTask, TaskFilter
-from app.security.errors import AuthorizationError
+from pydantic import ValidationError
+from sqlalchemy import (
+    BigInteger,
+    Float,
+    Select,
+    Text,
+    cast,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import undefer
+
+from app.core.settings import settings
+from app.db.models import (
+    TASK_SEARCH_CONFIG,
+    Task,
+    TaskStatuses,
+    TaskTombstone,
+    TombstoneReasons,
+    User,
+    UserRoles,
+)
+from app.schemes.task import (
+    BulkTaskResult,
+    BulkUpdateTasks,
+    CreateTask,
+    DeletedTask,
+    RejectedTask,
+    ResponseBulkUpdateTasks,
+    ResponseTaskChanges,
+    TaskFilter,
+)
+from app.security.errors import AuthorizationError, PreconditionFailedError
+from app.services.filters import (
+    date_range_conditions,
+    on_date_conditions,
+    substring_condition,
+)
+from app.services.loading import LoadingProfile, apply_loading_profile
 from app.services.main_service import MainService
-from app.services.mappings import TASK_STATUSES_MAPPING
+from app.services.mappings import (
+    TASK_STATUSES_ALLOWED_FROM,
+    TASK_STATUSES_MAPPING,
+)
+from app.services.pagination import (
+    apply_keyset,
+    apply_ordering,
+    decode_change_cursor,
+    decode_cursor,
+    get_sort_field,
+    make_change_cursor,
+)
 
 logger = logging.getLogger(__name__)
 
+# Имя "поля" сортировки в курсоре поисковой выдачи
+SEARCH_RANK_SORT = "rank"
+
+# Вид записи в курсоре ленты изменений: в одной транзакции удаления идут
+# раньше задач
+CHANGE_TOMBSTONE = 0
+CHANGE_TASK = 1
+
+# Колонки, которые заполняет массовое создание задач
+BULK_TASK_COLUMNS = (
+    "title",
+    "description",
+    "status",
+    "assignee_id",
+)
+
+
+def _format_errors(error: ValidationError) -> str:
+    return "; ".join(
+        (
+            f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}"
+            if e["loc"]
+            else e["msg"]
+        )
+        for e in error.errors()
+    )
+
 
 class TaskService(MainService):
     async def create_task(self, current_user: User, input: CreateTask) -> Task:
@@ -30,11 +110,125 @@ class TaskService(MainService):
 
             return task
 
-    async def get_task(self, current_user: User, id: int) -> Optional[Task]:
+    async def create_tasks_bulk(
+        self,
+        current_user: User,
+        items: AsyncIterable[Tuple[int, Any]],
+    ) -> List[BulkTaskResult]:
+        """Создает задачи пачками по settings.task_bulk_batch_size.
+
+        items - пары (порядковый номер, данные задачи или ошибка разбора).
+        Каждая пачка коммитится отдельно, ошибка в пачке не отменяет уже
+        созданные задачи. Возвращает результат по каждой задаче.
+        """
+        results = []
+        batch = []
+
+        async for index, raw_task in items:
+            if isinstance(raw_task, Exception):
+                results.append(
+                    BulkTaskResult(index=index, error=str(raw_task))
+                )
+                continue
+
+            try:
+                batch.append((index, CreateTask.model_validate(raw_task)))
+            except ValidationError as e:
+                results.append(
+                    BulkTaskResult(index=index, error=_format_errors(e))
+                )
+                continue
+
+            if len(batch) >= settings.task_bulk_batch_size:
+                results.extend(await self._insert_batch(current_user, batch))
+                batch = []
+
+        if batch:
+            results.extend(await self._insert_batch(current_user, batch))
+
+        results.sort(key=lambda result: result.index)
+        created = sum(1 for result in results if result.id is not None)
+
+        logger.info(
+            f"Пользователь c id={current_user.id} создал {created} задач "
+            f"из {len(results)}."
+        )
+
+        return results
+
+    async def _insert_batch(
+        self, current_user: User, batch: List[Tuple[int, CreateTask]]
+    ) -> List[BulkTaskResult]:
         session = self._get_async_session()
+        rows = [
+            {**task.model_dump(), "assignee_id": current_user.id}
+            for _, task in batch
+        ]
 
         async with session() as db_session:
-            result = await db_session.execute(select(Task).filter_by(id=id))
+            try:
+                if len(rows) >= settings.task_bulk_copy_threshold:
+                    ids = await self._copy_tasks(db_session, rows)
+                else:
+                    result = await db_session.execute(
+                        insert(Task).returning(
+                            Task.id, sort_by_parameter_order=True
+                        ),
+                        rows,
+                    )
+                    ids = result.scalars().all()
+
+                await db_session.commit()
+            except (SQLAlchemyError, PostgresError) as e:
+                await db_session.rollback()
+                logger.error(f"Не удалось создать пачку задач: {e}")
+
+                return [
+                    BulkTaskResult(index=index, error="Ошибка записи в БД.")
+                    for index, _ in batch
+                ]
+
+        return [
+            BulkTaskResult(index=index, id=id)
+            for (index, _), id in zip(batch, ids)
+        ]
+
+    async def _copy_tasks(self, db_session, rows: List[dict]) -> List[int]:
+        """Вставка через COPY; id заранее берутся из последовательности."""
+        result = await db_session.execute(
+            select(
+                func.nextval(func.pg_get_serial_sequence("tasks", "id"))
+            ).select_from(func.generate_series(1, len(rows)))
+        )
+        ids = result.scalars().all()
+
+        connection = await db_session.connection()
+        raw_connection = await connection.get_raw_connection()
+
+        await raw_connection.driver_connection.copy_records_to_table(
+            Task.__tablename__,
+            columns=["id", *BULK_TASK_COLUMNS],
+            records=[
+                (id, *(row[column] for column in BULK_TASK_COLUMNS))
+                for id, row in zip(ids, rows)
+            ],
+        )
+
+        return ids
+
+    async def get_task(
+        self,
+        current_user: User,
+        id: int,
+        profile: LoadingProfile = LoadingProfile.BARE,
+    ) -> Optional[Task]:
+        session = self._get_async_session()
+        query = apply_loading_profile(
+            select(Task).filter_by(id=id), Task, profile
+        )
+
+        async with session() as db_session:
+            result = await db_session.execute(query)
 
             task = result.scalars().first()
 
@@ -85,49 +279,313 @@ class TaskService(MainService):
                     f"Задача c {id=} принадлежит другому пользователю и не может быть удалена."  # noqa: E501
                 )
 
-    async def update_task(self, id: int, current_user: User, **kwargs) -> Task:
+    async def update_task(
+        self,
+        id: int,
+        current_user: User,
+        expected_versions: Optional[List[int]] = None,
+        **kwargs,
+    ) -> Task:
+        """Обновляет задачу одним условным UPDATE ... RETURNING.
+
+        Проверки владельца, допустимости смены статуса и версии задачи
+        (expected_versions, из If-Match) выполняются в WHERE, поэтому два
+        конкурентных PATCH не могут оба пройти валидацию. Отметки времени и
+        версию выставляет триггер tasks_set_timestamps.
+        Без изменяемых полей выполняется SELECT с теми же условиями: задача
+        возвращается как есть, version и updated_at не меняются.
+        Дополнительный SELECT выполняется только для выбора текста ошибки.
+        """
         session = self._get_async_session()
+        values = {key: value for key, value in kwargs.items() if value}
+        new_status = values.get("status")
+
+        conditions = [Task.id == id]
+
+        if expected_versions is not None:
+            conditions.append(Task.version.in_(expected_versions))
+
+        if current_user.role != UserRoles.ADMIN:
+            conditions.append(Task.assignee_id == current_user.id)
+
+        if new_status is not None:
+            conditions.append(
+                Task.status.in_(TASK_STATUSES_ALLOWED_FROM[new_status])
+            )
+
+        if values:
+            query = (
+                update(Task)
+                .where(*conditions)
+                .values(**values)
+                .returning(Task)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            query = select(Task).where(*conditions)
 
         async with session() as db_session:
-            result = await db_session.execute(select(Task).filter_by(id=id))
+            result = await db_session.execute(query)
             task = result.scalars().one_or_none()
 
             if task is None:
-                logger.error(f"Задача c {id=} не найдена.")
-                raise ValueError(f"Задача c {id=} не найдена.")
+                await self._raise_update_error(
+                    db_session, id, current_user, new_status, expected_versions
+                )
 
-            if (
-                current_user.role == UserRoles.USER
-                and task.assignee_id == current_user.id
-            ) or (current_user.role == UserRoles.ADMIN):
-                for key, value in kwargs.items():
-                    if key == "status":
-                        if value is None:
-                            continue
-
-                        if not self.is_valid_new_task_status(
-                            task.status, value
-                        ):
-                            raise HTTPException(
-                                status_code=HTTPStatus.BAD_REQUEST,
-                                detail=(
-                                    f"Задача не может сменить статус с {task.status} на {value}. "  # noqa: E501
-                                    f"Доступные варианты: {TASK_STATUSES_MAPPING[task.status] if TASK_STATUSES_MAPPING[task.status] else 'Нет доступных статусов'}"  # noqa: E501
-                                ),
-                            )
-
-                    if value:
-                        setattr(task, key, value)
+            await db_session.commit()
 
-                await db_session.commit()
+        logger.info(f"Задача c {id=} успешно обновлена.")
 
-                logger.info(f"Задача c {id=} успешно обновлена.")
+        return task
 
-                return task
-            else:
-                raise AuthorizationError(
-                    f"Задача c {id=} принадлежит другому пользователю и не может быть обновлена."  # noqa: E501
+    async def _raise_update_error(
+        self,
+        db_session,
+        id: int,
+        current_user: User,
+        new_status: Optional[str],
+        expected_versions: Optional[List[int]] = None,
+    ) -> None:
+        result = await db_session.execute(
+            select(Task.assignee_id, Task.status, Task.version).filter_by(
+                id=id
+            )
+        )
+        row = result.one_or_none()
+
+        if row is None:
+            logger.error(f"Задача c {id=} не найдена.")
+            raise ValueError(f"Задача c {id=} не найдена.")
+
+        if (
+            current_user.role != UserRoles.ADMIN
+            and row.assignee_id != current_user.id
+        ):
+            raise AuthorizationError(
+                f"Задача c {id=} принадлежит другому пользователю и не может быть обновлена."  # noqa: E501
+            )
+
+        if expected_versions is not None and row.version not in (
+            expected_versions
+        ):
+            raise PreconditionFailedError(
+                f"Задача c {id=} изменилась, текущая версия {row.version}. "
+                "Получите задачу заново."
+            )
+
+        available_statuses = TASK_STATUSES_MAPPING[row.status]
+
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=(
+                f"Задача не может сменить статус с {row.status} на {new_status}. "  # noqa: E501
+                f"Доступные варианты: {available_statuses if available_statuses else 'Нет доступных статусов'}"  # noqa: E501
+            ),
+        )
+
+    async def update_tasks_bulk(
+        self, current_user: User, input: BulkUpdateTasks
+    ) -> ResponseBulkUpdateTasks:
+        """Массово меняет статус и/или исполнителя задач.
+
+        Выполняется за ограниченное число запросов независимо от количества
+        задач: блокировка кандидатов, один UPDATE ... RETURNING с проверкой
+        допустимости перехода в WHERE и коммит. Отметки времени выставляет
+        триггер tasks_set_timestamps.
+        """
+        session = self._get_async_session()
+        max_items = settings.task_bulk_update_max_items
+        new_status = input.status.value if input.status else None
+
+        candidates_query = select(Task.id, Task.status, Task.assignee_id)
+
+        if input.ids is not None:
+            if len(set(input.ids)) > max_items:
+                raise ValueError(
+                    f"За один запрос можно изменить не более {max_items} задач."  # noqa: E501
+                )
+
+            candidates_query = candidates_query.where(
+                Task.id.in_(set(input.ids))
+            )
+        else:
+            candidates_query = self._apply_filter(
+                candidates_query, input.filter, current_user
+            )
+
+        candidates_query = (
+            candidates_query.order_by(Task.id)
+            .limit(max_items + 1)
+            .with_for_update()
+        )
+
+        async with session() as db_session:
+            if input.assignee_id is not None:
+                assignee = await db_session.get(User, input.assignee_id)
+
+                if assignee is None:
+                    raise ValueError(
+                        f"Пользователь c id={input.assignee_id} не найден."
+                    )
+
+            result = await db_session.execute(candidates_query)
+            candidates = {row.id: row for row in result.all()}
+
+            if len(candidates) > max_items:
+                raise ValueError(
+                    f"Фильтр выбирает более {max_items} задач. Уточните фильтр."  # noqa: E501
+                )
+
+            skipped = [
+                id
+                for id, row in candidates.items()
+                if self._can_change(row, current_user)
+                and (new_status is None or row.status == new_status)
+                and (
+                    input.assignee_id is None
+                    or row.assignee_id == input.assignee_id
                 )
+            ]
+
+            not_found = []
+
+            if input.ids is not None:
+                not_found = sorted(set(input.ids) - candidates.keys())
+
+            to_update = candidates.keys() - set(skipped)
+            changed = []
+
+            if to_update:
+                changed = await self._update_candidates(
+                    db_session, current_user, to_update, input, new_status
+                )
+
+            await db_session.commit()
+
+        rejected = [
+            RejectedTask(
+                id=id,
+                reason=self._get_rejection_reason(
+                    candidates[id], current_user, new_status
+                ),
+            )
+            for id in sorted(to_update - set(changed))
+        ]
+
+        logger.info(
+            f"Массовое обновление задач: изменено {len(changed)}, "
+            f"пропущено {len(skipped)}, не найдено {len(not_found)}, "
+            f"отклонено {len(rejected)}."
+        )
+
+        return ResponseBulkUpdateTasks(
+            changed=sorted(changed),
+            skipped=sorted(skipped),
+            not_found=not_found,
+            rejected=rejected,
+        )
+
+    async def _update_candidates(
+        self,
+        db_session,
+        current_user: User,
+        ids,
+        input: BulkUpdateTasks,
+        new_status: Optional[str],
+    ) -> List[int]:
+        values = {}
+        query = update(Task).where(Task.id.in_(ids))
+
+        if current_user.role != UserRoles.ADMIN:
+            query = query.where(Task.assignee_id == current_user.id)
+
+        if new_status is not None:
+            values["status"] = new_status
+            query = query.where(
+                or_(
+                    Task.status == new_status,
+                    Task.status.in_(TASK_STATUSES_ALLOWED_FROM[new_status]),
+                )
+            )
+
+        if input.assignee_id is not None:
+            values["assignee_id"] = input.assignee_id
+
+        result = await db_session.execute(
+            query.values(**values)
+            .returning(Task.id)
+            .execution_options(synchronize_session=False)
+        )
+
+        return result.scalars().all()
+
+    def _can_change(self, row, current_user: User) -> bool:
+        return (
+            current_user.role == UserRoles.ADMIN
+            or row.assignee_id == current_user.id
+        )
+
+    def _get_rejection_reason(
+        self, row, current_user: User, new_status: Optional[str]
+    ) -> str:
+        if not self._can_change(row, current_user):
+            return "Задача принадлежит другому пользователю."
+
+        return (
+            f"Задача не может сменить статус с {row.status} на {new_status}."
+        )
+
+    async def claim_tasks(self, current_user: User, limit: int) -> List[Task]:
+        """Забирает из очереди до limit самых старых задач "To Do".
+
+        Задачи переводятся в "In Progress" и назначаются на текущего
+        пользователя одним UPDATE, подзапрос которого блокирует строки через
+        FOR UPDATE SKIP LOCKED: строки, уже захваченные другим обработчиком,
+        пропускаются без ожидания, поэтому конкурентные вызовы не получают
+        одну и ту же задачу и не выстраиваются в очередь на блокировках.
+        Обычный пользователь берет только свободные и свои задачи.
+        """
+        session = self._get_async_session()
+
+        queue = select(Task.id).where(Task.status == TaskStatuses.TO_DO.value)
+
+        if current_user.role == UserRoles.USER:
+            queue = queue.where(
+                or_(
+                    Task.assignee_id.is_(None),
+                    Task.assignee_id == current_user.id,
+                )
+            )
+
+        queue = (
+            queue.order_by(Task.created_at, Task.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        query = (
+            update(Task)
+            .where(Task.id.in_(queue.scalar_subquery()))
+            .values(
+                status=TaskStatuses.IN_PROGRESS.value,
+                assignee_id=current_user.id,
+            )
+            .returning(Task)
+            .execution_options(synchronize_session=False)
+        )
+
+        async with session() as db_session:
+            result = await db_session.execute(query)
+            tasks = result.scalars().all()
+            await db_session.commit()
+
+        logger.info(
+            f"Пользователь c id={current_user.id} взял в работу "
+            f"{len(tasks)} задач."
+        )
+
+        # RETURNING не сохраняет порядок подзапроса
+        return sorted(tasks, key=lambda task: (task.created_at, task.id))
 
     async def get_tasks(
         self,
@@ -137,45 +595,255 @@ class TaskService(MainService):
         ascending: bool,
         filter: TaskFilter,
         current_user: User,
+        profile: LoadingProfile = LoadingProfile.BARE,
+        cursor: Optional[str] = None,
     ) -> List[Task]:
         session = self._get_async_session()
-        query = select(Task)
+        query = apply_loading_profile(select(Task), Task, profile)
+        query = self._apply_filter(query, filter, current_user)
 
-        if filter.title:
-            query = query.where(Task.title.contains(filter.title))
-
-        if filter.status:
-            query = query.where(Task.status == filter.status)
+        async with session() as db_session:
+            field, position = self.get_page_position(
+                sort_by, ascending, cursor
+            )
 
-        if filter.created_at:
-            query = query.where(
-                func.date(Task.created_at) == filter.created_at
+            # Значение поля сортировки нужно для курсора следующей страницы
+            query = apply_ordering(
+                query.options(undefer(field)), field, Task.id, ascending
             )
 
-        if filter.closed_at:
-            query = query.where(func.date(Task.closed_at) == filter.closed_at)
+            if position is not None:
+                query = apply_keyset(
+                    query, field, Task.id, ascending, *position
+                )
+            else:
+                query = query.offset(skip)
+
+            result = await db_session.execute(query.limit(limit))
+
+            return result.scalars().all()
+
+    def get_page_position(
+        self, sort_by: str, ascending: bool, cursor: Optional[str]
+    ) -> Tuple[Any, Optional[Tuple[Any, int]]]:
+        """Поле сортировки и позиция курсора (значение поля, id).
+
+        Бросает AttributeError для неизвестного поля и ValueError для
+        некорректного курсора, позиция - None, если курсора нет.
+        """
+        field = get_sort_field(Task, sort_by)
+
+        if field is None:
+            logger.error(f"У задачи нет поля '{sort_by}'.")
+            raise AttributeError(f"У задачи нет поля '{sort_by}'.")
+
+        if cursor is None:
+            return field, None
+
+        return field, decode_cursor(cursor, field, sort_by, ascending)
+
+    async def get_tasks_state(
+        self, filter: TaskFilter, current_user: User
+    ) -> Tuple[int, Optional[dt], int]:
+        """Сводка по задачам под фильтром, для ETag списка.
+
+        Количество, последнее updated_at и сумма version. Триггер
+        увеличивает version при каждом UPDATE, поэтому сумма ловит и
+        изменения, которые закоммитились позже, но с меньшим updated_at
+        (время берется на начало транзакции). Все колонки есть в
+        ix_tasks_assignee_id_status_created_at, сводку можно посчитать
+        index-only scan'ом, не читая строки таблицы.
+        """
+        session = self._get_async_session()
+        query = select(
+            func.count(),
+            func.max(Task.updated_at),
+            func.coalesce(func.sum(Task.version), 0),
+        ).select_from(Task)
+        query = self._apply_filter(query, filter, current_user)
+
+        async with session() as db_session:
+            return tuple((await db_session.execute(query)).one())
+
+    async def get_changes(
+        self, current_user: User, since: Optional[str], limit: int
+    ) -> ResponseTaskChanges:
+        """Задачи и удаления, появившиеся после курсора since.
+
+        Позиция в ленте - (change_xid, вид записи, id). Отдаются только
+        транзакции младше горизонта - xmin текущего снимка: все они уже
+        завершены, поэтому транзакция, закоммиченная позже курсора, не
+        окажется за ним. Одинаковое время изменения на порядок не влияет.
+
+        Горизонт общий для всего кластера: пока открыта хотя бы одна
+        транзакция с выделенным id (в любой базе), лента не отдает
+        изменения новее нее. Если горизонт отстает от следующего id
+        транзакции больше чем на settings.task_changes_horizon_lag_warning,
+        пишется предупреждение.
+        """
+        xid, kind, last_id = (
+            decode_change_cursor(since) if since is not None else (0, 0, 0)
+        )
+        session = self._get_async_session()
+        snapshot = func.pg_current_snapshot()
+        horizon_query = select(
+            cast(cast(func.pg_snapshot_xmin(snapshot), Text), BigInteger),
+            cast(cast(func.pg_snapshot_xmax(snapshot), Text), BigInteger),
+        )
+
+        if kind == CHANGE_TOMBSTONE:
+            task_after = Task.change_xid >= xid
+            tombstone_after = tuple_(
+                TaskTombstone.change_xid, TaskTombstone.id
+            ) > (xid, last_id)
+        else:
+            task_after = tuple_(Task.change_xid, Task.id) > (xid, last_id)
+            tombstone_after = TaskTombstone.change_xid > xid
 
         async with session() as db_session:
+            horizon, next_xid = (await db_session.execute(horizon_query)).one()
+
+            if next_xid - horizon > settings.task_changes_horizon_lag_warning:
+                logger.warning(
+                    "Горизонт ленты изменений отстает на "
+                    f"{next_xid - horizon} транзакций: транзакция "
+                    f"{horizon} все еще открыта, более новые изменения не "
+                    "отдаются. Найдите ее в pg_stat_activity (backend_xid)."
+                )
+
+            task_query = select(Task).where(
+                task_after, Task.change_xid < horizon
+            )
+            tombstone_query = select(TaskTombstone).where(
+                tombstone_after, TaskTombstone.change_xid < horizon
+            )
+
             if current_user.role == UserRoles.USER:
-                query = query.filter_by(assignee_id=current_user.id)
+                task_query = task_query.where(
+                    Task.assignee_id == current_user.id
+                )
+                tombstone_query = tombstone_query.where(
+                    TaskTombstone.assignee_id == current_user.id
+                )
             else:
-                if filter.assignee_id is not None:
-                    query = query.where(Task.assignee_id == filter.assignee_id)
+                tombstone_query = tombstone_query.where(
+                    TaskTombstone.reason == TombstoneReasons.DELETED
+                )
 
-            field = getattr(Task, sort_by, None)
+            # Лишняя строка показывает, есть ли изменения после порции
+            tasks = await db_session.execute(
+                task_query.order_by(Task.change_xid, Task.id).limit(limit + 1)
+            )
+            tombstones = await db_session.execute(
+                tombstone_query.order_by(
+                    TaskTombstone.change_xid, TaskTombstone.id
+                ).limit(limit + 1)
+            )
+            changes = sorted(
+                [
+                    ((task.change_xid, CHANGE_TASK, task.id), task)
+                    for task in tasks.scalars()
+                ]
+                + [
+                    ((row.change_xid, CHANGE_TOMBSTONE, row.id), row)
+                    for row in tombstones.scalars()
+                ],
+                key=lambda change: change[0],
+            )
 
-            if field is None:
-                logger.error(f"У задачи нет поля '{sort_by}'.")
-                raise AttributeError(f"У задачи нет поля '{sort_by}'.")
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        if has_more:
+            position = changes[-1][0]
+        else:
+            # Курсор не откатывается, даже если since дальше горизонта
+            position = max((horizon, 0, 0), (xid, kind, last_id))
+
+        changed = [item for _, item in changes if isinstance(item, Task)]
+        changed_ids = {task.id for task in changed}
+        # Задача, вернувшаяся к исполнителю в той же порции, не удаляется
+        deleted = {
+            item.task_id: item.reason
+            for _, item in changes
+            if isinstance(item, TaskTombstone)
+            and item.task_id not in changed_ids
+        }
+
+        return ResponseTaskChanges.model_validate(
+            {
+                "tasks": changed,
+                "deleted": [
+                    DeletedTask(id=id, reason=reason)
+                    for id, reason in deleted.items()
+                ],
+                "next_cursor": make_change_cursor(*position),
+                "has_more": has_more,
+            },
+            from_attributes=True,
+        )
+
+    async def search_tasks(
+        self,
+        search_text: str,
+        limit: int,
+        filter: TaskFilter,
+        current_user: User,
+        cursor: Optional[str] = None,
+    ) -> List[Tuple[Task, float]]:
+        """Полнотекстовый поиск по названию и описанию задачи.
 
-            if ascending:
-                query = query.order_by(field)
-            else:
-                query = query.order_by(desc(field))
+        Возвращает пары (задача, релевантность), отсортированные по
+        убыванию релевантности и id.
+        """
+        session = self._get_async_session()
+        ts_query = func.websearch_to_tsquery(TASK_SEARCH_CONFIG, search_text)
+        rank = func.ts_rank_cd(Task.search_vector, ts_query, type_=Float)
+
+        query = select(Task, rank.label("rank")).where(
+            Task.search_vector.bool_op("@@")(ts_query)
+        )
+        query = self._apply_filter(query, filter, current_user)
+        query = apply_ordering(query, rank, Task.id, ascending=False)
+
+        if cursor is not None:
+            value, last_id = decode_cursor(
+                cursor, rank, SEARCH_RANK_SORT, ascending=False
+            )
+            query = apply_keyset(query, rank, Task.id, False, value, last_id)
 
-            result = await db_session.execute(query.offset(skip).limit(limit))
+        async with session() as db_session:
+            result = await db_session.execute(query.limit(limit))
 
-            return result.scalars().all()
+            return result.all()
+
+    def _apply_filter(
+        self, query: Select, filter: TaskFilter, current_user: User
+    ) -> Select:
+        if filter.title:
+            query = query.where(substring_condition(Task.title, filter.title))
+
+        if filter.status:
+            query = query.where(Task.status == filter.status)
+
+        query = query.where(
+            *on_date_conditions(Task.created_at, filter.created_at),
+            *date_range_conditions(
+                Task.created_at, filter.created_from, filter.created_to
+            ),
+            *on_date_conditions(Task.closed_at, filter.closed_at),
+            *date_range_conditions(
+                Task.closed_at, filter.closed_from, filter.closed_to
+            ),
+        )
+
+        if current_user.role == UserRoles.USER:
+            query = query.where(Task.assignee_id == current_user.id)
+        else:
+            if filter.assignee_id is not None:
+                query = query.where(Task.assignee_id == filter.assignee_id)
+
+        return query
 
     def is_valid_new_task_status(
         self, current_status: TaskStatuses, new_status: str
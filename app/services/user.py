@@ -1,12 +1,19 @@
 import logging
 from typing import List, Optional
 
-from sqlalchemy import delete, desc, func, select
+from sqlalchemy import Select, delete, desc, select, update
 
 from app.db.models import User, UserRoles
 from app.schemes.user import CreateUser, UserFilter
 from app.security.auth import auth_service
-from app.security.errors import AuthorizationError
+from app.security.cache import principal_cache
+from app.security.errors import AuthorizationError, PreconditionFailedError
+from app.services.filters import (
+    date_range_conditions,
+    on_date_conditions,
+    substring_condition,
+)
+from app.services.loading import LoadingProfile, apply_loading_profile
 from app.services.main_service import MainService
 
 logger = logging.getLogger(__name__)
@@ -15,7 +22,9 @@ logger = logging.getLogger(__name__)
 class UserService(MainService):
     async def create_user(self, input: CreateUser) -> User:
         session = self._get_async_session()
-        hashed_password = auth_service.get_password_hash(input.password)
+        hashed_password = await auth_service.get_password_hash_async(
+            input.password
+        )
         raw_user = input.model_dump()
         raw_user.update({"password": hashed_password})
         user = User(**raw_user)
@@ -39,11 +48,16 @@ class UserService(MainService):
 
             return user
 
-    async def get_user_by_id(self, id: int) -> Optional[User]:
+    async def get_user_by_id(
+        self, id: int, profile: LoadingProfile = LoadingProfile.BARE
+    ) -> Optional[User]:
         session = self._get_async_session()
+        query = apply_loading_profile(
+            select(User).filter_by(id=id), User, profile
+        )
 
         async with session() as db_session:
-            result = await db_session.execute(select(User).filter_by(id=id))
+            result = await db_session.execute(query)
 
             return result.scalars().first()
 
@@ -70,6 +84,8 @@ class UserService(MainService):
 
                 await db_session.commit()
 
+                principal_cache.invalidate_user(id)
+
                 if result.rowcount > 0:
                     logger.info(f"Пользователь c {id=} успешно удален.")
                 else:
@@ -80,42 +96,82 @@ class UserService(MainService):
                 f"Запись пользователя c {id=} принадлежит другому пользователю и не может быть удалена."  # noqa: E501
             )
 
-    async def update_user(self, id: int, current_user: User, **kwargs) -> User:
+    async def update_user(
+        self,
+        id: int,
+        current_user: User,
+        expected_versions: Optional[List[int]] = None,
+        **kwargs,
+    ) -> User:
+        """Обновляет пользователя одним условным UPDATE ... RETURNING.
+
+        Если передан expected_versions (из If-Match), версия проверяется в
+        WHERE, и из двух конкурентных изменений одной версии проходит
+        только первое. Версию увеличивает триггер users_increment_version.
+        Без изменяемых полей выполняется SELECT с теми же условиями, и
+        версия не меняется.
+        """
         session = self._get_async_session()
 
-        if (current_user.role == UserRoles.USER and id == current_user.id) or (
-            current_user.role == UserRoles.ADMIN
+        if not (
+            (current_user.role == UserRoles.USER and id == current_user.id)
+            or current_user.role == UserRoles.ADMIN
         ):
-            async with session() as db_session:
-                result = await db_session.execute(
-                    select(User).filter_by(id=id)
+            raise AuthorizationError(
+                f"Запись пользователя c {id=} принадлежит другому пользователю и не может быть обновлена."  # noqa: E501
+            )
+
+        values = {}
+
+        for key, value in kwargs.items():
+            if key == "password" and value:
+                value = await auth_service.get_password_hash_async(value)
+
+            if value:
+                values[key] = value
+
+        conditions = [User.id == id]
+
+        if expected_versions is not None:
+            conditions.append(User.version.in_(expected_versions))
+
+        if values:
+            query = (
+                update(User)
+                .where(*conditions)
+                .values(**values)
+                .returning(User)
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            query = select(User).where(*conditions)
+
+        async with session() as db_session:
+            result = await db_session.execute(query)
+            user = result.scalars().one_or_none()
+
+            if user is None:
+                version = await db_session.scalar(
+                    select(User.version).filter_by(id=id)
                 )
-                user = result.scalars().one_or_none()
 
-                if user is None:
+                if version is None:
                     logger.error(f"Пользователь c {id=} не найден.")
                     raise ValueError(f"Пользователь c {id=} не найден.")
 
-                for key, value in kwargs.items():
-                    if key == "password":
-                        value = (
-                            auth_service.get_password_hash(value)
-                            if value
-                            else value
-                        )
+                raise PreconditionFailedError(
+                    f"Пользователь c {id=} изменился, текущая версия "
+                    f"{version}. Получите запись заново."
+                )
 
-                    if value:
-                        setattr(user, key, value)
+            await db_session.commit()
 
-                await db_session.commit()
+        if values:
+            principal_cache.invalidate_user(id)
 
-                logger.info(f"Пользователь c {id=} успешно обновлен.")
+        logger.info(f"Пользователь c {id=} успешно обновлен.")
 
-                return user
-        else:
-            raise AuthorizationError(
-                f"Запись пользователя c {id=} принадлежит другому пользователю и не может быть обновлена."  # noqa: E501
-            )
+        return user
 
     async def get_users(
         self,
@@ -124,23 +180,11 @@ class UserService(MainService):
         sort_by: str,
         ascending: bool,
         filter: UserFilter,
+        profile: LoadingProfile = LoadingProfile.BARE,
     ) -> List[User]:
         session = self._get_async_session()
-        query = select(User)
-
-        if filter.email:
-            query = query.where(User.email.contains(filter.email))
-
-        if filter.first_name:
-            query = query.where(User.first_name.contains(filter.first_name))
-
-        if filter.last_name:
-            query = query.where(User.last_name.contains(filter.last_name))
-
-        if filter.created_at:
-            query = query.where(
-                func.date(User.created_at) == filter.created_at
-            )
+        query = apply_loading_profile(select(User), User, profile)
+        query = self._apply_filter(query, filter)
 
         async with session() as db_session:
             field = getattr(User, sort_by, None)
@@ -158,5 +202,26 @@ class UserService(MainService):
 
             return result.scalars().all()
 
+    def _apply_filter(self, query: Select, filter: UserFilter) -> Select:
+        if filter.email:
+            query = query.where(substring_condition(User.email, filter.email))
+
+        if filter.first_name:
+            query = query.where(
+                substring_condition(User.first_name, filter.first_name)
+            )
+
+        if filter.last_name:
+            query = query.where(
+                substring_condition(User.last_name, filter.last_name)
+            )
+
+        return query.where(
+            *on_date_conditions(User.created_at, filter.created_at),
+            *date_range_conditions(
+                User.created_at, filter.created_from, filter.created_to
+            ),
+        )
+
 
 user_service = UserService()
@@ -0,0 +1,141 @@
+"""Замер построения сводной таблицы для отчета: pandas против SQL.
+
+Скрипт создает в базе TEST_DATABASE_URL таблицы bench_users и bench_tasks
+и сравнивает два способа получить количество задач исполнителя по статусам:
+- прежний: строка на (исполнитель, статус) из GROUP BY, затем DataFrame,
+  склейка имени и pivot в pandas;
+- текущий: сводная таблица сразу из Postgres через count(*) FILTER.
+
+Для pandas отдельно показано время CPU-работы в процессе приложения,
+в сервисе она выполнялась бы в цикле событий.
+
+Запуск: python -m benchmarks.analytics_pivot --users 100000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+load_dotenv()
+
+STATUSES = ("To Do", "In Progress", "Done", "Cancelled")
+
+GROUP_BY_QUERY = text(
+    "SELECT u.first_name, u.last_name, t.status, count(t.id) AS count "
+    "FROM bench_tasks t JOIN bench_users u ON t.assignee_id = u.id "
+    "GROUP BY u.id, t.status"
+)
+PIVOT_QUERY = text(
+    "SELECT u.first_name || ' ' || u.last_name AS full_name, "
+    + ", ".join(
+        f"count(*) FILTER (WHERE t.status = '{status}') AS \"{status}\""
+        for status in STATUSES
+    )
+    + " FROM bench_tasks t JOIN bench_users u ON t.assignee_id = u.id "
+    "GROUP BY u.id ORDER BY full_name, u.id"
+)
+
+
+async def fill_tables(conn, users: int, tasks_per_user: int) -> None:
+    await conn.execute(text("DROP TABLE IF EXISTS bench_tasks, bench_users"))
+    await conn.execute(
+        text(
+            "CREATE TABLE bench_users (id serial PRIMARY KEY, "
+            "first_name varchar(100), last_name varchar(100))"
+        )
+    )
+    await conn.execute(
+        text(
+            "CREATE TABLE bench_tasks (id serial PRIMARY KEY, "
+            "assignee_id integer, status varchar(20))"
+        )
+    )
+    await conn.execute(
+        text(
+            "INSERT INTO bench_users (first_name, last_name) "
+            "SELECT 'Имя' || i, 'Фамилия' || i "
+            "FROM generate_series(1, :users) AS i"
+        ),
+        {"users": users},
+    )
+    await conn.execute(
+        text(
+            "INSERT INTO bench_tasks (assignee_id, status) "
+            "SELECT 1 + i % :users, "
+            "(ARRAY['To Do', 'In Progress', 'Done', 'Cancelled'])"
+            "[1 + (i / :users) % 4] "
+            "FROM generate_series(1, :rows) AS i"
+        ),
+        {"users": users, "rows": users * tasks_per_user},
+    )
+    await conn.execute(text("ANALYZE bench_users"))
+    await conn.execute(text("ANALYZE bench_tasks"))
+
+
+def pandas_pivot(rows) -> pd.DataFrame:
+    df_vis = pd.DataFrame(rows)
+    df_vis["full_name"] = df_vis["first_name"] + " " + df_vis["last_name"]
+
+    pivot_df = df_vis.pivot(
+        index="full_name", columns="status", values="count"
+    ).fillna(0)
+
+    return pivot_df[[col for col in STATUSES if col in pivot_df.columns]]
+
+
+async def measure(conn, repeats: int) -> dict:
+    samples = {"pandas": [], "pandas_cpu": [], "sql": []}
+
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        rows = (await conn.execute(GROUP_BY_QUERY)).all()
+        cpu_started_at = time.perf_counter()
+        pandas_pivot(rows)
+        finished_at = time.perf_counter()
+
+        samples["pandas"].append((finished_at - started_at) * 1000)
+        samples["pandas_cpu"].append((finished_at - cpu_started_at) * 1000)
+
+        started_at = time.perf_counter()
+        (await conn.execute(PIVOT_QUERY)).mappings().all()
+        samples["sql"].append((time.perf_counter() - started_at) * 1000)
+
+    return {
+        name: statistics.median(values) for name, values in samples.items()
+    }
+
+
+async def main(users: int, tasks_per_user: int, repeats: int) -> None:
+    engine = create_async_engine(os.getenv("TEST_DATABASE_URL"))
+
+    async with engine.begin() as conn:
+        await fill_tables(conn, users, tasks_per_user)
+        timings = await measure(conn, repeats)
+        await conn.execute(text("DROP TABLE bench_tasks, bench_users"))
+
+    await engine.dispose()
+
+    print(
+        f"Исполнителей: {users}, задач: {users * tasks_per_user}, "
+        f"медиана из {repeats} запусков, мс"
+    )
+    print(f"{'GROUP BY + pandas pivot':<28}{timings['pandas']:>10.0f}")
+    print(f"{'  из них pandas (CPU)':<28}{timings['pandas_cpu']:>10.0f}")
+    print(f"{'SQL count(*) FILTER':<28}{timings['sql']:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--tasks-per-user", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.users, args.tasks_per_user, args.repeats))
@@ -0,0 +1,131 @@
+"""Замер конкурентного разбора очереди задач с SKIP LOCKED и без него.
+
+Скрипт создает в базе TEST_DATABASE_URL отдельную таблицу bench_queue,
+заполняет ее задачами "To Do" и запускает --workers обработчиков, каждый
+из которых в цикле забирает по --batch задач тем же запросом, что и
+TaskService.claim_tasks. Сравниваются FOR UPDATE SKIP LOCKED и обычный
+FOR UPDATE, при котором обработчики ждут друг друга на блокировках.
+
+Запуск: python -m benchmarks.claim_queue --rows 20000 --workers 32
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+load_dotenv()
+
+CLAIM_QUERY = (
+    "UPDATE bench_queue SET status = 'In Progress', assignee_id = :worker "
+    "WHERE id IN (SELECT id FROM bench_queue WHERE status = 'To Do' "
+    "ORDER BY created_at, id LIMIT :batch FOR UPDATE {lock}) "
+    "RETURNING id"
+)
+
+
+async def fill_table(engine, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS bench_queue"))
+        await conn.execute(
+            text(
+                "CREATE TABLE bench_queue (id serial PRIMARY KEY, "
+                "status varchar(20), assignee_id integer, "
+                "created_at timestamp)"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO bench_queue (status, created_at) "
+                "SELECT 'To Do', localtimestamp + i * interval '1 second' "
+                "FROM generate_series(1, :rows) AS i"
+            ),
+            {"rows": rows},
+        )
+        await conn.execute(
+            text(
+                "CREATE INDEX bench_queue_to_do ON bench_queue "
+                "(created_at, id) WHERE status = 'To Do'"
+            )
+        )
+        await conn.execute(text("ANALYZE bench_queue"))
+
+
+async def remaining(engine) -> int:
+    async with engine.connect() as conn:
+        return await conn.scalar(
+            text("SELECT count(*) FROM bench_queue WHERE status = 'To Do'")
+        )
+
+
+async def worker(engine, query, worker_id: int, batch: int) -> list:
+    claimed = []
+
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                query, {"worker": worker_id, "batch": batch}
+            )
+            ids = result.scalars().all()
+
+        claimed.extend(ids)
+
+        # Без SKIP LOCKED запрос может вернуть пустой результат, пока
+        # в очереди еще есть задачи: строки перехватил другой обработчик
+        if not ids and not await remaining(engine):
+            return claimed
+
+
+async def run(engine, lock: str, workers: int, batch: int) -> tuple:
+    query = text(CLAIM_QUERY.format(lock=lock))
+
+    started_at = time.perf_counter()
+    results = await asyncio.gather(
+        *(worker(engine, query, id, batch) for id in range(1, workers + 1))
+    )
+    elapsed = time.perf_counter() - started_at
+
+    claimed = [id for ids in results for id in ids]
+
+    return elapsed, len(claimed), len(claimed) - len(set(claimed))
+
+
+async def main(rows: int, workers: int, batch: int) -> None:
+    engine = create_async_engine(
+        os.getenv("TEST_DATABASE_URL"),
+        pool_size=workers,
+        max_overflow=workers,
+    )
+    timings = {}
+
+    for name, lock in (("SKIP LOCKED", "SKIP LOCKED"), ("FOR UPDATE", "")):
+        await fill_table(engine, rows)
+        timings[name] = await run(engine, lock, workers, batch)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE bench_queue"))
+
+    await engine.dispose()
+
+    print(f"Задач: {rows}, обработчиков: {workers}, пачка: {batch}")
+    print(f"{'Режим':<14}{'сек':>10}{'задач/сек':>12}{'дубли':>8}")
+
+    for name, (elapsed, claimed, duplicates) in timings.items():
+        print(
+            f"{name:<14}{elapsed:>10.2f}{claimed / elapsed:>12.0f}"
+            f"{duplicates:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--batch", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.workers, args.batch))
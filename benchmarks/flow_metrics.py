@@ -0,0 +1,125 @@
+"""Замер расчета lead time и cycle time на большом числе задач.
+
+Скрипт создает рядом с базой TEST_DATABASE_URL отдельную базу
+bench_flow_metrics, заполняет ее выполненными задачами и вызывает
+AnalyticsService.get_flow_metrics. Печатает время расчета и пиковое
+потребление памяти процессом, которое не должно расти с числом задач.
+
+Запуск: python -m benchmarks.flow_metrics --tasks 10000000 --users 1000
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.models import Base
+from app.db.session import db_registry
+from app.schemes.analytics import FlowMetricsFilter
+from app.services.analytics import analytics_service
+
+load_dotenv()
+
+DATABASE = "bench_flow_metrics"
+
+
+async def recreate_database(url) -> None:
+    engine = create_async_engine(
+        url.set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+
+    async with engine.connect() as conn:
+        await conn.execute(text(f"DROP DATABASE IF EXISTS {DATABASE}"))
+        await conn.execute(text(f"CREATE DATABASE {DATABASE}"))
+
+    await engine.dispose()
+
+
+async def drop_database(url) -> None:
+    engine = create_async_engine(
+        url.set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+
+    async with engine.connect() as conn:
+        await conn.execute(text(f"DROP DATABASE {DATABASE}"))
+
+    await engine.dispose()
+
+
+async def fill_tables(url, tasks: int, users: int) -> None:
+    engine = create_async_engine(url)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            text(
+                "INSERT INTO users (email, first_name, last_name) "
+                "SELECT 'user' || i || '@example.com', 'Имя', 'Фамилия' "
+                "FROM generate_series(1, :users) AS i"
+            ),
+            {"users": users},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO tasks (title, assignee_id, status, created_at, "
+                "started_work_at, closed_at) "
+                "SELECT 'Задача ' || i, 1 + i % :users, 'Done', "
+                "created_at, created_at + random() * interval '3 days', "
+                "created_at + interval '3 days' "
+                "+ random() * random() * interval '60 days' "
+                "FROM generate_series(1, :tasks) AS i, "
+                "LATERAL (SELECT timestamp '2025-01-01' "
+                "+ (i % 365) * interval '1 day' AS created_at) AS t"
+            ),
+            {"users": users, "tasks": tasks},
+        )
+
+    await engine.dispose()
+
+
+async def main(tasks: int, users: int) -> None:
+    url = make_url(os.getenv("TEST_DATABASE_URL")).set(database=DATABASE)
+
+    await recreate_database(url)
+
+    try:
+        await fill_tables(url, tasks, users)
+
+        db_registry.init(url)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started_at = time.perf_counter()
+        metrics = await analytics_service.get_flow_metrics(FlowMetricsFilter())
+        elapsed = time.perf_counter() - started_at
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        await db_registry.dispose()
+    finally:
+        await drop_database(url)
+
+    overall = metrics["overall"]
+    print(f"Задач: {tasks}, исполнителей: {users}")
+    print(f"Время расчета: {elapsed:.1f} с")
+    print(
+        f"Пиковая память процесса: {rss_before / 1024:.0f} МБ до расчета, "
+        f"{rss_after / 1024:.0f} МБ после"
+    )
+    print(
+        "Lead time, ч: "
+        + ", ".join(
+            f"{name}={overall['lead_time'][name]}"
+            for name in ("p50", "p85", "p95")
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.tasks, args.users))
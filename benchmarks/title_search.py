@@ -0,0 +1,107 @@
+"""Замер поиска задач по подстроке в названии до и после индекса pg_trgm.
+
+Скрипт создает в базе TEST_DATABASE_URL отдельную таблицу bench_tasks,
+заполняет ее и сравнивает время запроса ILIKE '%...%' без индекса и с
+GIN-индексом gin_trgm_ops. Запрос считает все совпадения без LIMIT:
+с LIMIT seq scan по частому слову останавливается почти сразу и не
+показывает цену поиска. Большинство образцов выбирают единицы строк из
+миллионов, последний - частое слово для сравнения.
+
+Запуск: python -m benchmarks.title_search --rows 5000000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+load_dotenv()
+
+# Названия - "<действие> <номер строки>", см. fill_table
+SEARCH_TERMS = ("отчет 123456", "БАГ 98765", "релиз 4242", "миграци")
+
+
+async def fill_table(conn, rows: int) -> None:
+    await conn.execute(text("DROP TABLE IF EXISTS bench_tasks"))
+    await conn.execute(
+        text("CREATE TABLE bench_tasks (id serial PRIMARY KEY, title text)")
+    )
+    await conn.execute(
+        text(
+            "INSERT INTO bench_tasks (title) "
+            "SELECT (ARRAY['Подготовить отчет', 'Исправить баг', "
+            "'Провести миграцию', 'Собрать релиз'])[1 + i % 4] "
+            "|| ' ' || i "
+            "FROM generate_series(1, :rows) AS i"
+        ),
+        {"rows": rows},
+    )
+    await conn.execute(text("ANALYZE bench_tasks"))
+
+
+async def measure(conn, repeats: int) -> dict:
+    """Медиана времени запроса и число совпадений для каждого образца."""
+    timings = {}
+
+    for term in SEARCH_TERMS:
+        samples = []
+
+        for _ in range(repeats):
+            started_at = time.perf_counter()
+            matches = (
+                await conn.execute(
+                    text(
+                        "SELECT count(*) FROM bench_tasks "
+                        "WHERE title ILIKE :pattern"
+                    ),
+                    {"pattern": f"%{term}%"},
+                )
+            ).scalar_one()
+            samples.append((time.perf_counter() - started_at) * 1000)
+
+        timings[term] = (statistics.median(samples), matches)
+
+    return timings
+
+
+async def main(rows: int, repeats: int) -> None:
+    engine = create_async_engine(os.getenv("TEST_DATABASE_URL"))
+
+    async with engine.begin() as conn:
+        await fill_table(conn, rows)
+        before = await measure(conn, repeats)
+
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(
+            text(
+                "CREATE INDEX bench_tasks_title_trgm ON bench_tasks "
+                "USING gin (title gin_trgm_ops)"
+            )
+        )
+        await conn.execute(text("ANALYZE bench_tasks"))
+        after = await measure(conn, repeats)
+
+        await conn.execute(text("DROP TABLE bench_tasks"))
+
+    await engine.dispose()
+
+    print(f"Строк: {rows}, медиана из {repeats} запусков, мс")
+    print(f"{'Запрос':<16}{'строк':>10}{'без индекса':>14}{'pg_trgm':>14}")
+
+    for term in SEARCH_TERMS:
+        (before_ms, matches), (after_ms, _) = before[term], after[term]
+        print(f"{term:<16}{matches:>10}{before_ms:>14.2f}{after_ms:>14.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.repeats))
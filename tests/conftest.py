@@ -3,12 +3,17 @@ import os
 import pytest_asyncio
 from dotenv import load_dotenv
 from faker import Faker
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from starlette.testclient import TestClient
 
 from app.db.models import Base, Task, User
+from app.db.session import db_registry
 from app.main import app
+from app.security.cache import principal_cache
+from app.services.report_cache import forecast_cache, report_cache
 
 load_dotenv()
 
@@ -53,11 +58,26 @@ async def db_session(test_engine):
     session.close()
 
 
-@pytest_asyncio.fixture(scope="session")
+@pytest_asyncio.fixture(scope="function", autouse=True)
+async def reset_db_registry():
+    """Пул соединений и кэши живут в пределах одного теста"""
+
+    yield
+
+    await db_registry.dispose()
+    principal_cache.clear()
+    report_cache.clear()
+    forecast_cache.clear()
+
+
+@pytest_asyncio.fixture(scope="function")
 def app_client():
     with TestClient(app) as client:
         yield client
 
+    # Подмененный пользователь не должен переходить в следующий тест
+    app.dependency_overrides.clear()
+
 
 @pytest_asyncio.fixture(scope="function")
 async def user_data_generator(faker):
@@ -168,3 +188,21 @@ async def create_multiple_task(db_session, task_data_generator):
         return tasks
 
     return _create_multiple_posts
+
+
+@pytest_asyncio.fixture(scope="function")
+async def explain_query():
+    """План запроса с запретом seq scan, чтобы проверить выбор индекса"""
+
+    async def _explain_query(session, query):
+        compiled = query.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True},
+        )
+
+        await session.execute(text("SET enable_seqscan = off"))
+        result = await session.execute(text(f"EXPLAIN {compiled}"))
+
+        return "\n".join(result.scalars().all())
+
+    return _explain_query
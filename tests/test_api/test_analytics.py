@@ -1,6 +1,25 @@
+import datetime
+import gzip
 from http import HTTPStatus
 
 import pytest
+import pytest_asyncio
+from sqlalchemy import update
+
+from app.core.settings import settings
+from app.db.models import Task, UserRoles
+from app.security.auth import auth_service
+
+
+@pytest_asyncio.fixture(scope="function")
+async def login_as_admin(app_client, create_user):
+    """Запросы app_client выполняются от имени администратора"""
+    admin = await create_user(role=UserRoles.ADMIN.value)
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: admin
+    )
+
+    return admin
 
 
 @pytest.mark.parametrize(
@@ -40,3 +59,325 @@ async def test_reports(
 
     assert response.status_code == expected_status
     assert expected_result in result
+
+
+@pytest.mark.asyncio
+async def test_report_loads_plotly_once_from_app(
+    app_client, create_user, create_multiple_task
+):
+    user = await create_user()
+    await create_multiple_task(2, assignee_id=user.id)
+
+    report = app_client.get("/api/v1/analytics/reports").text
+
+    assert report.count("<script src=") == 1
+    assert "cdn.plot.ly" not in report
+
+    bundle_url = report.split('<script src="')[1].split('"')[0]
+    response = app_client.get(bundle_url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert "plotly" in response.text[:1000].lower()
+
+
+@pytest.fixture
+def assets_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "analytics_assets_dir", tmp_path)
+    (tmp_path / "bundle.js").write_text("var bundle = 1;")
+    (tmp_path / "bundle.js.gz").write_bytes(gzip.compress(b"var bundle = 1;"))
+
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected_encoding",
+    [
+        ("gzip, deflate, br", "gzip"),
+        ("br;q=1.0, *;q=0.5", "gzip"),
+        ("gzip;q=0, *", None),
+        ("identity", None),
+    ],
+    ids=[
+        "succeed get asset: gzip",
+        "succeed get asset: gzip by wildcard",
+        "succeed get asset: gzip refused",
+        "succeed get asset: identity",
+    ],
+)
+def test_static_asset(
+    app_client, assets_dir, accept_encoding, expected_encoding
+):
+    url = "/api/v1/analytics/assets/bundle.js"
+    response = app_client.get(
+        url, headers={"Accept-Encoding": accept_encoding}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.text == "var bundle = 1;"
+    assert response.headers.get("content-encoding") == expected_encoding
+    assert "immutable" in response.headers["cache-control"]
+    assert "Accept-Encoding" in response.headers["vary"]
+
+    etag = response.headers["etag"]
+    response = app_client.get(
+        url,
+        headers={
+            "Accept-Encoding": accept_encoding,
+            "If-None-Match": f'"other", W/{etag}',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["missing.js", "bundle.js.gz", "..%2F.env", ".hidden.js"],
+)
+def test_static_asset_not_found(app_client, assets_dir, name):
+    (assets_dir / ".hidden.js").write_text("")
+
+    response = app_client.get(f"/api/v1/analytics/assets/{name}")
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    "accept, expected_status, expected_media_type",
+    [
+        (None, HTTPStatus.OK, "application/json"),
+        ("*/*", HTTPStatus.OK, "application/json"),
+        ("application/json", HTTPStatus.OK, "application/json"),
+        ("text/csv", HTTPStatus.OK, "text/csv; charset=utf-8"),
+        (
+            "application/json;q=0.5, text/csv",
+            HTTPStatus.OK,
+            "text/csv; charset=utf-8",
+        ),
+        ("text/html", HTTPStatus.NOT_ACCEPTABLE, None),
+    ],
+    ids=[
+        "succeed get distribution: without accept",
+        "succeed get distribution: any format",
+        "succeed get distribution: json",
+        "succeed get distribution: csv",
+        "succeed get distribution: csv by quality",
+        "failed get distribution: unsupported format",
+    ],
+)
+@pytest.mark.asyncio
+async def test_status_distribution(
+    app_client,
+    test_engine,
+    login_as_admin,
+    create_user,
+    create_multiple_task,
+    accept,
+    expected_status,
+    expected_media_type,
+):
+    user = await create_user(first_name="Анна", last_name="Иванова")
+    await create_multiple_task(2, assignee_id=user.id)
+    headers = {"Accept": accept} if accept else {}
+
+    response = app_client.get(
+        "/api/v1/analytics/status-distribution", headers=headers
+    )
+
+    assert response.status_code == expected_status
+
+    if expected_status != HTTPStatus.OK:
+        return
+
+    assert response.headers["content-type"] == expected_media_type
+
+    if expected_media_type == "application/json":
+        assert response.json() == [
+            {
+                "assignee_id": user.id,
+                "full_name": "Анна Иванова",
+                "to_do": 2,
+                "in_progress": 0,
+                "done": 0,
+                "cancelled": 0,
+            }
+        ]
+    else:
+        assert response.text.splitlines() == [
+            "assignee_id,full_name,to_do,in_progress,done,cancelled",
+            f"{user.id},Анна Иванова,2,0,0,0",
+        ]
+
+
+@pytest.mark.asyncio
+async def test_status_distribution_in_arrow(
+    app_client, test_engine, login_as_admin, create_user, create_multiple_task
+):
+    pa = pytest.importorskip("pyarrow")
+    user = await create_user()
+    await create_multiple_task(2, assignee_id=user.id)
+
+    response = app_client.get(
+        "/api/v1/analytics/status-distribution",
+        headers={"Accept": "application/vnd.apache.arrow.stream"},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+    table = pa.ipc.open_stream(response.content).read_all()
+
+    assert table.to_pylist()[0]["to_do"] == 2
+
+
+@pytest.mark.asyncio
+async def test_status_distribution_pagination(
+    app_client, test_engine, login_as_admin, create_user, create_multiple_task
+):
+    users = [await create_user() for _ in range(3)]
+
+    for user in users:
+        await create_multiple_task(1, assignee_id=user.id)
+
+    first_page = app_client.get(
+        "/api/v1/analytics/status-distribution", params={"limit": 2}
+    ).json()
+    second_page = app_client.get(
+        "/api/v1/analytics/status-distribution",
+        params={"limit": 2, "after_id": first_page[-1]["assignee_id"]},
+    ).json()
+
+    assert [row["assignee_id"] for row in first_page + second_page] == [
+        user.id for user in users
+    ]
+
+
+@pytest.mark.asyncio
+async def test_status_distribution_with_filters(
+    app_client, test_engine, login_as_admin, create_user, create_multiple_task
+):
+    users = [await create_user() for _ in range(3)]
+
+    for user in users:
+        await create_multiple_task(1, assignee_id=user.id)
+
+    response = app_client.get(
+        "/api/v1/analytics/status-distribution",
+        params={
+            "assignee_id": [users[0].id, users[2].id],
+            "created_from": "2000-01-01",
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [row["assignee_id"] for row in response.json()] == [
+        users[0].id,
+        users[2].id,
+    ]
+
+
+@pytest.mark.parametrize(
+    "role, expected_status",
+    [
+        (None, HTTPStatus.UNAUTHORIZED),
+        (UserRoles.USER.value, HTTPStatus.FORBIDDEN),
+    ],
+    ids=["failed: not authenticated", "failed: not admin"],
+)
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/v1/analytics/status-distribution",
+        "/api/v1/analytics/flow-metrics",
+        "/api/v1/analytics/forecast",
+    ],
+)
+@pytest.mark.asyncio
+async def test_analytics_requires_admin(
+    app_client, test_engine, create_user, url, role, expected_status
+):
+    if role is not None:
+        user = await create_user(role=role)
+        app_client.app.dependency_overrides[auth_service.get_current_user] = (
+            lambda: user
+        )
+
+    response = app_client.get(url)
+
+    assert response.status_code == expected_status
+
+
+@pytest.mark.asyncio
+async def test_flow_metrics(
+    app_client, test_engine, login_as_admin, create_user, create_multiple_task
+):
+    user = await create_user()
+    tasks = await create_multiple_task(2, assignee_id=user.id)
+
+    async with test_engine.begin() as connection:
+        await connection.execute(
+            update(Task)
+            .where(Task.id == tasks[0].id)
+            .values(status="In Progress")
+        )
+        await connection.execute(
+            update(Task).where(Task.id == tasks[0].id).values(status="Done")
+        )
+
+    response = app_client.get(
+        "/api/v1/analytics/flow-metrics", params={"assignee_id": [user.id]}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+    result = response.json()
+    assert result["overall"]["lead_time"]["count"] == 1
+    assert result["overall"]["cycle_time"]["count"] == 1
+    assert [row["assignee_id"] for row in result["users"]] == [user.id]
+
+
+@pytest.mark.asyncio
+async def test_delivery_forecast(
+    app_client, test_engine, login_as_admin, create_user, create_multiple_task
+):
+    user = await create_user()
+    tasks = await create_multiple_task(3, assignee_id=user.id)
+
+    response = app_client.get(
+        "/api/v1/analytics/forecast", params={"assignee_id": user.id}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    async with test_engine.begin() as connection:
+        await connection.execute(
+            update(Task).where(Task.id == tasks[0].id).values(status="Done")
+        )
+        # Триггер ставит closed_at текущим временем, а история - до вчера
+        await connection.execute(
+            update(Task)
+            .where(Task.id == tasks[0].id)
+            .values(closed_at=Task.closed_at - datetime.timedelta(days=1))
+        )
+
+    response = app_client.get(
+        "/api/v1/analytics/forecast",
+        params={
+            "assignee_id": user.id,
+            "history_to": str(datetime.date.today()),
+        },
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    response = app_client.get(
+        "/api/v1/analytics/forecast", params={"assignee_id": user.id}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+    result = response.json()
+    assert result["remaining"] == 2
+    assert result["trials"] > 0
+    assert {"p50", "p85", "p95", "horizon"} <= result.keys()
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+# Бюджет холодного импорта app.main, мс. На медленных машинах CI можно
+# поднять через переменную окружения
+IMPORT_TIME_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+# Загружаются только при первом построении отчета или расчете метрик
+HEAVY_MODULES = ("numpy", "pandas", "plotly")
+
+
+def get_import_times(module: str) -> dict:
+    """Накопленное время импорта каждого модуля по python -X importtime, мкс"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+def test_main_does_not_import_heavy_modules():
+    imported = get_import_times("app.main")
+
+    assert not [
+        name for name in imported if name.split(".")[0] in HEAVY_MODULES
+    ]
+
+
+def test_main_import_time_budget():
+    # Лучший из трех запусков, чтобы не ловить случайные задержки
+    import_time_ms = (
+        min(get_import_times("app.main")["app.main"] for _ in range(3)) / 1000
+    )
+
+    assert import_time_ms < IMPORT_TIME_BUDGET_MS
@@ -177,10 +177,32 @@ async def test_get_task(
 
         assert expected_created_at.date() == result_created_at.date()
         assert expected_updated_at.date() == result_updated_at.date()
+        assert result.pop("assignee")["id"] == result["assignee_id"]
 
     assert result == expected_result
 
 
+@pytest.mark.asyncio
+async def test_get_task_with_assignee(
+    app_client, test_engine, create_user, create_task
+):
+    user = await create_user()
+    await create_task(assignee_id=user.id)
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+
+    response = app_client.get("/api/v1/tasks/1")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["assignee"] == {
+        "id": user.id,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+    }
+
+
 @pytest.mark.parametrize(
     "query_data, current_user_role, expected_status, expected_result",
     [
@@ -623,3 +645,424 @@ async def test_get_tasks(
     if expected_last_user_id is not None:
         last_user = result[-1]
         assert last_user.get("id") == expected_last_user_id
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_with_cursor(
+    app_client,
+    test_engine,
+    create_multiple_task,
+    create_user,
+):
+    user = await create_user()
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+    await create_multiple_task(5, assignee_id=user.id)
+
+    first_page = app_client.get("/api/v1/tasks/?limit=3")
+    cursor = first_page.headers["X-Next-Cursor"]
+    second_page = app_client.get(f"/api/v1/tasks/?limit=3&cursor={cursor}")
+
+    assert [task["id"] for task in first_page.json()] == [1, 2, 3]
+    assert [task["id"] for task in second_page.json()] == [4, 5]
+    assert "X-Next-Cursor" not in second_page.headers
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/v1/tasks/?cursor=bad",
+        "/api/v1/tasks/?cursor=eyJzIjoiaWQiLCJhIjp0cnVlLCJ2IjoxLCJpZCI6MX0&skip=1",  # noqa: E501
+    ],
+    ids=["invalid cursor", "cursor with skip"],
+)
+@pytest.mark.asyncio
+async def test_get_tasks_with_bad_cursor(
+    app_client, test_engine, create_user, url
+):
+    user = await create_user()
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+
+    response = app_client.get(url)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_search_tasks(app_client, test_engine, db_session, create_user):
+    user = await create_user()
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(title="Релиз версии", assignee_id=user.id),
+                Task(title="Другая задача", assignee_id=user.id),
+            ]
+        )
+        await session.commit()
+
+    response = app_client.get("/api/v1/tasks/search?q=релиз")
+
+    assert response.status_code == HTTPStatus.OK
+    assert [task["title"] for task in response.json()] == ["Релиз версии"]
+
+
+@pytest.mark.parametrize(
+    "content, content_type",
+    [
+        (
+            '[{"title": "Задача 1"}, {"title": ""}, {"title": "Задача 2"}]',
+            "application/json",
+        ),
+        (
+            '{"title": "Задача 1"}\n{"title": ""}\n\n{"title": "Задача 2"}\n',
+            "application/x-ndjson",
+        ),
+    ],
+    ids=["json array", "ndjson"],
+)
+@pytest.mark.asyncio
+async def test_create_tasks_bulk(
+    app_client, test_engine, create_user, content, content_type
+):
+    user = await create_user()
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+
+    response = app_client.post(
+        "/api/v1/tasks/bulk",
+        content=content.encode(),
+        headers={"Content-Type": content_type},
+    )
+    result = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert result["created"] == 2
+    assert result["failed"] == 1
+    assert [item["id"] for item in result["items"]] == [1, None, 2]
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_bulk_with_not_array(
+    app_client, test_engine, create_user
+):
+    user = await create_user()
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+
+    response = app_client.post("/api/v1/tasks/bulk", json={"title": "Задача"})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    "query_data, expected_status",
+    [
+        ({"ids": [1], "status": "In Progress"}, HTTPStatus.OK),
+        ({"status": "In Progress"}, HTTPStatus.UNPROCESSABLE_ENTITY),
+        ({"ids": [1]}, HTTPStatus.UNPROCESSABLE_ENTITY),
+        ({"ids": [1], "assignee_id": 100}, HTTPStatus.BAD_REQUEST),
+    ],
+    ids=[
+        "succeed bulk update",
+        "failed bulk update: without ids and filter",
+        "failed bulk update: nothing to change",
+        "failed bulk update: assignee not found",
+    ],
+)
+@pytest.mark.asyncio
+async def test_update_tasks_bulk(
+    app_client,
+    test_engine,
+    create_user,
+    create_task,
+    query_data,
+    expected_status,
+):
+    user = await create_user()
+    await create_task(assignee_id=user.id)
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+
+    response = app_client.patch("/api/v1/tasks/bulk", json=query_data)
+
+    assert response.status_code == expected_status
+
+    if expected_status == HTTPStatus.OK:
+        assert response.json() == {
+            "changed": [1],
+            "skipped": [],
+            "not_found": [],
+            "rejected": [],
+        }
+
+
+@pytest.mark.parametrize(
+    "limit, expected_status, expected_count",
+    [
+        (2, HTTPStatus.OK, 2),
+        (10, HTTPStatus.OK, 3),
+        (0, HTTPStatus.UNPROCESSABLE_ENTITY, None),
+        (101, HTTPStatus.UNPROCESSABLE_ENTITY, None),
+    ],
+    ids=[
+        "succeed claim tasks",
+        "succeed claim tasks: less than limit in queue",
+        "failed claim tasks: limit too small",
+        "failed claim tasks: limit too big",
+    ],
+)
+@pytest.mark.asyncio
+async def test_claim_tasks(
+    app_client,
+    test_engine,
+    create_user,
+    create_multiple_task,
+    limit,
+    expected_status,
+    expected_count,
+):
+    user = await create_user()
+    await create_multiple_task(3, assignee_id=user.id)
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+
+    response = app_client.post("/api/v1/tasks/claim", params={"limit": limit})
+
+    assert response.status_code == expected_status
+
+    if expected_status == HTTPStatus.OK:
+        tasks = response.json()
+        assert len(tasks) == expected_count
+        assert all(task["status"] == "In Progress" for task in tasks)
+
+
+@pytest.mark.asyncio
+async def test_get_task_not_modified(app_client, create_user, create_task):
+    user = await create_user()
+    task = await create_task(assignee_id=user.id)
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+    url = f"/api/v1/tasks/{task.id}"
+
+    response = app_client.get(url)
+    etag = response.headers["ETag"]
+
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = app_client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    app_client.patch(url, json={"title": "Новое название"})
+    response = app_client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["title"] == "Новое название"
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_not_modified(
+    app_client, create_user, create_multiple_task
+):
+    user = await create_user()
+    tasks = await create_multiple_task(3, assignee_id=user.id)
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+    url = "/api/v1/tasks/?limit=2"
+
+    response = app_client.get(url)
+    etag = response.headers["ETag"]
+    response = app_client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.content == b""
+
+    # Другая страница - другой ETag
+    response = app_client.get(
+        "/api/v1/tasks/?limit=1", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+    app_client.delete(f"/api/v1/tasks/{tasks[-1].id}")
+    response = app_client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize(
+    "params", [{"sort_by": "unknown"}, {"cursor": "not-a-cursor"}]
+)
+@pytest.mark.asyncio
+async def test_get_tasks_invalid_params_with_if_none_match(
+    app_client, create_user, params
+):
+    user = await create_user()
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+
+    response = app_client.get(
+        "/api/v1/tasks/", params=params, headers={"If-None-Match": "*"}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    "if_match, expected_status",
+    [
+        (None, HTTPStatus.OK),
+        ("*", HTTPStatus.OK),
+        ('"v1"', HTTPStatus.OK),
+        ('"v7", "v1"', HTTPStatus.OK),
+        ('"v2"', HTTPStatus.PRECONDITION_FAILED),
+        ('W/"v1"', HTTPStatus.PRECONDITION_FAILED),
+        ('"garbage"', HTTPStatus.PRECONDITION_FAILED),
+    ],
+    ids=[
+        "succeed update task: without if-match",
+        "succeed update task: any version",
+        "succeed update task: current version",
+        "succeed update task: one of versions",
+        "failed update task: stale version",
+        "failed update task: weak etag",
+        "failed update task: foreign etag",
+    ],
+)
+@pytest.mark.asyncio
+async def test_update_task_if_match(
+    app_client, create_user, create_task, if_match, expected_status
+):
+    user = await create_user()
+    task = await create_task(assignee_id=user.id)
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+    url = f"/api/v1/tasks/{task.id}"
+    headers = {"If-Match": if_match} if if_match else {}
+
+    assert app_client.get(url).headers["ETag"] == '"v1"'
+
+    response = app_client.patch(url, json={"title": "Новое"}, headers=headers)
+
+    assert response.status_code == expected_status
+
+    if expected_status == HTTPStatus.OK:
+        assert response.headers["ETag"] == '"v2"'
+        assert app_client.get(url).headers["ETag"] == '"v2"'
+    else:
+        assert "версия 1" in response.json()["detail"]
+        assert app_client.get(url).json()["title"] == task.title
+
+
+@pytest.mark.asyncio
+async def test_update_task_without_changes(
+    app_client, create_user, create_task
+):
+    user = await create_user()
+    other_user = await create_user()
+    task = await create_task(assignee_id=user.id)
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+    url = f"/api/v1/tasks/{task.id}"
+    before = app_client.get(url).json()
+
+    response = app_client.patch(url, json={}, headers={"If-Match": '"v1"'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["ETag"] == '"v1"'
+    assert app_client.get(url).json()["updated_at"] == before["updated_at"]
+
+    response = app_client.patch(url, json={}, headers={"If-Match": '"v2"'})
+
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: other_user
+    )
+    response = app_client.patch(url, json={})
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_get_task_changes(app_client, create_user, create_multiple_task):
+    user = await create_user()
+    other_user = await create_user()
+    tasks = await create_multiple_task(3, assignee_id=user.id)
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+    url = "/api/v1/tasks/changes"
+
+    response = app_client.get(url)
+    changes = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert [task["id"] for task in changes["tasks"]] == [
+        task.id for task in tasks
+    ]
+    assert changes["deleted"] == []
+    assert changes["has_more"] is False
+
+    since = changes["next_cursor"]
+    app_client.patch(f"/api/v1/tasks/{tasks[0].id}", json={"title": "Новое"})
+    app_client.delete(f"/api/v1/tasks/{tasks[1].id}")
+    app_client.patch(
+        f"/api/v1/tasks/{tasks[2].id}", json={"assignee_id": other_user.id}
+    )
+
+    changes = app_client.get(url, params={"since": since}).json()
+
+    assert [task["title"] for task in changes["tasks"]] == ["Новое"]
+    assert changes["deleted"] == [
+        {"id": tasks[1].id, "reason": "deleted"},
+        {"id": tasks[2].id, "reason": "reassigned"},
+    ]
+
+    changes = app_client.get(
+        url, params={"since": changes["next_cursor"]}
+    ).json()
+
+    assert changes["tasks"] == changes["deleted"] == []
+
+
+@pytest.mark.parametrize(
+    "params, expected_status",
+    [
+        ({"since": "garbage"}, HTTPStatus.BAD_REQUEST),
+        ({"limit": 0}, HTTPStatus.UNPROCESSABLE_ENTITY),
+    ],
+    ids=["invalid cursor", "invalid limit"],
+)
+@pytest.mark.asyncio
+async def test_get_task_changes_with_invalid_params(
+    app_client, create_user, params, expected_status
+):
+    user = await create_user()
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: user
+    )
+
+    response = app_client.get("/api/v1/tasks/changes", params=params)
+
+    assert response.status_code == expected_status
@@ -396,6 +396,7 @@ async def test_create_user_with_same_email(
                 "is_active": True,
                 "last_name": "Ягунов",
                 "role": "USER",
+                "open_tasks_count": 0,
             },
         ),
         (
@@ -460,6 +461,25 @@ async def test_get_user(
     assert result == expected_result
 
 
+@pytest.mark.asyncio
+async def test_get_user_with_open_tasks_count(
+    app_client, test_engine, create_user, create_task
+):
+    admin = await create_user(role=UserRoles.ADMIN.value)
+    user = await create_user()
+    await create_task(assignee_id=user.id, status="To Do")
+    await create_task(assignee_id=user.id, status="In Progress")
+    await create_task(assignee_id=user.id, status="Done")
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: admin
+    )
+
+    response = app_client.get(f"/api/v1/users/{user.id}")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["open_tasks_count"] == 2
+
+
 @pytest.mark.parametrize(
     "query_data, current_user_role, expected_status, expected_result",
     [
@@ -978,3 +998,46 @@ async def test_get_users(
     if expected_last_user_id is not None:
         last_user = result[-1]
         assert last_user.get("id") == expected_last_user_id
+
+
+@pytest.mark.asyncio
+async def test_update_user_if_match(app_client, create_user):
+    admin = await create_user(role=UserRoles.ADMIN.value)
+    user = await create_user()
+    app_client.app.dependency_overrides[auth_service.get_current_user] = (
+        lambda: admin
+    )
+    url = f"/api/v1/users/{user.id}"
+    etag = app_client.get(url).headers["ETag"]
+
+    response = app_client.patch(
+        url, json={"first_name": "Анна"}, headers={"If-Match": etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["first_name"] == "Анна"
+    assert response.headers["ETag"] != etag
+
+    response = app_client.patch(
+        url, json={"first_name": "Мария"}, headers={"If-Match": etag}
+    )
+
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+    assert app_client.get(url).json()["first_name"] == "Анна"
+
+    # Пустой PATCH не меняет версию, но проверяет If-Match
+    etag = app_client.get(url).headers["ETag"]
+    response = app_client.patch(url, json={}, headers={"If-Match": etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["ETag"] == etag
+
+    response = app_client.patch(url, json={}, headers={"If-Match": '"v1"'})
+
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+
+    response = app_client.patch(
+        "/api/v1/users/100", json={"first_name": "Мария"}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
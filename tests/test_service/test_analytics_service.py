@@ -0,0 +1,648 @@
+import asyncio
+import datetime
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import delete, func, select, text, update
+
+from app.commands.check_status_counts import compact as compact_status_counts
+from app.commands.check_status_counts import main as check_status_counts
+from app.core.settings import settings
+from app.db.models import Task, TaskStatusCount
+from app.schemes.analytics import (
+    DeliveryForecastFilter,
+    FlowMetricsFilter,
+    StatusDistributionFilter,
+)
+from app.schemes.task import BulkUpdateTasks, CreateTask
+from app.services.analytics import AnalyticsService
+from app.services.report_cache import forecast_cache, report_cache
+from app.services.task import TaskService
+
+
+async def _iterate(raw_tasks):
+    for index, raw_task in enumerate(raw_tasks):
+        yield index, raw_task
+
+
+async def get_status_counts(session) -> dict:
+    """Суммы дельт task_status_counts без нулевых"""
+    total = func.sum(TaskStatusCount.count)
+    result = await session.execute(
+        select(TaskStatusCount.assignee_id, TaskStatusCount.status, total)
+        .group_by(TaskStatusCount.assignee_id, TaskStatusCount.status)
+        .having(total != 0)
+    )
+
+    return {
+        (assignee_id, status): count for assignee_id, status, count in result
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_status_distribution(db_session, create_user):
+    first_user = await create_user(first_name="Анна", last_name="Иванова")
+    second_user = await create_user(first_name="Борис", last_name="Петров")
+    await create_user(first_name="Без", last_name="Задач")
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(title="1", assignee_id=first_user.id, status="To Do"),
+                Task(title="2", assignee_id=first_user.id, status="To Do"),
+                Task(title="3", assignee_id=first_user.id, status="Done"),
+                Task(
+                    title="4", assignee_id=second_user.id, status="Cancelled"
+                ),
+                Task(title="5", assignee_id=None, status="To Do"),
+            ]
+        )
+        await session.commit()
+
+    distribution = await AnalyticsService().get_status_distribution()
+
+    assert distribution == [
+        {
+            "assignee_id": first_user.id,
+            "full_name": "Анна Иванова",
+            "to_do": 2,
+            "in_progress": 0,
+            "done": 1,
+            "cancelled": 0,
+        },
+        {
+            "assignee_id": second_user.id,
+            "full_name": "Борис Петров",
+            "to_do": 0,
+            "in_progress": 0,
+            "done": 0,
+            "cancelled": 1,
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_visualization_data_without_tasks(db_session):
+    assert await AnalyticsService().get_visualization_data() is None
+
+
+@pytest.mark.asyncio
+async def test_get_visualization_data(db_session, create_user):
+    user = await create_user(first_name="Анна", last_name="Иванова")
+
+    async with db_session as session:
+        session.add(Task(title="1", assignee_id=user.id, status="Done"))
+        await session.commit()
+
+    report = await AnalyticsService().get_visualization_data()
+
+    assert "Анна Иванова" in report
+    assert '"name":"Done"' in report
+    assert '"name":"To Do"' not in report
+
+
+@pytest.mark.asyncio
+async def test_render_process_pool_uses_forkserver(
+    db_session, create_user, monkeypatch
+):
+    monkeypatch.setattr(settings, "analytics_render_executor", "process")
+    user = await create_user()
+    analytics_service = AnalyticsService()
+
+    async with db_session as session:
+        session.add(Task(title="1", assignee_id=user.id, status="Done"))
+        await session.commit()
+
+    try:
+        assert await analytics_service.get_visualization_data()
+
+        executor = analytics_service._get_executor()
+        assert executor._mp_context.get_start_method() == "forkserver"
+    finally:
+        analytics_service.shutdown()
+
+
+def test_report_does_not_import_pandas():
+    code = (
+        "import sys\n"
+        "import app.services.analytics\n"
+        "import plotly.graph_objects\n"
+        "assert 'pandas' not in sys.modules\n"
+    )
+
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.asyncio
+async def test_status_counts_follow_task_changes(db_session, create_user):
+    user = await create_user()
+    other_user = await create_user()
+    task_service = TaskService()
+
+    await task_service.create_task(user, CreateTask(title="1"))
+    await task_service.create_tasks_bulk(
+        user, _iterate([{"title": str(i)} for i in range(2, 6)])
+    )
+    await task_service.update_task(1, user, status="In Progress")
+    await task_service.update_tasks_bulk(
+        user, BulkUpdateTasks(ids=[2, 3], assignee_id=other_user.id)
+    )
+    await task_service.update_task(1, user, title="Только название")
+    await task_service.delete_task(4, user)
+
+    async with db_session as session:
+        assert await get_status_counts(session) == {
+            (user.id, "In Progress"): 1,
+            (user.id, "To Do"): 1,
+            (other_user.id, "To Do"): 2,
+        }
+
+
+@pytest.mark.asyncio
+async def test_status_counts_follow_copy_and_truncate(
+    db_session, create_user, monkeypatch
+):
+    monkeypatch.setattr(settings, "task_bulk_copy_threshold", 2)
+    user = await create_user()
+
+    await TaskService().create_tasks_bulk(
+        user, _iterate([{"title": str(i)} for i in range(3)])
+    )
+
+    async with db_session as session:
+        assert await get_status_counts(session) == {(user.id, "To Do"): 3}
+
+        await session.execute(text("TRUNCATE tasks"))
+        await session.commit()
+
+        assert await get_status_counts(session) == {}
+
+
+@pytest.mark.asyncio
+async def test_status_counts_do_not_block_concurrent_writes(
+    db_session, create_user
+):
+    user = await create_user()
+    task_service = TaskService()
+
+    async with db_session as session:
+        # Незакоммиченная вставка уже добавила дельту для (user, "To Do")
+        session.add(Task(title="1", assignee_id=user.id, status="To Do"))
+        await session.flush()
+
+        await asyncio.wait_for(
+            task_service.create_task(user, CreateTask(title="2")), timeout=5
+        )
+        await session.commit()
+
+        assert await get_status_counts(session) == {(user.id, "To Do"): 2}
+
+
+@pytest.mark.asyncio
+async def test_compact_status_counts(db_session, create_user):
+    user = await create_user()
+    task_service = TaskService()
+
+    for title in ("1", "2", "3"):
+        await task_service.create_task(user, CreateTask(title=title))
+
+    await task_service.update_task(1, user, status="In Progress")
+    await task_service.update_task(1, user, status="Done")
+    await task_service.delete_task(3, user)
+
+    async with db_session as session:
+        counts = await get_status_counts(session)
+        rows = await session.scalar(select(func.count(TaskStatusCount.id)))
+
+    removed = await AnalyticsService().compact_status_counts()
+
+    async with db_session as session:
+        assert await get_status_counts(session) == counts
+        assert await session.scalar(
+            select(func.count(TaskStatusCount.id))
+        ) == len(counts)
+
+    assert counts == {(user.id, "To Do"): 1, (user.id, "Done"): 1}
+    assert removed == rows - 2
+
+
+@pytest.mark.asyncio
+async def test_check_status_counts(db_session, create_user):
+    user = await create_user()
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(title="1", assignee_id=user.id, status="To Do"),
+                Task(title="2", assignee_id=user.id, status="Done"),
+            ]
+        )
+        await session.commit()
+
+    analytics_service = AnalyticsService()
+
+    assert await analytics_service.check_status_counts() == []
+
+    async with db_session as session:
+        await session.execute(
+            update(TaskStatusCount)
+            .where(TaskStatusCount.status == "To Do")
+            .values(count=5)
+        )
+        await session.execute(
+            delete(TaskStatusCount).where(TaskStatusCount.status == "Done")
+        )
+        await session.commit()
+
+    expected_drift = [
+        {"assignee_id": user.id, "status": "Done", "stored": 0, "actual": 1},
+        {"assignee_id": user.id, "status": "To Do", "stored": 5, "actual": 1},
+    ]
+
+    assert (
+        await analytics_service.check_status_counts(rebuild=False)
+        == expected_drift
+    )
+    assert await analytics_service.check_status_counts() == expected_drift
+    assert await analytics_service.check_status_counts() == []
+
+
+@pytest.mark.asyncio
+async def test_check_status_counts_command(db_session, create_user, capsys):
+    user = await create_user()
+
+    async with db_session as session:
+        session.add(Task(title="1", assignee_id=user.id, status="To Do"))
+        await session.execute(delete(TaskStatusCount))
+        await session.commit()
+
+    assert await check_status_counts(rebuild=True) == 1
+    assert "Счетчики пересобраны." in capsys.readouterr().out
+
+    assert await check_status_counts(rebuild=True) == 0
+    assert "Расхождений нет." in capsys.readouterr().out
+
+    assert await compact_status_counts() == 0
+    assert "Счетчики свернуты" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_get_visualization_data_is_cached(db_session, create_user):
+    user = await create_user(first_name="Анна", last_name="Иванова")
+    analytics_service = AnalyticsService()
+
+    async with db_session as session:
+        session.add(Task(title="1", assignee_id=user.id, status="Done"))
+        await session.commit()
+
+    reports = await asyncio.gather(
+        *(analytics_service.get_visualization_data() for _ in range(5))
+    )
+
+    async with db_session as session:
+        session.add(Task(title="2", assignee_id=user.id, status="To Do"))
+        await session.commit()
+
+    assert len(set(reports)) == 1
+    assert await analytics_service.get_visualization_data() == reports[0]
+    assert report_cache.stats()["computations"] == 1
+
+    analytics_service.shutdown()
+
+
+@pytest.mark.parametrize(
+    "filter, after_id, limit, expected",
+    [
+        (
+            StatusDistributionFilter(),
+            None,
+            10,
+            [(1, 2, 1), (2, 1, 1), (3, 1, 0)],
+        ),
+        (StatusDistributionFilter(), None, 2, [(1, 2, 1), (2, 1, 1)]),
+        (StatusDistributionFilter(), 2, 2, [(3, 1, 0)]),
+        (
+            StatusDistributionFilter(assignee_id=[1, 3]),
+            None,
+            10,
+            [(1, 2, 1), (3, 1, 0)],
+        ),
+        (
+            StatusDistributionFilter(created_from=datetime.date(2026, 1, 2)),
+            None,
+            10,
+            [(1, 1, 1), (2, 1, 1)],
+        ),
+        (
+            StatusDistributionFilter(
+                created_to=datetime.date(2026, 1, 1), assignee_id=[2, 3]
+            ),
+            None,
+            10,
+            [(3, 1, 0)],
+        ),
+    ],
+    ids=[
+        "all users",
+        "first page",
+        "second page",
+        "assignee filter",
+        "created_from filter",
+        "created_to and assignee filter",
+    ],
+)
+@pytest.mark.asyncio
+async def test_iter_status_distribution(
+    db_session, create_user, filter, after_id, limit, expected
+):
+    users = [await create_user() for _ in range(3)]
+    first_day = datetime.datetime(2026, 1, 1, 12)
+    second_day = datetime.datetime(2026, 1, 2, 12)
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(
+                    title="1",
+                    assignee_id=users[0].id,
+                    status="To Do",
+                    created_at=first_day,
+                ),
+                Task(
+                    title="2",
+                    assignee_id=users[0].id,
+                    status="To Do",
+                    created_at=second_day,
+                ),
+                Task(
+                    title="3",
+                    assignee_id=users[0].id,
+                    status="Done",
+                    created_at=second_day,
+                ),
+                Task(
+                    title="4",
+                    assignee_id=users[1].id,
+                    status="To Do",
+                    created_at=second_day,
+                ),
+                Task(
+                    title="5",
+                    assignee_id=users[1].id,
+                    status="Done",
+                    created_at=second_day,
+                ),
+                Task(
+                    title="6",
+                    assignee_id=users[2].id,
+                    status="To Do",
+                    created_at=first_day,
+                ),
+            ]
+        )
+        await session.commit()
+
+    rows = [
+        row
+        async for row in AnalyticsService().iter_status_distribution(
+            filter, limit, after_id
+        )
+    ]
+
+    assert [
+        (row["assignee_id"], row["to_do"], row["done"]) for row in rows
+    ] == expected
+
+
+@pytest.mark.asyncio
+async def test_get_flow_metrics(db_session, create_user, monkeypatch):
+    monkeypatch.setattr(settings, "analytics_flow_chunk_size", 2)
+    first_user = await create_user()
+    second_user = await create_user()
+    monday = datetime.datetime(2026, 1, 5, 9)
+    hours = datetime.timedelta(hours=1)
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(
+                    title="1",
+                    assignee_id=first_user.id,
+                    status="Done",
+                    created_at=monday,
+                    started_work_at=monday + 2 * hours,
+                    closed_at=monday + 10 * hours,
+                ),
+                Task(
+                    title="2",
+                    assignee_id=first_user.id,
+                    status="Done",
+                    created_at=monday,
+                    started_work_at=None,
+                    closed_at=monday + 10 * hours,
+                ),
+                Task(
+                    title="3",
+                    assignee_id=second_user.id,
+                    status="Done",
+                    created_at=monday,
+                    started_work_at=monday + 100 * hours,
+                    closed_at=monday + 200 * hours,
+                ),
+                Task(
+                    title="4",
+                    assignee_id=second_user.id,
+                    status="Cancelled",
+                    created_at=monday,
+                    closed_at=monday + 10 * hours,
+                ),
+            ]
+        )
+        await session.commit()
+
+    analytics_service = AnalyticsService()
+    metrics = await analytics_service.get_flow_metrics(
+        FlowMetricsFilter(), limit=10
+    )
+
+    overall = metrics["overall"]
+    assert overall["assignee_id"] is None
+    assert overall["lead_time"]["count"] == 3
+    assert overall["cycle_time"]["count"] == 2
+    assert overall["lead_time"]["p50"] == pytest.approx(10, rel=0.05)
+    assert overall["lead_time"]["p95"] == pytest.approx(200, rel=0.05)
+    assert [
+        bucket["count"] for bucket in overall["lead_time"]["histogram"]
+    ] == [0, 0, 0, 2, 0, 0, 1, 0, 0, 0]
+    assert overall["throughput"] == [
+        {"week": datetime.date(2026, 1, 5), "count": 2},
+        {"week": datetime.date(2026, 1, 12), "count": 1},
+    ]
+
+    first, second = metrics["users"]
+    assert first["assignee_id"] == first_user.id
+    assert first["cycle_time"]["p50"] == pytest.approx(8, rel=0.05)
+    assert [week["count"] for week in first["throughput"]] == [2, 0]
+    assert second["assignee_id"] == second_user.id
+    assert second["cycle_time"]["p50"] == pytest.approx(100, rel=0.05)
+    assert [week["count"] for week in second["throughput"]] == [0, 1]
+
+    # Страница исполнителей не меняет общую сводку
+    page = await analytics_service.get_flow_metrics(
+        FlowMetricsFilter(), limit=1, after_id=first_user.id
+    )
+
+    assert page["overall"] == overall
+    assert page["users"] == [second]
+
+
+@pytest.mark.asyncio
+async def test_get_flow_metrics_limits_period(
+    db_session, create_user, monkeypatch
+):
+    monkeypatch.setattr(settings, "analytics_flow_max_weeks", 2)
+    user = await create_user()
+    monday = datetime.datetime(2026, 1, 5, 9)
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(
+                    title=str(week),
+                    assignee_id=user.id,
+                    status="Done",
+                    created_at=monday,
+                    closed_at=monday + datetime.timedelta(weeks=week),
+                )
+                for week in range(3)
+            ]
+        )
+        await session.commit()
+
+    analytics_service = AnalyticsService()
+
+    with pytest.raises(ValueError):
+        await analytics_service.get_flow_metrics(FlowMetricsFilter(), 10)
+
+    metrics = await analytics_service.get_flow_metrics(
+        FlowMetricsFilter(closed_from=datetime.date(2026, 1, 12)), 10
+    )
+
+    assert len(metrics["overall"]["throughput"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_flow_metrics_without_tasks(db_session):
+    metrics = await AnalyticsService().get_flow_metrics(
+        FlowMetricsFilter(closed_from=datetime.date(2026, 1, 1)), 10
+    )
+
+    assert metrics == {"overall": None, "users": []}
+
+
+async def _add_closed_tasks(session, assignee_id, days, per_day):
+    today = datetime.date.today()
+
+    session.add_all(
+        [
+            Task(
+                title=f"{day}-{number}",
+                assignee_id=assignee_id,
+                status="Done",
+                closed_at=datetime.datetime.combine(
+                    today - datetime.timedelta(days=day),
+                    datetime.time(12),
+                ),
+            )
+            for day in range(1, days + 1)
+            for number in range(per_day)
+        ]
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_get_delivery_forecast(db_session, create_user, monkeypatch):
+    monkeypatch.setattr(settings, "analytics_forecast_trials", 1000)
+    user = await create_user()
+    other_user = await create_user()
+    today = datetime.date.today()
+
+    async with db_session as session:
+        await _add_closed_tasks(session, user.id, days=10, per_day=2)
+        await _add_closed_tasks(session, other_user.id, days=10, per_day=5)
+        session.add_all(
+            [
+                Task(title=f"open {number}", assignee_id=user.id)
+                for number in range(9)
+            ]
+        )
+        await session.commit()
+
+    forecast = await AnalyticsService().get_delivery_forecast(
+        DeliveryForecastFilter(
+            assignee_id=user.id,
+            history_from=today - datetime.timedelta(days=10),
+        )
+    )
+
+    # 9 открытых задач при 2 задачах в день - 5 дней
+    assert forecast["remaining"] == 9
+    assert forecast["daily_throughput"] == 2
+    assert forecast["history_to"] == today - datetime.timedelta(days=1)
+    assert forecast["p50"] == forecast["p95"] == today + datetime.timedelta(5)
+    assert forecast["completed_share"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_delivery_forecast_uses_history_window(
+    db_session, create_user, monkeypatch
+):
+    monkeypatch.setattr(settings, "analytics_forecast_trials", 1000)
+    monkeypatch.setattr(settings, "analytics_forecast_max_days", 30)
+    user = await create_user()
+    today = datetime.date.today()
+
+    async with db_session as session:
+        await _add_closed_tasks(session, user.id, days=2, per_day=1)
+
+    filter = DeliveryForecastFilter(
+        remaining=100, history_from=today - datetime.timedelta(days=20)
+    )
+    forecast = await AnalyticsService().get_delivery_forecast(filter)
+
+    assert forecast["daily_throughput"] == 0.1
+    assert forecast["p50"] is None
+    assert forecast["completed_share"] == 0
+    assert forecast["horizon"] == today + datetime.timedelta(30)
+
+    await AnalyticsService().get_delivery_forecast(filter)
+
+    assert forecast_cache.computations == 1
+
+
+@pytest.mark.asyncio
+async def test_get_delivery_forecast_without_history(db_session):
+    today = datetime.date.today()
+    service = AnalyticsService()
+
+    assert (
+        await service.get_delivery_forecast(
+            DeliveryForecastFilter(remaining=10)
+        )
+        is None
+    )
+
+    with pytest.raises(ValueError):
+        await service.get_delivery_forecast(
+            DeliveryForecastFilter(history_to=today)
+        )
+
+    with pytest.raises(ValueError):
+        await service.get_delivery_forecast(
+            DeliveryForecastFilter(
+                history_from=today - datetime.timedelta(days=1),
+                history_to=today - datetime.timedelta(days=2),
+            )
+        )
@@ -0,0 +1,127 @@
+import struct
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.flow_metrics import (
+    PERCENTILE_EDGES,
+    BinaryCopyReader,
+    BinnedCounter,
+    forecast_completion_days,
+    percentiles,
+)
+
+
+def test_binned_counter_accumulates_chunks():
+    counter = BinnedCounter([0, 10, 20])
+
+    counter.add(np.array([5, 5, 3]), np.array([1.0, 15.0, 25.0]))
+    counter.add(np.array([4, 5, 3]), np.array([np.nan, 11.0, 100.0]))
+    counter.add(np.array([4]), np.array([-1.0]))
+
+    assert counter.user_ids.tolist() == [3, 4, 5]
+    assert counter.counts.tolist() == [[0, 0, 2], [1, 0, 0], [1, 2, 0]]
+    assert counter.total().tolist() == [[2, 2, 2]]
+    assert counter.for_users(np.array([5, 1, 3])).tolist() == [
+        [1, 2, 0],
+        [0, 0, 0],
+        [0, 0, 2],
+    ]
+
+
+def test_percentiles_are_close_to_exact():
+    values = np.random.default_rng(42).lognormal(12, 1.5, 100_000)
+    counter = BinnedCounter(PERCENTILE_EDGES)
+
+    for chunk in np.array_split(values, 10):
+        counter.add(np.zeros(len(chunk), dtype=np.int64), chunk)
+
+    approximate = percentiles(counter.counts, PERCENTILE_EDGES)[0]
+    exact = np.percentile(values, [50, 85, 95])
+
+    assert approximate == pytest.approx(exact, rel=0.05)
+
+
+def test_percentiles_of_empty_row():
+    counts = np.zeros((1, len(PERCENTILE_EDGES)), dtype=np.int64)
+
+    assert np.isnan(percentiles(counts, PERCENTILE_EDGES)).all()
+
+
+def _copy_stream(records) -> bytes:
+    header = b"PGCOPY\n\xff\r\n\x00" + bytes(8)
+    rows = b"".join(
+        struct.pack(">hiiid", 2, 4, user_id, 8, value)
+        for user_id, value in records
+    )
+
+    return header + rows + BinaryCopyReader.TRAILER
+
+
+@pytest.mark.asyncio
+async def test_binary_copy_reader_emits_chunks():
+    chunks = []
+    reader = BinaryCopyReader(
+        [("user_id", ">i4"), ("value", ">f8")], 2, chunks.append
+    )
+    data = _copy_stream([(1, 1.5), (2, np.nan), (3, 3.0), (4, 4.0), (5, 5)])
+
+    # Куски потока не совпадают с границами строк
+    for start in range(0, len(data), 7):
+        await reader.feed(data[start:][:7])
+
+    await reader.close()
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    records = np.concatenate(chunks)
+    assert records["user_id"].tolist() == [1, 2, 3, 4, 5]
+    assert records["value"][[0, 2, 3, 4]].tolist() == [1.5, 3.0, 4.0, 5.0]
+    assert np.isnan(records["value"][1])
+
+
+@pytest.mark.asyncio
+async def test_binary_copy_reader_processes_chunks_off_event_loop():
+    threads = []
+    reader = BinaryCopyReader(
+        [("user_id", ">i4"), ("value", ">f8")],
+        1,
+        lambda records: threads.append(threading.get_ident()),
+    )
+
+    await reader.feed(_copy_stream([(1, 1.0), (2, 2.0)]))
+    await reader.close()
+
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_binary_copy_reader_rejects_truncated_stream():
+    reader = BinaryCopyReader([("user_id", ">i4"), ("value", ">f8")], 2, list)
+
+    await reader.feed(_copy_stream([(1, 1.0)])[:-3])
+
+    with pytest.raises(ValueError):
+        await reader.close()
+
+
+def test_forecast_completion_days():
+    forecast = forecast_completion_days(np.array([0, 2, 4]), 100, 10_000, 730)
+
+    # В среднем 2 задачи в день
+    assert 45 <= forecast["p50"] <= 55
+    assert forecast["p50"] <= forecast["p85"] <= forecast["p95"]
+    assert forecast["completed_share"] == 1
+
+
+def test_forecast_completion_days_beyond_horizon():
+    forecast = forecast_completion_days(np.array([0, 0, 1]), 100, 1000, 100)
+
+    assert forecast == {
+        "p50": None,
+        "p85": None,
+        "p95": None,
+        "completed_share": 0.0,
+    }
+    assert forecast_completion_days(np.array([1]), 0, 10, 10)["p95"] == 0
@@ -0,0 +1,34 @@
+import pytest
+
+from app.db.session import db_registry
+from app.security.auth import AuthService
+from app.services.analytics import AnalyticsService
+from app.services.main_service import MainService
+from app.services.task import TaskService
+from app.services.user import UserService
+
+
+@pytest.mark.asyncio
+async def test_services_share_engine_and_session_maker():
+    services = [
+        MainService(),
+        TaskService(),
+        UserService(),
+        AuthService(),
+        AnalyticsService(),
+    ]
+
+    engines = {id(service._engine) for service in services}
+    session_makers = {id(service._get_async_session()) for service in services}
+
+    assert engines == {id(db_registry.engine)}
+    assert session_makers == {id(db_registry.session_maker)}
+
+
+@pytest.mark.asyncio
+async def test_registry_dispose_resets_engine():
+    engine = db_registry.engine
+
+    await db_registry.dispose()
+
+    assert db_registry.engine is not engine
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.security.errors import ServiceUnavailableError
+from app.security.hashing import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_hash_and_verify():
+    hasher = PasswordHasher("thread", max_workers=1, max_queue=1)
+
+    hashed_password = await hasher.hash("Password1")
+
+    assert await hasher.verify("Password1", hashed_password)
+    assert not await hasher.verify("Password2", hashed_password)
+
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_queue_is_full():
+    hasher = PasswordHasher("thread", max_workers=1, max_queue=1)
+
+    results = await asyncio.gather(
+        *(hasher.hash("Password1") for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    rejected = [r for r in results if isinstance(r, ServiceUnavailableError)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 503
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["queued"] == 0
+    assert hasher.stats()["in_flight"] == 0
+
+    hasher.shutdown()
+
+
+def test_password_hasher_with_unknown_executor_type():
+    with pytest.raises(ValueError):
+        PasswordHasher("fiber", max_workers=1, max_queue=1)
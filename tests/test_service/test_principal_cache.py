@@ -0,0 +1,79 @@
+import pytest
+from freezegun import freeze_time
+
+from app.db.models import User
+from app.schemes.user import UpdateUser
+from app.security.cache import PrincipalCache, principal_cache
+from app.services.user import UserService
+
+
+def test_principal_cache_hit_and_miss():
+    cache = PrincipalCache(max_size=2, ttl=30)
+    user = User(id=1, email="user@example.com")
+
+    assert cache.get("user@example.com") is None
+
+    cache.set("user@example.com", user)
+
+    assert cache.get("user@example.com") is user
+    assert cache.stats() == {"size": 1, "max_size": 2, "hits": 1, "misses": 1}
+
+
+def test_principal_cache_evicts_least_recently_used():
+    cache = PrincipalCache(max_size=2, ttl=30)
+    cache.set("1@example.com", User(id=1, email="1@example.com"))
+    cache.set("2@example.com", User(id=2, email="2@example.com"))
+    cache.get("1@example.com")
+
+    cache.set("3@example.com", User(id=3, email="3@example.com"))
+
+    assert cache.get("2@example.com") is None
+    assert cache.get("1@example.com") is not None
+    assert cache.get("3@example.com") is not None
+
+
+def test_principal_cache_expires_by_ttl():
+    cache = PrincipalCache(max_size=2, ttl=30)
+
+    with freeze_time("2026-01-01 12:00:00") as frozen_time:
+        cache.set("user@example.com", User(id=1, email="user@example.com"))
+        frozen_time.tick(31)
+
+        assert cache.get("user@example.com") is None
+
+
+def test_principal_cache_invalidate_user():
+    cache = PrincipalCache(max_size=2, ttl=30)
+    cache.set("user@example.com", User(id=1, email="user@example.com"))
+
+    cache.invalidate_user(1)
+
+    assert cache.get("user@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates_principal_cache(
+    db_session, create_user
+):
+    user = await create_user()
+    principal_cache.set(user.email, user)
+    user_service = UserService()
+
+    await user_service.update_user(
+        user.id, user, **UpdateUser(first_name="New").model_dump()
+    )
+
+    assert principal_cache.get(user.email) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_user_invalidates_principal_cache(
+    db_session, create_user
+):
+    user = await create_user()
+    principal_cache.set(user.email, user)
+    user_service = UserService()
+
+    await user_service.delete_user(user.id, user)
+
+    assert principal_cache.get(user.email) is None
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from app.services.report_cache import ReportCache
+
+
+def make_compute(*values, delay=0.0):
+    """Возвращает по очереди values, считая вызовы"""
+    calls = []
+
+    async def _compute():
+        calls.append(None)
+        await asyncio.sleep(delay)
+        value = values[len(calls) - 1]
+
+        if isinstance(value, Exception):
+            raise value
+
+        return value
+
+    return _compute, calls
+
+
+@pytest.mark.asyncio
+async def test_report_cache_coalesces_concurrent_requests():
+    cache = ReportCache(ttl=60, stale_ttl=60)
+    compute, calls = make_compute("отчет", delay=0.05)
+
+    results = await asyncio.gather(
+        *(cache.get("report", compute) for _ in range(10))
+    )
+
+    assert results == ["отчет"] * 10
+    assert len(calls) == 1
+    assert cache.stats()["misses"] == 10
+    assert cache.stats()["computations"] == 1
+    assert cache.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_report_cache_returns_fresh_value():
+    cache = ReportCache(ttl=60, stale_ttl=60)
+    compute, calls = make_compute("первый", "второй")
+
+    assert await cache.get("report", compute) == "первый"
+    assert await cache.get("report", compute) == "первый"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_report_cache_serves_stale_while_refreshing():
+    cache = ReportCache(ttl=0, stale_ttl=60)
+    compute, calls = make_compute("первый", "второй", delay=0.05)
+
+    assert await cache.get("report", compute) == "первый"
+    assert await cache.get("report", compute) == "первый"
+    assert await cache.get("report", compute) == "первый"
+    assert cache.stats()["stale_hits"] == 2
+    assert cache.stats()["in_flight"] == 1
+
+    await asyncio.sleep(0.1)
+
+    assert len(calls) == 2
+    assert await cache.get("report", make_compute("третий")[0]) == "второй"
+
+
+@pytest.mark.asyncio
+async def test_report_cache_recomputes_expired_value():
+    cache = ReportCache(ttl=0, stale_ttl=0)
+    compute, calls = make_compute("первый", "второй")
+
+    assert await cache.get("report", compute) == "первый"
+    assert await cache.get("report", compute) == "второй"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_report_cache_keeps_stale_value_when_refresh_fails():
+    cache = ReportCache(ttl=0, stale_ttl=60)
+    compute, calls = make_compute("первый", RuntimeError("сбой"), "второй")
+
+    assert await cache.get("report", compute) == "первый"
+    assert await cache.get("report", compute) == "первый"
+
+    await asyncio.sleep(0.01)
+
+    assert await cache.get("report", compute) == "первый"
+
+    await asyncio.sleep(0.01)
+
+    assert len(calls) == 3
+    assert await cache.get("report", compute) == "второй"
+
+
+@pytest.mark.asyncio
+async def test_report_cache_propagates_error_without_value():
+    cache = ReportCache(ttl=60, stale_ttl=60)
+    compute, calls = make_compute(RuntimeError("сбой"), "отчет")
+
+    with pytest.raises(RuntimeError):
+        await cache.get("report", compute)
+
+    assert await cache.get("report", compute) == "отчет"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_report_cache_evicts_oldest_items():
+    cache = ReportCache(ttl=60, stale_ttl=0, max_items=2)
+    first, first_calls = make_compute("1", "1")
+    second, _ = make_compute("2")
+    third, _ = make_compute("3")
+
+    await cache.get("first", first)
+    await cache.get("second", second)
+    await cache.get("third", third)
+
+    assert cache.stats()["size"] == 2
+    assert await cache.get("first", first) == "1"
+    assert len(first_calls) == 2
@@ -0,0 +1,45 @@
+import gzip
+
+from app.core.settings import settings
+from app.services.static_assets import (
+    build_plotly_bundle,
+    ensure_plotly_bundle,
+    get_asset,
+)
+
+
+def test_build_plotly_bundle(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "analytics_assets_dir", tmp_path)
+
+    path = build_plotly_bundle()
+    archive = path.with_name(path.name + ".gz").read_bytes()
+
+    assert gzip.decompress(archive) == path.read_bytes()
+    assert len(archive) < path.stat().st_size / 2
+    assert ensure_plotly_bundle() == path.name
+    assert sorted(file.name for file in tmp_path.iterdir()) == [
+        path.name,
+        path.name + ".gz",
+    ]
+
+    # Повторная сборка дает те же байты
+    build_plotly_bundle()
+
+    assert path.with_name(path.name + ".gz").read_bytes() == archive
+
+
+def test_get_asset_etag_depends_on_encoding(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "analytics_assets_dir", tmp_path)
+    (tmp_path / "app.js").write_text("1")
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(b"1"))
+
+    plain = get_asset("app.js", gzipped=False)
+    compressed = get_asset("app.js", gzipped=True)
+
+    assert not plain.gzipped
+    assert compressed.gzipped
+    assert plain.etag != compressed.etag
+
+    (tmp_path / "app.js").write_text("2")
+
+    assert get_asset("app.js", gzipped=False).etag != plain.etag
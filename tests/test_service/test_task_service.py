@@ -1,12 +1,25 @@
+import asyncio
 import datetime
+import logging
 
 import pytest
-from sqlalchemy import select
+from fastapi import HTTPException
+from sqlalchemy import func, inspect, select, text, tuple_, update
 
+from app.core.settings import settings
 from app.db.models import Task
-from app.schemes.task import CreateTask, TaskFilter, UpdateTask
+from app.schemes.task import (
+    BulkUpdateTasks,
+    CreateTask,
+    TaskFilter,
+    UpdateTask,
+)
 from app.security.errors import AuthorizationError
-from app.services.task import TaskService
+from app.services.loading import LoadingProfile
+from app.services.mappings import OPEN_TASK_STATUSES
+from app.services.pagination import encode_cursor, make_cursor
+from app.services.task import SEARCH_RANK_SORT, TaskService
+from app.services.user import user_service
 
 
 @pytest.mark.asyncio
@@ -339,3 +352,1056 @@ async def test_get_tasks_with_not_found_sort_field(
         await task_service.get_tasks(0, 5, sort_by, True, filter, user)
 
     assert "У задачи нет поля 'test_field'." == str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_get_task_with_assignee_profile(
+    db_session, create_task, create_user
+):
+    user = await create_user()
+    await create_task(assignee_id=user.id)
+    task_service = TaskService()
+
+    task = await task_service.get_task(
+        user, 1, profile=LoadingProfile.TASK_WITH_ASSIGNEE
+    )
+
+    assert task.assignee.id == user.id
+    assert task.assignee.email == user.email
+
+
+@pytest.mark.asyncio
+async def test_get_task_bare_profile_does_not_load_assignee(
+    db_session, create_task, create_user
+):
+    user = await create_user()
+    await create_task(assignee_id=user.id)
+    task_service = TaskService()
+
+    task = await task_service.get_task(user, 1)
+
+    assert "assignee" not in inspect(task).dict
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_public_profile_loads_cursor_field(
+    db_session, create_multiple_task, create_user
+):
+    user = await create_user()
+    await create_multiple_task(2, assignee_id=user.id)
+
+    tasks = await TaskService().get_tasks(
+        0,
+        1,
+        "change_xid",
+        True,
+        TaskFilter(),
+        user,
+        profile=LoadingProfile.PUBLIC,
+    )
+    state = inspect(tasks[0])
+
+    assert "change_xid" not in state.unloaded
+    assert state.unloaded == {"search_vector", "assignee"}
+    assert encode_cursor(tasks[0], "change_xid", True)
+
+
+@pytest.mark.parametrize(
+    "sort_by,ascending",
+    [
+        ("id", True),
+        ("id", False),
+        ("status", True),
+        ("closed_at", True),
+        ("closed_at", False),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_tasks_with_cursor_pagination(
+    db_session, create_user, sort_by, ascending
+):
+    user = await create_user(role="ADMIN")
+    closed_at = datetime.datetime(2026, 1, 1)
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(
+                    title=f"Задача {i}",
+                    assignee_id=user.id,
+                    status="Done" if i % 3 else "To Do",
+                    closed_at=closed_at if i % 3 else None,
+                )
+                for i in range(10)
+            ]
+        )
+        await session.commit()
+
+    task_service = TaskService()
+    expected_tasks = await task_service.get_tasks(
+        0, 100, sort_by, ascending, TaskFilter(), user
+    )
+
+    pages_tasks = []
+    cursor = None
+
+    while True:
+        tasks = await task_service.get_tasks(
+            0, 3, sort_by, ascending, TaskFilter(), user, cursor=cursor
+        )
+        pages_tasks.extend(tasks)
+
+        if len(tasks) < 3:
+            break
+
+        cursor = encode_cursor(tasks[-1], sort_by, ascending)
+
+    assert [task.id for task in pages_tasks] == [
+        task.id for task in expected_tasks
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_with_cursor_for_other_sorting(
+    db_session, create_task, create_user
+):
+    user = await create_user()
+    task = await create_task(assignee_id=user.id)
+    task_service = TaskService()
+
+    with pytest.raises(ValueError) as excinfo:
+        await task_service.get_tasks(
+            0,
+            5,
+            "title",
+            True,
+            TaskFilter(),
+            user,
+            cursor=encode_cursor(task, "id", True),
+        )
+
+    assert "Курсор пагинации получен для другой сортировки." in str(
+        excinfo.value
+    )
+
+
+@pytest.mark.parametrize(
+    "filter,expected_index",
+    [
+        (
+            TaskFilter(created_at=datetime.date(2026, 1, 1)),
+            "ix_tasks_created_at",
+        ),
+        (
+            TaskFilter(
+                created_from=datetime.date(2026, 1, 1),
+                created_to=datetime.date(2026, 1, 31),
+            ),
+            "ix_tasks_created_at",
+        ),
+        (
+            TaskFilter(closed_at=datetime.date(2026, 1, 1)),
+            "ix_tasks_closed_at",
+        ),
+        (
+            TaskFilter(closed_from=datetime.date(2026, 1, 1)),
+            "ix_tasks_closed_at",
+        ),
+    ],
+    ids=[
+        "created_at",
+        "created_from and created_to",
+        "closed_at",
+        "closed_from",
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_tasks_date_filters_use_index(
+    db_session, explain_query, create_user, filter, expected_index
+):
+    user = await create_user(role="ADMIN")
+    query = TaskService()._apply_filter(select(Task), filter, user)
+
+    async with db_session as session:
+        plan = await explain_query(session, query)
+
+    assert expected_index in plan
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_title_filter_uses_trigram_index(
+    db_session, explain_query, create_user
+):
+    user = await create_user(role="ADMIN")
+    query = TaskService()._apply_filter(
+        select(Task), TaskFilter(title="отчет"), user
+    )
+
+    async with db_session as session:
+        has_trigram = await session.scalar(
+            text("SELECT count(*) FROM pg_extension WHERE extname = 'pg_trgm'")
+        )
+
+        if not has_trigram:
+            pytest.skip("На сервере нет расширения pg_trgm")
+
+        plan = await explain_query(session, query)
+
+    assert "ix_tasks_title_trgm" in plan
+
+
+@pytest.mark.parametrize(
+    "filter,expected_titles",
+    [
+        (
+            TaskFilter(created_from=datetime.date(2026, 1, 2)),
+            ["2 января", "3 января"],
+        ),
+        (
+            TaskFilter(created_to=datetime.date(2026, 1, 2)),
+            ["1 января", "2 января"],
+        ),
+        (
+            TaskFilter(
+                created_from=datetime.date(2026, 1, 2),
+                created_to=datetime.date(2026, 1, 2),
+            ),
+            ["2 января"],
+        ),
+        (TaskFilter(created_at=datetime.date(2026, 1, 3)), ["3 января"]),
+    ],
+    ids=[
+        "created_from",
+        "created_to includes whole day",
+        "single day range",
+        "created_at",
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_tasks_with_created_range(
+    db_session, create_user, filter, expected_titles
+):
+    user = await create_user()
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(
+                    title=f"{day} января",
+                    assignee_id=user.id,
+                    created_at=datetime.datetime(2026, 1, day, 23, 59),
+                )
+                for day in (1, 2, 3)
+            ]
+        )
+        await session.commit()
+
+    tasks = await TaskService().get_tasks(0, 10, "id", True, filter, user)
+
+    assert [task.title for task in tasks] == expected_titles
+
+
+@pytest.mark.parametrize(
+    "title,expected_titles",
+    [
+        ("report", ["Prepare REPORT", "report for release"]),
+        ("100%", ["Покрытие 100%"]),
+        ("_", []),
+    ],
+    ids=[
+        "case insensitive",
+        "percent sign is escaped",
+        "underscore is escaped",
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_tasks_with_title_substring(
+    db_session, create_user, title, expected_titles
+):
+    user = await create_user()
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(title=task_title, assignee_id=user.id)
+                for task_title in (
+                    "Prepare REPORT",
+                    "report for release",
+                    "Покрытие 100%",
+                    "Покрытие 1000",
+                )
+            ]
+        )
+        await session.commit()
+
+    tasks = await TaskService().get_tasks(
+        0, 10, "id", True, TaskFilter(title=title), user
+    )
+
+    assert [task.title for task in tasks] == expected_titles
+
+
+@pytest.mark.asyncio
+async def test_search_tasks(db_session, create_user):
+    user = await create_user()
+    other_user = await create_user()
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(
+                    title="Отчет по продажам",
+                    description="Собрать отчет",
+                    assignee_id=user.id,
+                ),
+                Task(
+                    title="Исправить ошибку",
+                    description="Ошибка в отчете",
+                    assignee_id=user.id,
+                ),
+                Task(title="Настроить сервер", assignee_id=user.id),
+                Task(title="Отчет для другого", assignee_id=other_user.id),
+            ]
+        )
+        await session.commit()
+
+    rows = await TaskService().search_tasks("отчет", 10, TaskFilter(), user)
+
+    assert [task.id for task, _ in rows] == [1, 2]
+    assert rows[0][1] > rows[1][1]
+
+
+@pytest.mark.asyncio
+async def test_search_tasks_with_cursor(db_session, create_user):
+    user = await create_user(role="ADMIN")
+
+    async with db_session as session:
+        session.add_all(
+            [Task(title="Отчет", assignee_id=user.id) for _ in range(5)]
+        )
+        await session.commit()
+
+    task_service = TaskService()
+    first_page = await task_service.search_tasks(
+        "отчет", 3, TaskFilter(), user
+    )
+    last_task, last_rank = first_page[-1]
+    second_page = await task_service.search_tasks(
+        "отчет",
+        3,
+        TaskFilter(),
+        user,
+        cursor=make_cursor(SEARCH_RANK_SORT, False, last_rank, last_task.id),
+    )
+
+    assert [task.id for task, _ in first_page] == [5, 4, 3]
+    assert [task.id for task, _ in second_page] == [2, 1]
+
+
+@pytest.mark.parametrize(
+    "filter,sort_by,expected_index",
+    [
+        (
+            TaskFilter(status="Done"),
+            "created_at",
+            "ix_tasks_assignee_id_status_created_at",
+        ),
+        (TaskFilter(), "id", "ix_tasks_assignee_id_status_created_at"),
+    ],
+    ids=["user tasks by status", "all user tasks"],
+)
+@pytest.mark.asyncio
+async def test_get_tasks_for_user_uses_assignee_index(
+    db_session, explain_query, create_user, filter, sort_by, expected_index
+):
+    user = await create_user()
+    query = TaskService()._apply_filter(select(Task), filter, user)
+    query = query.order_by(getattr(Task, sort_by)).limit(25)
+
+    async with db_session as session:
+        plan = await explain_query(session, query)
+
+    assert expected_index in plan
+
+
+@pytest.mark.asyncio
+async def test_open_tasks_query_uses_partial_index(
+    db_session, explain_query, create_user
+):
+    user = await create_user()
+    query = (
+        select(Task.id, Task.created_at)
+        .where(
+            Task.assignee_id == user.id,
+            Task.status.in_(OPEN_TASK_STATUSES),
+        )
+        .order_by(Task.created_at)
+        .limit(25)
+    )
+
+    async with db_session as session:
+        # Оставляем планировщику выбор между частичным и одиночными индексами
+        await session.execute(
+            text("DROP INDEX ix_tasks_assignee_id_status_created_at")
+        )
+        plan = await explain_query(session, query)
+        await session.rollback()
+
+    assert "ix_tasks_open_assignee_id_created_at" in plan
+
+
+@pytest.mark.asyncio
+async def test_update_task_with_invalid_status_transition(
+    db_session, create_task, create_user
+):
+    user = await create_user()
+    await create_task(assignee_id=user.id, status="Done")
+    task_service = TaskService()
+
+    with pytest.raises(HTTPException) as excinfo:
+        await task_service.update_task(1, user, status="In Progress")
+
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == (
+        "Задача не может сменить статус с Done на In Progress. "
+        "Доступные варианты: Нет доступных статусов"
+    )
+
+
+@pytest.mark.asyncio
+async def test_update_task_sets_status_timestamps(
+    db_session, create_task, create_user
+):
+    user = await create_user()
+    await create_task(assignee_id=user.id)
+    task_service = TaskService()
+
+    started_task = await task_service.update_task(
+        1, user, status="In Progress"
+    )
+    closed_task = await task_service.update_task(1, user, status="Done")
+
+    assert started_task.started_work_at is not None
+    assert started_task.closed_at is None
+    assert closed_task.closed_at is not None
+    assert closed_task.updated_at == closed_task.closed_at
+
+
+@pytest.mark.asyncio
+async def test_concurrent_status_transitions_apply_once(
+    db_session, create_task, create_user
+):
+    user = await create_user()
+    await create_task(assignee_id=user.id)
+    task_service = TaskService()
+
+    results = await asyncio.gather(
+        task_service.update_task(1, user, status="In Progress"),
+        task_service.update_task(1, user, status="In Progress"),
+        return_exceptions=True,
+    )
+
+    errors = [r for r in results if isinstance(r, HTTPException)]
+    assert len(errors) == 1
+    assert errors[0].status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_orm_and_bulk_updates_set_identical_timestamps(
+    db_session, create_multiple_task, create_user
+):
+    user = await create_user()
+    await create_multiple_task(3, assignee_id=user.id)
+
+    async with db_session as session:
+        orm_task = await session.get(Task, 1)
+        orm_task.status = "In Progress"
+        await session.flush()
+
+        await session.execute(
+            update(Task)
+            .where(Task.id.in_([2, 3]))
+            .values(status="In Progress")
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(
+            select(Task.started_work_at, Task.updated_at).order_by(Task.id)
+        )
+        timestamps = result.all()
+        await session.commit()
+
+    assert orm_task.started_work_at is not None
+    assert orm_task.updated_at == orm_task.started_work_at
+    assert set(timestamps) == {(orm_task.started_work_at, orm_task.updated_at)}
+
+
+@pytest.mark.asyncio
+async def test_create_task_uses_database_clock(db_session, create_user):
+    user = await create_user()
+
+    async with db_session as session:
+        before = await session.scalar(select(func.localtimestamp()))
+        await session.commit()
+
+    task = await TaskService().create_task(user, CreateTask(title="1"))
+
+    assert task.created_at >= before
+    assert task.updated_at == task.created_at
+
+
+@pytest.mark.asyncio
+async def test_update_without_status_change_keeps_closed_at(
+    db_session, create_task, create_user
+):
+    closed_at = datetime.datetime(2026, 1, 1)
+    user = await create_user()
+    await create_task(assignee_id=user.id, status="Done", closed_at=closed_at)
+    task_service = TaskService()
+
+    task = await task_service.update_task(1, user, title="Новое название")
+
+    assert task.closed_at == closed_at
+    assert task.updated_at > closed_at
+
+
+async def _iterate(raw_tasks):
+    for index, raw_task in enumerate(raw_tasks):
+        yield index, raw_task
+
+
+@pytest.mark.parametrize(
+    "copy_threshold",
+    [1000, 1],
+    ids=["multi-row insert", "copy"],
+)
+@pytest.mark.asyncio
+async def test_create_tasks_bulk(
+    db_session, create_user, monkeypatch, copy_threshold
+):
+    monkeypatch.setattr(settings, "task_bulk_batch_size", 2)
+    monkeypatch.setattr(settings, "task_bulk_copy_threshold", copy_threshold)
+    user = await create_user()
+    raw_tasks = [
+        {"title": "Задача 1", "description": "Описание"},
+        {"title": ""},
+        {"title": "Задача 2"},
+        {"title": "Задача 3", "status": "Done"},
+        {"title": "Задача 4"},
+        ValueError("Строка не является корректным JSON."),
+    ]
+    task_service = TaskService()
+
+    results = await task_service.create_tasks_bulk(user, _iterate(raw_tasks))
+
+    assert [result.index for result in results] == [0, 1, 2, 3, 4, 5]
+    assert [result.id for result in results] == [1, None, 2, None, 3, None]
+    assert results[1].error.startswith("title:")
+    assert results[5].error == "Строка не является корректным JSON."
+
+    async with db_session as session:
+        result = await session.execute(select(Task).order_by(Task.id))
+        tasks = result.scalars().all()
+
+    assert [task.title for task in tasks] == [
+        "Задача 1",
+        "Задача 2",
+        "Задача 4",
+    ]
+    assert {task.assignee_id for task in tasks} == {user.id}
+    assert {task.status for task in tasks} == {"To Do"}
+    assert tasks[0].description == "Описание"
+    assert all(task.created_at == task.updated_at for task in tasks)
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_bulk_by_ids(db_session, create_user):
+    user = await create_user()
+    other_user = await create_user()
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(title="1", assignee_id=user.id, status="To Do"),
+                Task(title="2", assignee_id=user.id, status="In Progress"),
+                Task(title="3", assignee_id=user.id, status="Done"),
+                Task(title="4", assignee_id=user.id, status="Cancelled"),
+                Task(title="5", assignee_id=other_user.id, status="To Do"),
+            ]
+        )
+        await session.commit()
+
+    task_service = TaskService()
+
+    result = await task_service.update_tasks_bulk(
+        user, BulkUpdateTasks(ids=[1, 2, 3, 4, 5, 100], status="Done")
+    )
+
+    assert result.changed == [2]
+    assert result.skipped == [3]
+    assert result.not_found == [100]
+    assert [(task.id, task.reason) for task in result.rejected] == [
+        (1, "Задача не может сменить статус с To Do на Done."),
+        (4, "Задача не может сменить статус с Cancelled на Done."),
+        (5, "Задача принадлежит другому пользователю."),
+    ]
+
+    async with db_session as session:
+        task = await session.get(Task, 2)
+
+    assert task.status == "Done"
+    assert task.closed_at is not None
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_bulk_with_not_found_ids(db_session, create_user):
+    user = await create_user()
+
+    async with db_session as session:
+        session.add(Task(title="1", assignee_id=user.id, status="Done"))
+        await session.commit()
+
+    task_service = TaskService()
+
+    result = await task_service.update_tasks_bulk(
+        user, BulkUpdateTasks(ids=[1, 99, 42], status="Done")
+    )
+
+    assert result.changed == []
+    assert result.skipped == [1]
+    assert result.not_found == [42, 99]
+    assert result.rejected == []
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_bulk_reassign_by_filter(db_session, create_user):
+    admin = await create_user(role="ADMIN")
+    leaving_user = await create_user()
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(title="1", assignee_id=leaving_user.id, status="To Do"),
+                Task(title="2", assignee_id=leaving_user.id, status="Done"),
+                Task(title="3", assignee_id=admin.id, status="To Do"),
+            ]
+        )
+        await session.commit()
+
+    task_service = TaskService()
+
+    result = await task_service.update_tasks_bulk(
+        admin,
+        BulkUpdateTasks(
+            filter=TaskFilter(assignee_id=leaving_user.id),
+            assignee_id=admin.id,
+        ),
+    )
+
+    assert result.changed == [1, 2]
+    assert result.skipped == []
+    assert result.not_found == []
+    assert result.rejected == []
+
+
+@pytest.mark.asyncio
+async def test_update_tasks_bulk_with_too_many_tasks(
+    db_session, create_multiple_task, create_user, monkeypatch
+):
+    monkeypatch.setattr(settings, "task_bulk_update_max_items", 2)
+    user = await create_user()
+    await create_multiple_task(3, assignee_id=user.id)
+    task_service = TaskService()
+
+    with pytest.raises(ValueError) as excinfo:
+        await task_service.update_tasks_bulk(
+            user,
+            BulkUpdateTasks(filter=TaskFilter(), status="In Progress"),
+        )
+
+    assert "Фильтр выбирает более 2 задач. Уточните фильтр." == str(
+        excinfo.value
+    )
+
+
+@pytest.mark.asyncio
+async def test_claim_tasks(db_session, create_user):
+    worker = await create_user()
+    other_user = await create_user()
+    created_at = datetime.datetime(2026, 1, 1)
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(
+                    title="Новее",
+                    assignee_id=worker.id,
+                    status="To Do",
+                    created_at=created_at + datetime.timedelta(days=2),
+                ),
+                Task(
+                    title="Старше",
+                    assignee_id=None,
+                    status="To Do",
+                    created_at=created_at,
+                ),
+                Task(
+                    title="Чужая",
+                    assignee_id=other_user.id,
+                    status="To Do",
+                    created_at=created_at + datetime.timedelta(days=1),
+                ),
+                Task(
+                    title="В работе",
+                    assignee_id=None,
+                    status="In Progress",
+                    created_at=created_at - datetime.timedelta(days=1),
+                ),
+                Task(
+                    title="Последняя",
+                    assignee_id=None,
+                    status="To Do",
+                    created_at=created_at + datetime.timedelta(days=3),
+                ),
+            ]
+        )
+        await session.commit()
+
+    task_service = TaskService()
+
+    tasks = await task_service.claim_tasks(worker, limit=2)
+
+    assert [task.title for task in tasks] == ["Старше", "Новее"]
+    assert all(task.status == "In Progress" for task in tasks)
+    assert all(task.assignee_id == worker.id for task in tasks)
+    assert all(task.started_work_at is not None for task in tasks)
+
+    tasks = await task_service.claim_tasks(worker, limit=2)
+
+    assert [task.title for task in tasks] == ["Последняя"]
+    assert await task_service.claim_tasks(worker, limit=2) == []
+
+    # Чужую задачу может взять только администратор
+    admin = await create_user(role="ADMIN")
+    tasks = await task_service.claim_tasks(admin, limit=2)
+
+    assert [task.title for task in tasks] == ["Чужая"]
+    assert tasks[0].assignee_id == admin.id
+
+
+@pytest.mark.asyncio
+async def test_claim_tasks_concurrently(
+    db_session, create_user, create_multiple_task
+):
+    workers = [await create_user() for _ in range(5)]
+    await create_multiple_task(20)
+    task_service = TaskService()
+
+    results = await asyncio.gather(
+        *(task_service.claim_tasks(worker, limit=3) for worker in workers)
+    )
+
+    claimed_ids = [task.id for tasks in results for task in tasks]
+    assert len(claimed_ids) == 15
+    assert len(set(claimed_ids)) == 15
+
+    async with db_session as session:
+        left = await session.scalar(
+            select(func.count()).where(Task.status == "To Do")
+        )
+
+    assert left == 5
+
+
+@pytest.mark.asyncio
+async def test_claim_tasks_uses_queue_index(db_session, explain_query):
+    query = (
+        select(Task.id)
+        .where(Task.status == "To Do")
+        .order_by(Task.created_at, Task.id)
+        .limit(10)
+        .with_for_update(skip_locked=True)
+    )
+
+    async with db_session as session:
+        plan = await explain_query(session, query)
+
+    assert "ix_tasks_to_do_created_at" in plan
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_state_changes_on_late_commit(db_session, create_user):
+    user = await create_user()
+    task_service = TaskService()
+    await task_service.create_task(user, CreateTask(title="1"))
+    await task_service.create_task(user, CreateTask(title="2"))
+
+    # Транзакция, начатая раньше, коммитится позже с меньшим updated_at
+    async with db_session as session:
+        await session.execute(text("SELECT 1"))
+        await asyncio.sleep(0.01)
+        await task_service.update_task(2, user, title="2.1")
+        state = await task_service.get_tasks_state(TaskFilter(), user)
+
+        await session.execute(
+            update(Task).where(Task.id == 1).values(title="1.1")
+        )
+        await session.commit()
+
+    new_state = await task_service.get_tasks_state(TaskFilter(), user)
+
+    assert new_state[:2] == state[:2]
+    assert new_state != state
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_state_uses_index_only_scan(
+    db_session, test_engine, explain_query, create_user, create_multiple_task
+):
+    user = await create_user()
+    await create_multiple_task(50, assignee_id=user.id)
+
+    # Index-only scan выгоден, когда страницы таблицы отмечены в карте
+    # видимости, ее обновляет VACUUM
+    async with test_engine.connect() as connection:
+        connection = await connection.execution_options(
+            isolation_level="AUTOCOMMIT"
+        )
+        await connection.execute(text("VACUUM ANALYZE tasks"))
+
+    query = TaskService()._apply_filter(
+        select(
+            func.count(), func.max(Task.updated_at), func.sum(Task.version)
+        ).select_from(Task),
+        TaskFilter(),
+        user,
+    )
+
+    async with db_session as session:
+        plan = await explain_query(session, query)
+
+    index = "ix_tasks_assignee_id_status_created_at"
+
+    assert f"Index Only Scan using {index}" in plan
+
+
+@pytest.mark.asyncio
+async def test_update_task_with_same_version_concurrently(
+    db_session, create_user
+):
+    user = await create_user()
+    task_service = TaskService()
+    task = await task_service.create_task(user, CreateTask(title="1"))
+
+    results = await asyncio.gather(
+        *(
+            task_service.update_task(
+                task.id,
+                user,
+                expected_versions=[task.version],
+                title=f"Версия {number}",
+            )
+            for number in range(5)
+        ),
+        return_exceptions=True,
+    )
+
+    updated = [result for result in results if isinstance(result, Task)]
+    rejected = [
+        result for result in results if isinstance(result, HTTPException)
+    ]
+
+    assert len(updated) == 1
+    assert updated[0].version == task.version + 1
+    assert len(rejected) == 4
+    assert {error.status_code for error in rejected} == {412}
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_increments_task_versions(db_session, create_user):
+    user = await create_user()
+    task_service = TaskService()
+    await task_service.create_task(user, CreateTask(title="1"))
+
+    await task_service.update_tasks_bulk(
+        user, BulkUpdateTasks(ids=[1], status="In Progress")
+    )
+
+    assert (await task_service.get_task(user, 1)).version == 2
+
+
+@pytest.mark.asyncio
+async def test_get_changes_pages_tasks_of_one_transaction(
+    db_session, create_user, create_multiple_task
+):
+    user = await create_user()
+    tasks = await create_multiple_task(5, assignee_id=user.id)
+    task_service = TaskService()
+    cursor, ids = None, []
+
+    # Все задачи созданы одной транзакцией с одинаковым временем
+    for _ in range(5):
+        changes = await task_service.get_changes(user, cursor, limit=2)
+        ids += [task.id for task in changes.tasks]
+        cursor = changes.next_cursor
+
+        if not changes.has_more:
+            break
+
+    assert ids == [task.id for task in tasks]
+
+    changes = await task_service.get_changes(user, cursor, limit=2)
+
+    assert changes.tasks == []
+    assert changes.next_cursor == cursor
+
+
+@pytest.mark.asyncio
+async def test_get_changes_exactly_limit_left(
+    db_session, create_user, create_multiple_task
+):
+    user = await create_user()
+    await create_multiple_task(2, assignee_id=user.id)
+
+    changes = await TaskService().get_changes(user, None, limit=2)
+
+    assert len(changes.tasks) == 2
+    assert changes.has_more is False
+
+
+@pytest.mark.asyncio
+async def test_get_changes_returns_tombstones(db_session, create_user):
+    user = await create_user()
+    other_user = await create_user()
+    admin = await create_user(role="ADMIN")
+    task_service = TaskService()
+
+    for title in ("1", "2", "3"):
+        await task_service.create_task(user, CreateTask(title=title))
+
+    cursor = (await task_service.get_changes(user, None, 10)).next_cursor
+    admin_cursor = (
+        await task_service.get_changes(admin, None, 10)
+    ).next_cursor
+
+    await task_service.delete_task(1, user)
+    await task_service.update_tasks_bulk(
+        user, BulkUpdateTasks(ids=[2], assignee_id=other_user.id)
+    )
+
+    changes = await task_service.get_changes(user, cursor, 10)
+
+    assert changes.tasks == []
+    assert [(task.id, task.reason) for task in changes.deleted] == [
+        (1, "deleted"),
+        (2, "reassigned"),
+    ]
+
+    # Администратор видит задачу 2 и дальше, удалена только задача 1
+    changes = await task_service.get_changes(admin, admin_cursor, 10)
+
+    assert [task.id for task in changes.tasks] == [2]
+    assert [(task.id, task.reason) for task in changes.deleted] == [
+        (1, "deleted")
+    ]
+
+    changes = await task_service.get_changes(other_user, None, 10)
+
+    assert [task.id for task in changes.tasks] == [2]
+    assert changes.deleted == []
+
+
+@pytest.mark.asyncio
+async def test_get_changes_after_assignee_deleted(db_session, create_user):
+    user = await create_user()
+    admin = await create_user(role="ADMIN")
+    task_service = TaskService()
+    await task_service.create_task(user, CreateTask(title="1"))
+
+    # ON DELETE SET NULL оставляет задачу без исполнителя
+    await user_service.delete_user(user.id, admin)
+
+    changes = await task_service.get_changes(admin, None, 10)
+
+    assert [task.id for task in changes.tasks] == [1]
+    assert changes.tasks[0].assignee_id is None
+
+
+@pytest.mark.asyncio
+async def test_get_changes_waits_for_late_commit(db_session, create_user):
+    user = await create_user()
+    task_service = TaskService()
+    await task_service.create_task(user, CreateTask(title="1"))
+    await task_service.create_task(user, CreateTask(title="2"))
+    cursor = (await task_service.get_changes(user, None, 10)).next_cursor
+
+    # Транзакция начата раньше, а коммитится позже следующего изменения
+    async with db_session as session:
+        await session.execute(
+            update(Task).where(Task.id == 1).values(title="1.1")
+        )
+        await task_service.update_task(2, user, title="2.1")
+
+        changes = await task_service.get_changes(user, cursor, 10)
+
+        assert changes.tasks == []
+        assert changes.has_more is False
+
+        await session.commit()
+
+    changes = await task_service.get_changes(
+        user, changes.next_cursor, limit=10
+    )
+
+    assert [task.title for task in changes.tasks] == ["1.1", "2.1"]
+
+
+@pytest.mark.asyncio
+async def test_get_changes_warns_about_stalled_horizon(
+    db_session, create_user, monkeypatch, caplog
+):
+    user = await create_user()
+    task_service = TaskService()
+    monkeypatch.setattr(settings, "task_changes_horizon_lag_warning", 1)
+
+    # Открытая транзакция в любой базе кластера держит горизонт
+    async with db_session as session:
+        await session.execute(text("SELECT pg_current_xact_id()"))
+        await task_service.create_task(user, CreateTask(title="1"))
+        await task_service.create_task(user, CreateTask(title="2"))
+
+        with caplog.at_level(logging.WARNING, logger="app.services.task"):
+            changes = await task_service.get_changes(user, None, 10)
+
+        await session.rollback()
+
+    assert changes.tasks == []
+    assert "Горизонт ленты изменений отстает" in caplog.text
+
+    caplog.clear()
+    changes = await task_service.get_changes(user, None, 10)
+
+    assert len(changes.tasks) == 2
+    assert "Горизонт" not in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_get_changes_with_invalid_cursor(db_session, create_user):
+    user = await create_user()
+
+    with pytest.raises(ValueError, match="Некорректный курсор изменений."):
+        await TaskService().get_changes(user, "не курсор", 10)
+
+
+@pytest.mark.asyncio
+async def test_get_changes_uses_change_xid_index(db_session, explain_query):
+    query = (
+        select(Task)
+        .where(tuple_(Task.change_xid, Task.id) > (1, 0))
+        .order_by(Task.change_xid, Task.id)
+        .limit(100)
+    )
+
+    async with db_session as session:
+        plan = await explain_query(session, query)
+
+    assert "ix_tasks_change_xid_id" in plan
@@ -1,12 +1,13 @@
 import datetime
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import inspect, select
 
-from app.db.models import User
+from app.db.models import Task, User
 from app.schemes.user import CreateUser, UpdateUser, UserFilter
 from app.security.auth import AuthService
 from app.security.errors import AuthorizationError
+from app.services.loading import LoadingProfile
 from app.services.user import UserService
 
 
@@ -354,3 +355,74 @@ async def test_get_users_with_not_found_sort_field(
         await user_service.get_users(0, 5, sort_by, True, filter)
 
     assert "У пользователя нет поля 'test_field'." == str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_get_user_with_open_tasks_count_profile(db_session, create_user):
+    user = await create_user()
+
+    async with db_session as session:
+        session.add_all(
+            [
+                Task(title="1", assignee_id=user.id, status="To Do"),
+                Task(title="2", assignee_id=user.id, status="In Progress"),
+                Task(title="3", assignee_id=user.id, status="Done"),
+            ]
+        )
+        await session.commit()
+
+    user_service = UserService()
+
+    result = await user_service.get_user_by_id(
+        user.id, profile=LoadingProfile.USER_WITH_OPEN_TASKS_COUNT
+    )
+
+    assert result.open_tasks_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_users_public_profile_does_not_load_password(
+    db_session, create_user
+):
+    await create_user()
+    user_service = UserService()
+
+    users = await user_service.get_users(
+        0, 10, "id", True, UserFilter(), LoadingProfile.PUBLIC
+    )
+
+    assert "password" in inspect(users[0]).unloaded
+    assert users[0].version == 1
+
+
+@pytest.mark.asyncio
+async def test_get_users_with_created_range(db_session, create_user):
+    for day in (1, 2, 3):
+        await create_user(created_at=datetime.datetime(2026, 1, day, 23, 59))
+
+    user_service = UserService()
+
+    users = await user_service.get_users(
+        0,
+        10,
+        "id",
+        True,
+        UserFilter(
+            created_from=datetime.date(2026, 1, 2),
+            created_to=datetime.date(2026, 1, 3),
+        ),
+    )
+
+    assert [user.id for user in users] == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_get_users_created_filter_uses_index(db_session, explain_query):
+    query = UserService()._apply_filter(
+        select(User), UserFilter(created_at=datetime.date(2026, 1, 1))
+    )
+
+    async with db_session as session:
+        plan = await explain_query(session, query)
+
+    assert "ix_users_created_at" in plan